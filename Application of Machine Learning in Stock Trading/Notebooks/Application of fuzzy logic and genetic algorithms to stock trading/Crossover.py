@@ -1,9 +1,13 @@
 import math
 import random
 import copy
+import numpy as np
 from Gene import Gene
 from Genome import Genome
 from Population import Population
+from population_array import GenomeLayout, PopulationArray
+from mutation import MutationEngine
+from typing import Union
 
 def single_point(genome1:Genome, genome2:Genome) -> (Genome, Genome):
     """
@@ -757,7 +761,271 @@ def SBX(genome1:Genome, genome2:Genome) -> (Genome, Genome):
     offspring2.mutate()
     return offspring1, offspring2
 
-def crossover(population:Population, num_crossover:int =  25) -> Population:
+def _gene_valid(values:np.ndarray, layout:GenomeLayout, bounds:bool = True) -> np.ndarray:
+    """
+    This function checks each gene of the offspring as the crossover operators above do: the
+    nodes of a multi-valued gene must be strictly increasing, and, for SBX, every value must
+    be strictly within the bounds
+
+    Arguments:
+        values:np.ndarray
+            the (offspring x width) values
+
+        layout:GenomeLayout
+            the layout of the genes
+
+        bounds:bool
+            if True, the bounds are checked as well as the order
+
+    Returns:
+        valid:np.ndarray
+            the (offspring x genes) validity of each gene
+    """
+    valid = np.ones(values.shape, dtype = bool)
+    if bounds:
+        valid = (values > layout.lower) & (values < layout.upper)
+    valid[:, layout.next] &= values[:, layout.next] > values[:, layout.previous]
+    return np.logical_and.reduceat(valid, layout.starts, axis = 1)
+
+def _pick_nodes(offspring:np.ndarray, values1:np.ndarray, values2:np.ndarray, invalid:np.ndarray, layout:GenomeLayout) -> np.ndarray:
+    # degenerate the invalid genes into uniform crossover: each node is taken from either parent
+    columns = invalid[:, layout.gene_index]
+    from_first = np.random.uniform(0, 1, offspring.shape) > 0.5
+    offspring[columns] = np.where(from_first, values1, values2)[columns]
+    return offspring
+
+def _swap_genes(values1:np.ndarray, values2:np.ndarray, swap:np.ndarray, layout:GenomeLayout) -> (np.ndarray, np.ndarray):
+    # exchange the genes of the parents where swap is True
+    columns = swap[:, layout.gene_index]
+    return np.where(columns, values2, values1), np.where(columns, values1, values2)
+
+def single_point_array(values1:np.ndarray, values2:np.ndarray, layout:GenomeLayout) -> (np.ndarray, np.ndarray):
+    """
+    This function performs the single point crossover of single_point on pairs of parents at once
+
+    Arguments:
+        values1:np.ndarray
+            the (pairs x width) values of the first parents
+
+        values2:np.ndarray
+            the (pairs x width) values of the second parents
+
+        layout:GenomeLayout
+            the layout of the genes
+
+    Returns:
+        offspring1, offspring2:(np.ndarray, np.ndarray)
+            the (pairs x width) values of the offspring
+    """
+    num_genes = len(layout.names)
+    crossover_point = np.random.randint(1, num_genes, size = (len(values1), 1))
+    return _swap_genes(values1, values2, np.arange(num_genes) >= crossover_point, layout)
+
+def two_point_array(values1:np.ndarray, values2:np.ndarray, layout:GenomeLayout) -> (np.ndarray, np.ndarray):
+    """
+    This function performs the two-point crossover of two_point on pairs of parents at once;
+    the genes strictly between the two crossover points are exchanged
+
+    Arguments:
+        values1:np.ndarray
+            the (pairs x width) values of the first parents
+
+        values2:np.ndarray
+            the (pairs x width) values of the second parents
+
+        layout:GenomeLayout
+            the layout of the genes
+
+    Returns:
+        offspring1, offspring2:(np.ndarray, np.ndarray)
+            the (pairs x width) values of the offspring
+    """
+    num_genes = len(layout.names)
+    assert num_genes > 2, "two-point crossover needs at least three genes"
+
+    # two distinct crossover points, the first less than the second
+    points = np.sort(np.random.uniform(0, 1, (len(values1), num_genes - 1)).argsort(axis = 1)[:, :2], axis = 1) + 1
+    genes = np.arange(num_genes)
+    return _swap_genes(values1, values2, (genes > points[:, :1]) & (genes < points[:, 1:]), layout)
+
+def uniform_array(values1:np.ndarray, values2:np.ndarray, layout:GenomeLayout) -> (np.ndarray, np.ndarray):
+    """
+    This function performs the uniform crossover of uniform on pairs of parents at once
+
+    Arguments:
+        values1:np.ndarray
+            the (pairs x width) values of the first parents
+
+        values2:np.ndarray
+            the (pairs x width) values of the second parents
+
+        layout:GenomeLayout
+            the layout of the genes
+
+    Returns:
+        offspring1, offspring2:(np.ndarray, np.ndarray)
+            the (pairs x width) values of the offspring
+    """
+    return _swap_genes(values1, values2, np.random.uniform(0, 1, (len(values1), len(layout.names))) < 0.5, layout)
+
+def linear_array(values1:np.ndarray, values2:np.ndarray, layout:GenomeLayout) -> (np.ndarray, np.ndarray):
+    """
+    This function performs the linear crossover of linear on pairs of parents at once; each
+    offspring is a weighted mean of the parents with its own weights for every gene, and a
+    gene whose nodes are not strictly increasing is taken node by node from either parent
+
+    Arguments:
+        values1:np.ndarray
+            the (pairs x width) values of the first parents
+
+        values2:np.ndarray
+            the (pairs x width) values of the second parents
+
+        layout:GenomeLayout
+            the layout of the genes
+
+    Returns:
+        offspring1, offspring2:(np.ndarray, np.ndarray)
+            the (pairs x width) values of the offspring
+    """
+    offspring = list()
+    for _ in range(2):
+        # the scaling factors of each gene
+        alpha = np.random.uniform(0, 1, (len(values1), len(layout.names)))[:, layout.gene_index]
+        beta = np.random.uniform(0, 1, (len(values1), len(layout.names)))[:, layout.gene_index]
+        values = ((alpha * values1) + (beta * values2)) / (alpha + beta)
+
+        # the mean lies between the parents; clip the rounding, e.g. of two equal int genes, to them
+        values = np.clip(values, np.minimum(values1, values2), np.maximum(values1, values2))
+        values[:, layout.integer] = np.floor(values[:, layout.integer])
+
+        # the weighted mean keeps the bounds; only the order can fail, when the parents have equal nodes
+        offspring.append(_pick_nodes(values, values1, values2, ~_gene_valid(values, layout, bounds = False), layout))
+    return offspring[0], offspring[1]
+
+def _sbx_cdf(beta:np.ndarray, n:np.ndarray) -> np.ndarray:
+    # the probability of a spread factor below beta in SBX with distribution index n
+    return np.where(beta <= 1, 0.5 * np.minimum(beta, 1) ** (n + 1), 1 - 0.5 / np.maximum(beta, 1) ** (n + 1))
+
+def _sbx_ratio(bound:np.ndarray, spread:np.ndarray, strict:Union[bool, np.ndarray] = True) -> np.ndarray:
+    # the largest factor that keeps bound - factor * spread positive; -inf if none does
+    ratio = np.divide(bound, spread, out = np.full(bound.shape, np.inf), where = spread > 0)
+    feasible = np.where(strict, bound > 0, bound >= 0)
+    return np.where(feasible, ratio, -np.inf)
+
+def SBX_array(values1:np.ndarray, values2:np.ndarray, layout:GenomeLayout) -> (np.ndarray, np.ndarray):
+    """
+    Simulated Binary Crossover
+
+    This function performs the simulated binary crossover of SBX on pairs of parents at once.
+    The offspring of a gene are m + beta * h and m - beta * h, where m is the mean of the
+    parents and h half their difference, so the spread factors beta that keep a gene within
+    its bounds and its nodes strictly increasing are those below a limit. Instead of drawing
+    beta until it is below the limit, the distribution index and beta are drawn from their
+    distribution given that beta is below the limit; a gene for which no beta is valid is
+    taken node by node from either parent, as SBX does once it gives up
+
+    Arguments:
+        values1:np.ndarray
+            the (pairs x width) values of the first parents
+
+        values2:np.ndarray
+            the (pairs x width) values of the second parents
+
+        layout:GenomeLayout
+            the layout of the genes
+
+    Returns:
+        offspring1, offspring2:(np.ndarray, np.ndarray)
+            the (pairs x width) values of the offspring
+    """
+    mean = 0.5 * (values1 + values2)
+    half = 0.5 * (values1 - values2)
+    spread = np.abs(half)
+
+    # the limit of each bound; an int gene is floored, so it only needs to reach the next integer above the lower bound
+    lower = np.where(layout.integer, np.floor(layout.lower) + 1, layout.lower)
+    upper = np.where(layout.integer, np.ceil(layout.upper), layout.upper)
+    ratio = np.minimum(_sbx_ratio(mean - lower, spread, strict = ~layout.integer), _sbx_ratio(upper - mean, spread))
+
+    # the limit of the order of the nodes, on the column of the later node
+    order = _sbx_ratio(mean[:, layout.next] - mean[:, layout.previous], np.abs(half[:, layout.next] - half[:, layout.previous]))
+    ratio[:, layout.next] = np.minimum(ratio[:, layout.next], order)
+    limit = np.minimum.reduceat(ratio, layout.starts, axis = 1)
+    no_beta = ~(limit > 0)
+    limit = np.maximum(limit, 0)
+
+    # draw the distribution index with the probability that it gives a valid beta, then beta below the limit
+    indices = np.array([2, 3, 4, 5])
+    cdf = _sbx_cdf(limit[..., None], indices)
+    cumulative = np.cumsum(cdf, axis = -1)
+    choice = (np.random.uniform(0, 1, limit.shape + (1,)) * cumulative[..., -1:] >= cumulative).sum(axis = -1)
+    choice = np.minimum(choice, len(indices) - 1)
+    n = indices[choice]
+    u = np.random.uniform(0, 1, limit.shape) * np.take_along_axis(cdf, choice[..., None], axis = -1)[..., 0]
+    beta = np.where(u <= 0.5, (2 * u) ** (1 / (n + 1)), (1 / (2 * (1 - u))) ** (1 / (n + 1)))
+    beta = beta[:, layout.gene_index]
+
+    offspring = list()
+    for sign in [1, -1]:
+        values = mean + sign * beta * half
+        values[:, layout.integer] = np.floor(values[:, layout.integer])
+
+        # the genes with no valid beta, and any gene rounded onto its limit, are taken from the parents
+        offspring.append(_pick_nodes(values, values1, values2, no_beta | ~_gene_valid(values, layout), layout))
+    return offspring[0], offspring[1]
+
+# the crossover operators on arrays of parents, and whether their offspring are mutated as in the operators above
+CROSSOVER_ARRAY_OPERATORS = {
+    "single_point": (single_point_array, True),
+    "two_point": (two_point_array, False),
+    "uniform": (uniform_array, True),
+    "linear": (linear_array, True),
+    "SBX": (SBX_array, True),
+}
+
+def crossover_array(population:PopulationArray, num_crossover:int = 25, mutation:MutationEngine = None) -> PopulationArray:
+    """
+    This function performs the crossover of crossover on a population array: it picks the
+    parents and the operator of each pair at random, produces the offspring of each operator
+    in one step, and appends them to the population, two offspring per pair
+
+    Arguments:
+        population:PopulationArray
+            the population to be crossed over
+
+        num_crossover:int
+            the number of pairs of parents
+
+        mutation:MutationEngine
+            the engine that mutates the offspring; an engine seeded from the system if not given
+
+    Returns:
+        new_population:PopulationArray
+            the population followed by the offspring of each pair
+    """
+    layout = population.layout
+    parents = np.random.randint(0, len(population), size = (num_crossover, 2))
+    operators = np.random.randint(0, len(CROSSOVER_ARRAY_OPERATORS), size = num_crossover)
+
+    # the offspring of pair i are the rows 2i and 2i + 1
+    offspring = np.empty((num_crossover, 2, layout.width))
+    mutated = np.zeros(num_crossover, dtype = bool)
+    for code, (operator, mutate) in enumerate(CROSSOVER_ARRAY_OPERATORS.values()):
+        pairs = np.flatnonzero(operators == code)
+        if len(pairs) == 0:
+            continue
+        offspring[pairs, 0], offspring[pairs, 1] = operator(population.values[parents[pairs, 0]], population.values[parents[pairs, 1]], layout)
+        mutated[pairs] = mutate
+
+    if mutation is None:
+        mutation = MutationEngine(layout)
+    assert mutation.layout == layout, "the mutation engine has another layout"
+    offspring = offspring.reshape(-1, layout.width)
+    mutation.mutate(offspring, np.flatnonzero(np.repeat(mutated, 2)))
+    return PopulationArray.concatenate([population, PopulationArray(layout, offspring)])
+
+def crossover(population:Union[Population, PopulationArray], num_crossover:int =  25, mutation:MutationEngine = None) -> Union[Population, PopulationArray]:
     """
     This function is a wrapper for all the crossover operators
     as provided above.
@@ -766,6 +1034,10 @@ def crossover(population:Population, num_crossover:int =  25) -> Population:
         population:Population
             the population to be 
     """
+    # a population array is crossed over in one step
+    if isinstance(population, PopulationArray):
+        return crossover_array(population = population, num_crossover = num_crossover, mutation = mutation)
+
     new_population = list()
     population_list = population.population
     CROSSOVER_OPERATORS = ["single_point", "two_point", "uniform", "linear", "SBX"]
@@ -1,10 +1,21 @@
 from Gene import Gene
 from Genome import Genome
 from Population import Population
+from population_array import GenomeLayout, PopulationArray
+from mutation import MutationEngine
+from checkpoint import write_checkpoint, read_checkpoint, get_random_state, set_random_state
 from Crossover import single_point, two_point, uniform, linear, SBX, crossover
-from Fitness import evaluate_fitness
-from Selection import RWS, SUS, tournament, rank
+from Fitness import evaluate_fitness, screen_fitness
+from Selection import SELECTION_OPERATORS, evaluate_population, successive_halving, adjust_fitness
+from indicator_tensor import IndicatorTensorStore
+from fitness_cache import FitnessCache
+from fitness_evaluator import FitnessEvaluator
+from helper_module import SlidingWindows
+from typing import Union
+import functools
+import itertools
 import random
+import numpy as np
 import pandas as pd
 import os
 import pickle
@@ -15,7 +26,7 @@ class Evolution():
     Some text
     """
     
-    def __init__(self, population:Population = None) -> None:
+    def __init__(self, population:Union[Population, PopulationArray] = None) -> None:
         """
         Some text
         """
@@ -23,30 +34,212 @@ class Evolution():
             self.population = Population
         else:
             self.population = population
+        self.tensors = None
+        self.fitness_cache = FitnessCache()
+        self.evaluator = None
+        self.halving = None
+        self.num_windows = 1
+        self.spread = None
+        self.mutation_rate = 0.1
+        self.seed = None
+        self.mutation = None
+        self.duplicate_history = list()
+        self.checkpoint_path = "./checkpoints"
+        self.compress_checkpoints = False
+        self.generation = 0
+        self.fitness = None
         
-    def define_train_set(self, train_set:pd.DataFrame):
+    def define_train_set(self, train_set:Union[SlidingWindows, list[pd.DataFrame]]):
         """
         Some text
         """
         self.train_set = train_set
+        self.close()
         
     def initialize_population(self, base_genome:Genome, seed_genome:Genome):
         """
         Some text
         """
-        self.population.seed_population(seed_genome = seed_genome, num_seeds = 25)
-        self.population.add_and_initialize_to_population(base_genome = base_genome, num_genomes = 75)        
+        population = self.population.to_population() if isinstance(self.population, PopulationArray) else self.population
+        population.seed_population(seed_genome = seed_genome, num_seeds = 25)
+        
+        # the random genomes are initialized in one step by the mutation engine
+        layout = GenomeLayout(base_genome.genome)
+        random_genomes = PopulationArray(layout, self._mutation_engine(layout).initialize(num_genomes = 75))
+        self.population = PopulationArray.concatenate([PopulationArray.from_population(population, layout), random_genomes])
         
     def define_fitness_func(self, fitness_func:callable):
         """
         Some text
         """
         self.fitness_func = fitness_func
+        self.close()
+        
+    def define_indicator_tensors(self, tensors:IndicatorTensorStore):
+        """
+        This function sets the precomputed all-window indicator tensors of the stock;
+        the fitness function slices the indicators from these instead of computing them
+        
+        Arguments:
+            tensors:IndicatorTensorStore
+                the indicator tensors built from the history the train set was sliced from
+        
+        Returns:
+            None
+        """
+        self.tensors = tensors
+        self.close()
+        
+    def define_fitness_cache(self, fitness_cache:Union[FitnessCache, None]):
+        """
+        This function sets the cache of the fitness of the genomes; the genomes whose
+        fitness on the training set of a generation is cached are not evaluated again
+        
+        Arguments:
+            fitness_cache:Union[FitnessCache, None]
+                the cache of the fitness; None evaluates every genome in every generation
+        
+        Returns:
+            None
+        """
+        self.fitness_cache = fitness_cache
+        
+    def define_successive_halving(self, min_bars:Union[int, None] = 125, eta:int = 2, screen_func:callable = screen_fitness):
+        """
+        This function makes the evaluation of a generation screen the genomes on prefixes
+        of the training window first; only the best genomes of each round are evaluated on
+        a longer prefix, and the rest are given a fitness of -inf
+        
+        Arguments:
+            min_bars:Union[int, None]
+                the number of bars of the first round; None evaluates every genome on
+                the whole training window
+                
+            eta:int
+                the factor by which the prefix grows and the genomes are cut every round
+                
+            screen_func:callable
+                the fitness function of the prefixes; screen_fitness goes with evaluate_fitness
+        
+        Returns:
+            None
+        """
+        assert min_bars is None or self.num_windows == 1, "successive halving screens a single training window"
+        self.halving = None if min_bars is None else (min_bars, eta, screen_func)
+        self.close()
+        
+    def define_windows_per_generation(self, num_windows:int = 1, spread:int = None):
+        """
+        This function makes every generation evaluate the genomes on several training windows;
+        the fitness function should take the windows in their span, e.g. multi_window_fitness
+        
+        Arguments:
+            num_windows:int
+                the number of training windows of a generation
+                
+            spread:int
+                if given, the windows are picked among spread consecutive windows, so their
+                span, where the indicators are computed, is shorter; None picks them among
+                the whole train set
+        
+        Returns:
+            None
+        """
+        assert num_windows >= 1, "a generation needs at least one training window"
+        assert num_windows == 1 or self.halving is None, "successive halving screens a single training window"
+        assert spread is None or spread >= num_windows, "the spread should hold all the windows"
+        self.num_windows = num_windows
+        self.spread = spread
+        
+    def define_mutation(self, mutation_rate:float = 0.1, seed:int = None):
+        """
+        This function sets the mutation of the genomes; the random genomes of the initial
+        population and the mutations of the offspring are drawn from a numpy Generator
+        seeded with seed, so they are the same in every run with the same seed
+        
+        Arguments:
+            mutation_rate:float
+                the probability that a gene of an offspring is mutated
+                
+            seed:int
+                the seed of the random number generator; None seeds it from the system
+        
+        Returns:
+            None
+        """
+        assert 0 <= mutation_rate <= 1, "the mutation rate is a probability"
+        self.mutation_rate = mutation_rate
+        self.seed = seed
+        self.mutation = None
+        
+    def _mutation_engine(self, layout:GenomeLayout) -> MutationEngine:
+        # the engine is kept between generations, so its random numbers continue from one generation to the next
+        if self.mutation is None or self.mutation.layout != layout:
+            self.mutation = MutationEngine(layout, mutation_rate = self.mutation_rate, seed = self.seed)
+        return self.mutation
+        
+    def start_evaluator(self, processes:int = None, timeout:float = None) -> FitnessEvaluator:
+        """
+        This function starts the workers that evaluate the fitness of the genomes; the
+        training set is published to them once, and they are kept until close() or until
+        the train set, fitness function, or indicator tensors are redefined
+        
+        Arguments:
+            processes:int
+                the number of workers; cpu_count() if not given
+                
+            timeout:float
+                the seconds the evaluation of a genome may take before it is given a
+                fitness of -inf; no limit if not given
+        
+        Returns:
+            evaluator:FitnessEvaluator
+                the evaluator of the fitness of the genomes
+        """
+        self.close()
+        
+        # pass the indicator tensors, if any, to the fitness function and the screen function
+        fitness_func = self.fitness_func
+        screen_func = None if self.halving is None else self.halving[2]
+        if self.tensors is not None:
+            fitness_func = functools.partial(self.fitness_func, tensors = self.tensors)
+            screen_func = None if screen_func is None else functools.partial(screen_func, tensors = self.tensors)
+        
+        self.evaluator = FitnessEvaluator(train_set = self.train_set, fitness_func = fitness_func, processes = processes, timeout = timeout, screen_func = screen_func)
+        return self.evaluator
+        
+    def close(self) -> None:
+        """
+        This function stops the workers, if any, and frees the training set they share
         
-    def define_checkpoint_path(self, checkpoint_path:str = "./checkpoint"):
+        Arguments:
+            None
+        
+        Returns:
+            None
+        """
+        if getattr(self, "evaluator", None) is not None:
+            self.evaluator.close()
+        self.evaluator = None
+        
+    def define_checkpoint_path(self, checkpoint_path:str = "./checkpoints", compress:bool = False):
+        """
+        This function sets where the checkpoints of the evolution are written
+        
+        Arguments:
+            checkpoint_path:str
+                the directory of the checkpoints
+                
+            compress:bool
+                if True, the arrays of the checkpoints are compressed; smaller, but slower to write
+        
+        Returns:
+            None
+        """
         self.checkpoint_path = checkpoint_path
+        self.compress_checkpoints = compress
     
-    def run(self, num_generations:int = 100,  checkpoint_interval:int = 5, checkpoint_path:str = "./checkpoints" ):
+    def run(self, num_generations:int = 100,  checkpoint_interval:int = 5, checkpoint_path:str = None):
         """
         This function simulates evolution through the population
         of genes
@@ -61,72 +254,192 @@ class Evolution():
             checkpoints: int
                 the interval for saving a checkpoint in the evolution of the genomes
                 
+            checkpoint_path:str
+                the directory of the checkpoints; the one set by define_checkpoint_path if not given
+                
         Returns:
             None
             
         """
-        self.checkpoint_path = checkpoint_path
-        new_population = Population()
+        if checkpoint_path is not None:
+            self.checkpoint_path = checkpoint_path
+        
+        # keep the gene values of the population in one array
+        if not isinstance(self.population, PopulationArray):
+            self.population = PopulationArray.from_population(self.population)
+        
+        # start the workers once; they are kept between generations and between runs
+        if self.evaluator is None:
+            self.start_evaluator()
+        
         for generation in range(num_generations):
             
             print(f"Generation {generation}")
-            selection_choices = ["RWS", "SUS", "tournament", "rank"]
+            selection_choices = list(SELECTION_OPERATORS)
             selection_operator = random.choice(selection_choices)
             
-            if selection_operator == "RWS":
-                new_population, average_fitness = RWS(population = self.population, fitness_func = self.fitness_func, series = self.train_set[random.randint(1, len(self.train_set))])
-                new_population = crossover(population=new_population)
-                
-            if selection_operator == "SUS":
-                new_population, average_fitness = SUS(population = self.population, fitness_func = self.fitness_func, series = self.train_set[random.randint(1, len(self.train_set))])
-                new_population = crossover(population=new_population)
-                
-            if selection_operator == "tournament":
-                new_population, average_fitness = tournament(population = self.population, fitness_func = self.fitness_func, series = self.train_set[random.randint(1, len(self.train_set))])
-                new_population = crossover(population=new_population)
-                
-            if selection_operator == "rank":
-                new_population, average_fitness = rank(population = self.population, fitness_func = self.fitness_func, series = self.train_set[random.randint(1, len(self.train_set))])
-                new_population = crossover(population=new_population)
+            # pick the training window of the generation, or several windows in order
+            if self.num_windows == 1:
+                window = random.randint(0, len(self.train_set)-1)
+            else:
+                spread = len(self.train_set) if self.spread is None else min(self.spread, len(self.train_set))
+                start = random.randint(0, len(self.train_set) - spread)
+                window = sorted(random.sample(range(start, start + spread), self.num_windows))
+            
+            # evaluate the population once, then select from its fitness and vary the selected genomes
+            fitness = self.evaluate(window = window)
+            new_population, new_fitness, average_fitness = self.select(fitness = fitness, selection_operator = selection_operator)
+            new_population = crossover(population = new_population, mutation = self._mutation_engine(self.population.layout))
             
+            # the offspring follow the selected genomes, and are not evaluated yet
             self.population = new_population
+            self.fitness = np.concatenate([new_fitness, np.full(len(new_population) - len(new_fitness), np.nan)])
+            self.generation += 1
             
             print(f"fitness of generation {generation}:\t{average_fitness}")
             
+            # report the genomes that were copies of another genome in this generation
+            stats = self.duplicate_history[-1]
+            print(f"duplicates of generation {generation}:\t{stats['duplicates']} of {stats['genomes']} genomes ({stats['duplicate_ratio']:.0%})")
+            
+            # report the genomes that were not evaluated again in this generation
+            if self.fitness_cache is not None:
+                stats = self.fitness_cache.end_generation()
+                print(f"fitness cache of generation {generation}:\t{stats['hits']} hits, {stats['misses']} evaluations ({stats['hit_rate']:.0%})")
+            
+            # report how busy the workers were in this generation
+            report = self.evaluator.end_generation()
+            print(f"workers of generation {generation}:\t{report['utilization']:.0%} utilization, {report['timeouts']} timeouts")
+            
             # set checkpoints in the evolution
             if generation % checkpoint_interval == 0:
                 self._set_checkpoint()        
         
         return self.population
         
+    def evaluate(self, window:Union[int, list[int]]) -> np.ndarray:
+        """
+        This function evaluates the fitness of the genomes in the population on a training window
+        
+        Arguments:
+            window:Union[int, list[int]]
+                the position of the training window in the train set, or the positions of several
+        
+        Returns:
+            fitness:np.ndarray
+                the fitness of each genome in the population
+        """
+        # evaluate each set of genomes with the same gene values once, e.g. the copies of the seed genome
+        unique_population, inverse = self.population.unique()
+        self.duplicate_history.append(Population.duplicate_stats(inverse))
+        
+        if self.halving is not None:
+            min_bars, eta, _ = self.halving
+            fitness = successive_halving(
+                genome_list = unique_population.population,
+                fitness_func = self.evaluator.fitness_func,
+                series = self.train_set[window],
+                min_bars = min_bars,
+                eta = eta,
+                screen_func = self.evaluator.screen_func,
+                cache = self.fitness_cache,
+                evaluator = self.evaluator,
+                window = window
+            )
+        else:
+            fitness = evaluate_population(
+                genome_list = unique_population.population,
+                fitness_func = self.evaluator.fitness_func,
+                series = [self.train_set[idx] for idx in window] if isinstance(window, list) else self.train_set[window],
+                cache = self.fitness_cache,
+                evaluator = self.evaluator,
+                window = window
+            )
+        return fitness[inverse]
+        
+    def select(self, fitness:np.ndarray, selection_operator:str, num_new_population:int = 50) -> (PopulationArray, np.ndarray, float):
+        """
+        This function selects the genomes of the new population from the fitness of the population
+        
+        Arguments:
+            fitness:np.ndarray
+                the fitness of each genome in the population, from evaluate
+                
+            selection_operator:str
+                the name of the selection operator; see SELECTION_OPERATORS
+                
+            num_new_population:int
+                the number of genomes to be selected
+        
+        Returns:
+            new_population, new_fitness, average_fitness:(PopulationArray, np.ndarray, float)
+                the selected genomes, their fitness, and the average adjusted fitness of the population
+        """
+        valid, adjusted_fitness, average_fitness = adjust_fitness(fitness)
+        assert len(valid) > 0, "no genome in the population has a valid fitness"
+        
+        selected = SELECTION_OPERATORS[selection_operator](adjusted_fitness, num_new_population = num_new_population)
+        return self.population[valid[selected]], fitness[valid[selected]], average_fitness
+        
     def _set_checkpoint(self) -> None:
         """
-        This function sets a checkpoint during the run of the evolution
+        This function sets a checkpoint during the run of the evolution: the gene values and
+        the fitness of the population, the layout of the genes, the generation, and the state
+        of the random number generators, written to checkpoint<generation>.npz in the
+        directory of the checkpoints; see checkpoint.write_checkpoint
         
         Arguments:
-            population:Population
-                the population to be saved
+            self
+                the instance of the class
             
         Returns:
             None
         """
-        
-        # check if the directory of the checkpoint exists
-        # if it does not exists yet, create the direcotry
-        if not os.path.exists(self.checkpoint_path):
-            os.makedirs(self.checkpoint_path)
-            
-        # write the information of the population object to the directory
-        with open(f'./checkpoints/checkpoint{self.population.population_id}.pkl', 'wb') as output:
-            pickle.dump(self.population, output, 0)
-        
+        state, arrays = get_random_state(None if self.mutation is None else self.mutation.rng)
+        metadata = {
+            "random_state": state,
+            "mutation_rate": self.mutation_rate,
+            "seed": None if self.seed is None else int(self.seed),
+        }
+        write_checkpoint(
+            path = os.path.join(self.checkpoint_path, f"checkpoint{self.generation}.npz"),
+            population = self.population,
+            fitness = self.fitness,
+            generation = self.generation,
+            metadata = metadata,
+            arrays = arrays,
+            compress = self.compress_checkpoints
+        )
         
     def load_checkpoint(self, checkpoint_path:str):
         """
-        Some text
+        This function resumes the evolution from a checkpoint set by _set_checkpoint; the
+        random number generators are restored, so the evolution continues as it would
+        have from the checkpoint
+        
+        Arguments:
+            checkpoint_path:str
+                the path of the checkpoint; a .pkl checkpoint of an older version only
+                holds the population, and is unpickled
+        
+        Returns:
+            population:PopulationArray
+                the population of the checkpoint
         """
-        with open(checkpoint_path, 'rb') as input:
-            self.population = pickle.load(input)
-            
+        if checkpoint_path.endswith(".pkl"):
+            with open(checkpoint_path, 'rb') as input:
+                self.population = pickle.load(input)
+            return self.population
+        
+        checkpoint = read_checkpoint(checkpoint_path)
+        metadata = checkpoint["metadata"]
+        self.population = checkpoint["population"]
+        self.fitness = checkpoint["fitness"]
+        self.generation = checkpoint["generation"]
+        self.define_mutation(mutation_rate = metadata["mutation_rate"], seed = metadata["seed"])
+        set_random_state(metadata["random_state"], checkpoint["arrays"], self._mutation_engine(self.population.layout).rng)
+        
+        # the new genomes should not reuse the ids of the genomes of the checkpoint
+        next_id = next(Genome.genome_id)
+        Genome.genome_id = itertools.count(max(next_id, int(self.population.genome_ids.max(initial = -1)) + 1))
         return self.population
-    
\ No newline at end of file
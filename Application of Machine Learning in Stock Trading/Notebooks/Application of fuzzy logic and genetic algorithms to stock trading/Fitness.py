@@ -5,13 +5,91 @@ import numpy as np
 import pandas as pd
 from Genome import Genome
 from fuzzy_ta import fuzzy_TA
+from indicator_cache import IndicatorCache, indicator_cache
+from indicator_tensor import IndicatorTensorStore
+from fuzzy_tail import warm_up
 import matplotlib.pyplot as plt
 
 
-def sortino_fitness(series:pd.DataFrame, genome:Genome) -> float:
+class BacktestResult():
     """
-    This is a fitness function that evaluates a genome's fitness based on the
-    sortino ratio; a higher value means a higher fitness
+    This class holds the metrics of one backtest, computed together from its returns;
+    the fitness functions are formulas of these metrics, so a genome is simulated once
+    however many of them are needed
+    """
+
+    def __init__(self, regime:np.ndarray, returns:np.ndarray, change:np.ndarray, num_trades:int, risk_free_rate_returns:float = 2.5, stopped:bool = False) -> None:
+        """
+        This function computes for the metrics of a backtest
+
+        Arguments:
+            regime:np.ndarray
+                the (T,) regime of the strategy, from backtest
+
+            returns:np.ndarray
+                the (T,) returns of the strategy, from backtest
+
+            change:np.ndarray
+                the (T,) ratio of each closing price to the one before
+
+            num_trades:int
+                the number of positions bought
+
+            risk_free_rate_returns:float
+                the returns of a risk free strategy, used by the sharpe and sortino ratios
+
+            stopped:bool
+                whether the backtest stopped early at a limit; the metrics then only
+                cover the bars simulated
+
+        Returns:
+            None
+        """
+        regime = np.asarray(regime)
+        returns = np.asarray(returns, dtype = np.float64)
+        change = np.asarray(change, dtype = np.float64)
+
+        # the growth of the strategy and of buying and holding the stock
+        equity = np.cumprod(returns)
+        self.total_returns = equity[-1] if len(equity) > 0 else np.nan
+        self.bnh_returns = np.nancumprod(change)[-1] if np.isfinite(change).any() else np.nan
+
+        # the sample standard deviations of all returns and of the losing returns
+        self.returns_std = self._std(returns)
+        self.downside_returns_std = self._std(returns[returns < 1])
+        self.sharpe = sharpe_ratio(portfolio_returns = self.total_returns, std_portfolio_returns = self.returns_std, risk_free_rate_returns = risk_free_rate_returns)
+        self.sortino = sortino_ratio(portfolio_returns = self.total_returns, std_downside_portfolio_returns = self.downside_returns_std, risk_free_rate_returns = risk_free_rate_returns)
+
+        # the largest fall of the growth of the strategy from its running peak
+        self.max_drawdown = np.max(1 - equity / np.maximum.accumulate(equity)) if len(equity) > 0 else 0.
+
+        # the range of the daily returns relative to the largest; this is the
+        # drawdown term the fitness functions have always used
+        self.returns_range = np.ptp(returns) / returns.max() if len(returns) > 0 else np.nan
+
+        # the number of trades and the fraction of the bars spent in the market
+        self.num_trades = num_trades
+        self.exposure = np.count_nonzero(regime) / len(regime) if len(regime) > 0 else 0.
+        self.stopped = stopped
+
+    @staticmethod
+    def _std(values:np.ndarray) -> float:
+        # the sample standard deviation as pandas computes it; NaN for fewer than two values
+        if len(values) < 2:
+            return np.nan
+        return np.std(values, ddof = 1)
+
+    def to_dict(self) -> dict:
+        # the metrics of the backtest
+        return dict(vars(self))
+
+    def __repr__(self) -> str:
+        return "BacktestResult(" + ", ".join(f"{name}={value:.6g}" for name, value in vars(self).items()) + ")"
+
+
+def _genome_fitness(series:pd.DataFrame, genome:Genome, tensors:IndicatorTensorStore, score:callable, max_trades:int = None) -> float:
+    """
+    This function backtests a genome once and scores the result
 
     Arguments:
         series:pd.DataFrame
@@ -20,283 +98,118 @@ def sortino_fitness(series:pd.DataFrame, genome:Genome) -> float:
         genome:Genome
             the genome to be asssessed
 
-    Returns:
-        fitness:float
-            the sortino ratio based on the strategy produced by the genome
-    """
-    # get the fuzzified technical indicators of a stock and its corresponding inference value z_sum
-    stock = get_fuzzy_stock_df(series = series, genome = genome)
+        tensors:IndicatorTensorStore
+            the precomputed all-window indicator tensors of the stock, if any
 
-    # initialize the following variables
-    stock.df['trailingstop'] = 0.
-    stock.df['returns'] = 1.0
-    stock.df['change'] = stock.df['Close'].pct_change()+1
-    stock.df['regime'] = 0
-    has_long_position = False
-    num_trades = 0
-    buy_locator = list()
-    sell_locator = list()
-    trailingstop = 1
-    
-    for i in range(0, len(stock.df)-1):
-        # check condition for entry
-        condition1 = stock.df['z_sum_rolling'].iat[i] >= genome.genome_dict["entry_condition"].value[1]
-        condition2 = has_long_position is False
-        condition3 = stock.df['regime'].iat[i] != -1
-        if condition1 and condition2 and condition3:
-            # buy stock in the next day
-            stock.df['regime'].iat[i+1] = 1
-            has_long_position = True
-            num_trades += 1
-            buy_locator.append(stock.df.iloc[i])
-            trailingstop = 1
-            continue
-            
-        # establish trailing stop
-        if has_long_position is True:
-            trailingstop *= stock.df['change'].iat[i]
-                
-        # check conditions for exit
-        condition1 = stock.df['z_sum_rolling'].iat[i] < genome.genome_dict["entry_condition"].value[0]
-        condition2 = trailingstop < genome.genome_dict["stop_loss"].value
-        condition3 = has_long_position is True
-        if( (condition1) or (condition2) ) and condition3:
-            stock.df['regime'].iat[i+1] = -1
-            has_long_position = False
-            sell_locator.append(stock.df.iloc[i])
-            trailingstop = 1
+        score:callable
+            a function of the BacktestResult that returns the fitness, e.g. sortino_score
 
-    # put 1 between 1 and -1 
-    for i in range(1, len(stock.df)):
-        if stock.df['regime'].iat[i-1] == 1 and stock.df['regime'].iat[i] == 0:
-            stock.df['regime'].iat[i] = 1
+        max_trades:int
+            if given, the genome is rejected as soon as it buys more positions than this
 
-    # compute returns
-    for i in range(0, len(stock.df)):
-        if stock.df['regime'].iat[i] != 0:
-            stock.df['returns'].iat[i] = stock.df['change'].iat[i]
-    
-    # get the returns of the strategy
-    strat_returns = stock.df['returns'].cumprod().iat[-1]
-    
-    # get the downside returns
-    downside_returns_df = None
-    downside_returns_df = stock.df.loc[stock.df['returns'] < 1]
-    
-    # compute for the downside returns standard deviation
-    downside_returns_std = downside_returns_df['returns'].std()
+    Returns:
+        fitness:float
+            the fitness of the genome; -inf if the genome could not be evaluated or was rejected
+    """
+    result = backtest_genome(series = series, genome = genome, tensors = tensors, max_trades = max_trades)
+    if result is None or result.stopped:
+        return float("-inf")
+    return score(result)
 
-    # compute for the sortino ration of the strategy
-    strat_sortino_ratio = sortino_ratio(portfolio_returns = strat_returns, std_downside_portfolio_returns = downside_returns_std)
-    
+def sortino_score(result:BacktestResult) -> float:
     # check if sortino ratio is negative or NaN;
     # if it is negative or NaN, degenerate it into 0
-    if np.isnan(strat_sortino_ratio):
-        strat_sortino_ratio = float('-inf')
+    if np.isnan(result.sortino):
+        return float('-inf')
+    return result.sortino
 
-    return strat_sortino_ratio
+def sharpe_score(result:BacktestResult) -> float:
+    # check if sharpe ratio is negative or NaN;
+    # if it is negative or NaN, degenerate it into 0
+    if np.isnan(result.sharpe):
+        return float('-inf')
+    return result.sharpe
 
-def sharpe_fitness(series:pd.DataFrame, genome:Genome):
-    """
-    Some text
-    """
-    # get the fuzzified technical indicators of a stock and its corresponding inference value z_sum
-    stock = get_fuzzy_stock_df(series = series, genome = genome)
-    # # stock.df['z_sum_ewm'] = stock.df['z_sum'].ewm(span=7).mean()
-    # # print(stock.df[['z_sum', 'z_sum_rolling', 'z_sum_ewm']].tail(20))
+def num_trades_score(result:BacktestResult) -> float:
+    return (1/(1+result.num_trades))
 
-    # initialize the following variables
-    stock.df['trailingstop'] = 0.
-    stock.df['returns'] = 1.0
-    stock.df['change'] = stock.df['Close'].pct_change()+1
-    stock.df['regime'] = 0
-    has_long_position = False
-    num_trades = 0
-    buy_locator = list()
-    sell_locator = list()
-    trailingstop = 1
-    
-    for i in range(0, len(stock.df)-1):
-        # check condition for entry
-        condition1 = stock.df['z_sum_rolling'].iat[i] >= genome.genome_dict["entry_condition"].value[1]
-        condition2 = has_long_position is False
-        condition3 = stock.df['regime'].iat[i] != -1
-        if condition1 and condition2 and condition3:
-            # buy stock in the next day
-            stock.df['regime'].iat[i+1] = 1
-            has_long_position = True
-            num_trades += 1
-            buy_locator.append(stock.df.iloc[i])
-            trailingstop = 1
-            continue
-            
-        # establish trailing stop
-        if has_long_position is True:
-            trailingstop *= stock.df['change'].iat[i]
-                
-        # check conditions for exit
-        condition1 = stock.df['z_sum_rolling'].iat[i] < genome.genome_dict["entry_condition"].value[0]
-        condition2 = trailingstop < genome.genome_dict["stop_loss"].value
-        condition3 = has_long_position is True
-        if( (condition1) or (condition2) ) and condition3:
-            stock.df['regime'].iat[i+1] = -1
-            has_long_position = False
-            sell_locator.append(stock.df.iloc[i])
-            trailingstop = 1
+def max_drawdown_score(result:BacktestResult) -> float:
+    return 1-result.returns_range
 
-    # put 1 between 1 and -1 
-    for i in range(1, len(stock.df)):
-        if stock.df['regime'].iat[i-1] == 1 and stock.df['regime'].iat[i] == 0:
-            stock.df['regime'].iat[i] = 1
+def evaluate_score(result:BacktestResult) -> float:
+    """
+    This function scores a backtest by its sortino ratio, discounted by the range of
+    its daily returns; strategies with more than 20 trades are rejected
 
-    # compute returns
-    for i in range(0, len(stock.df)):
-        if stock.df['regime'].iat[i] != 0:
-            stock.df['returns'].iat[i] = stock.df['change'].iat[i]
-    
-    # get the returns of the strategy
-    strat_returns = stock.df['returns'].cumprod().iat[-1]
-    
-    # compute for the returns standard deviation
-    returns_std = stock.df["returns"].std()
+    Arguments:
+        result:BacktestResult
+            the metrics of the backtest
 
-    # compute for the sharpe ratio of the strategy
-    strat_sharpe_ratio = sharpe_ratio(portfolio_returns = strat_returns, std_portfolio_returns = returns_std)
+    Returns:
+        fitness:float
+            the fitness of the genome
+    """
+    strat_sortino_ratio = result.sortino
+    max_drawdown = result.returns_range
 
-    # check if sharpe ratio is negative or NaN;
+    # check if sortino ratio is negative or NaN;
     # if it is negative or NaN, degenerate it into 0
-    if np.isnan(strat_sharpe_ratio):
-        strat_sharpe_ratio = float('-inf')
+    if np.isnan(strat_sortino_ratio) or result.num_trades > 20:
+        strat_sortino_ratio = float('-inf')
+
+    if (strat_sortino_ratio == float('-inf')) and (max_drawdown == 0.):
+        fitness = float("-inf")
+
+    elif strat_sortino_ratio > 0:
+        # fitness = strat_sortino_ratio * (1/(1+num_trades)) * max_drawdown
+        fitness = strat_sortino_ratio * (1-max_drawdown)
     
-    return strat_sharpe_ratio
-    # return (stock, num_trades, bnh_returns, strat_returns, strat_sharpe_ratio, strat_sortino_ratio, max_drawdown)
+    elif strat_sortino_ratio < 0:
+        # fitness = strat_sortino_ratio * (num_trades) * max_drawdown
+        fitness = strat_sortino_ratio * max_drawdown
 
-def num_trades_fitness(series:pd.DataFrame, genome:Genome):
-    """
-    Some text
+    return fitness
+
+def sortino_fitness(series:pd.DataFrame, genome:Genome, tensors:IndicatorTensorStore = None) -> float:
     """
-    # get the fuzzified technical indicators of a stock and its corresponding inference value z_sum
-    stock = get_fuzzy_stock_df(series = series, genome = genome)
-    # # stock.df['z_sum_ewm'] = stock.df['z_sum'].ewm(span=7).mean()
-    # # print(stock.df[['z_sum', 'z_sum_rolling', 'z_sum_ewm']].tail(20))
+    This is a fitness function that evaluates a genome's fitness based on the
+    sortino ratio; a higher value means a higher fitness
 
-    # initialize the following variables
-    stock.df['trailingstop'] = 0.
-    stock.df['returns'] = 1.0
-    stock.df['change'] = stock.df['Close'].pct_change()+1
-    stock.df['regime'] = 0
-    has_long_position = False
-    num_trades = 0
-    buy_locator = list()
-    sell_locator = list()
-    trailingstop = 1
-    
-    for i in range(0, len(stock.df)-1):
-        # check condition for entry
-        condition1 = stock.df['z_sum_rolling'].iat[i] >= genome.genome_dict["entry_condition"].value[1]
-        condition2 = has_long_position is False
-        condition3 = stock.df['regime'].iat[i] != -1
-        if condition1 and condition2 and condition3:
-            # buy stock in the next day
-            stock.df['regime'].iat[i+1] = 1
-            has_long_position = True
-            num_trades += 1
-            buy_locator.append(stock.df.iloc[i])
-            trailingstop = 1
-            continue
-            
-        # establish trailing stop
-        if has_long_position is True:
-            trailingstop *= stock.df['change'].iat[i]
-                
-        # check conditions for exit
-        condition1 = stock.df['z_sum_rolling'].iat[i] < genome.genome_dict["entry_condition"].value[0]
-        condition2 = trailingstop < genome.genome_dict["stop_loss"].value
-        condition3 = has_long_position is True
-        if( (condition1) or (condition2) ) and condition3:
-            stock.df['regime'].iat[i+1] = -1
-            has_long_position = False
-            sell_locator.append(stock.df.iloc[i])
-            trailingstop = 1
+    Arguments:
+        series:pd.DataFrame
+            the time series data where the genome will be evaluated
 
-    # put 1 between 1 and -1 
-    for i in range(1, len(stock.df)):
-        if stock.df['regime'].iat[i-1] == 1 and stock.df['regime'].iat[i] == 0:
-            stock.df['regime'].iat[i] = 1
+        genome:Genome
+            the genome to be asssessed
 
-    # compute returns
-    for i in range(0, len(stock.df)):
-        if stock.df['regime'].iat[i] != 0:
-            stock.df['returns'].iat[i] = stock.df['change'].iat[i]
-    
-    return (1/(1+num_trades))
-    # return (stock, num_trades, bnh_returns, strat_returns, strat_sharpe_ratio, strat_sortino_ratio, max_drawdown)
+        tensors:IndicatorTensorStore
+            the precomputed all-window indicator tensors of the stock, if any
+
+    Returns:
+        fitness:float
+            the sortino ratio based on the strategy produced by the genome
+    """
+    return _genome_fitness(series, genome, tensors, sortino_score)
 
-def max_drawdown_fitness(series:pd.DataFrame, genome:Genome):
+def sharpe_fitness(series:pd.DataFrame, genome:Genome, tensors:IndicatorTensorStore = None):
     """
     Some text
     """
-    # get the fuzzified technical indicators of a stock and its corresponding inference value z_sum
-    stock = get_fuzzy_stock_df(series = series, genome = genome)
-    # # stock.df['z_sum_ewm'] = stock.df['z_sum'].ewm(span=7).mean()
-    # # print(stock.df[['z_sum', 'z_sum_rolling', 'z_sum_ewm']].tail(20))
-
-    # initialize the following variables
-    stock.df['trailingstop'] = 0.
-    stock.df['returns'] = 1.0
-    stock.df['change'] = stock.df['Close'].pct_change()+1
-    stock.df['regime'] = 0
-    has_long_position = False
-    num_trades = 0
-    buy_locator = list()
-    sell_locator = list()
-    trailingstop = 1
-    
-    for i in range(0, len(stock.df)-1):
-        # check condition for entry
-        condition1 = stock.df['z_sum_rolling'].iat[i] >= genome.genome_dict["entry_condition"].value[1]
-        condition2 = has_long_position is False
-        condition3 = stock.df['regime'].iat[i] != -1
-        if condition1 and condition2 and condition3:
-            # buy stock in the next day
-            stock.df['regime'].iat[i+1] = 1
-            has_long_position = True
-            num_trades += 1
-            buy_locator.append(stock.df.iloc[i])
-            trailingstop = 1
-            continue
-            
-        # establish trailing stop
-        if has_long_position is True:
-            trailingstop *= stock.df['change'].iat[i]
-                
-        # check conditions for exit
-        condition1 = stock.df['z_sum_rolling'].iat[i] < genome.genome_dict["entry_condition"].value[0]
-        condition2 = trailingstop < genome.genome_dict["stop_loss"].value
-        condition3 = has_long_position is True
-        if( (condition1) or (condition2) ) and condition3:
-            stock.df['regime'].iat[i+1] = -1
-            has_long_position = False
-            sell_locator.append(stock.df.iloc[i])
-            trailingstop = 1
+    return _genome_fitness(series, genome, tensors, sharpe_score)
 
-    # put 1 between 1 and -1 
-    for i in range(1, len(stock.df)):
-        if stock.df['regime'].iat[i-1] == 1 and stock.df['regime'].iat[i] == 0:
-            stock.df['regime'].iat[i] = 1
+def num_trades_fitness(series:pd.DataFrame, genome:Genome, tensors:IndicatorTensorStore = None):
+    """
+    Some text
+    """
+    return _genome_fitness(series, genome, tensors, num_trades_score)
 
-    # compute returns
-    for i in range(0, len(stock.df)):
-        if stock.df['regime'].iat[i] != 0:
-            stock.df['returns'].iat[i] = stock.df['change'].iat[i]
-        
-    # compute for max drawdown
-    max_drawdown = np.ptp(stock.df["returns"])/stock.df["returns"].max()
-    
-    return 1-max_drawdown
-    # return (stock, num_trades, bnh_returns, strat_returns, strat_sharpe_ratio, strat_sortino_ratio, max_drawdown)
+def max_drawdown_fitness(series:pd.DataFrame, genome:Genome, tensors:IndicatorTensorStore = None):
+    """
+    Some text
+    """
+    return _genome_fitness(series, genome, tensors, max_drawdown_score)
 
-def evaluate_fitness(series:pd.DataFrame, genome:Genome) -> float:
+def evaluate_fitness(series:pd.DataFrame, genome:Genome, tensors:IndicatorTensorStore = None) -> float:
     """
     This function evaluates the fitness of the genome
     
@@ -307,126 +220,129 @@ def evaluate_fitness(series:pd.DataFrame, genome:Genome) -> float:
     Returns:
         None:        
     """     
-    # get the fuzzified technical indicators of a stock and its corresponding inference value z_sum
-    stock = get_fuzzy_stock_df(series = series, genome = genome)
-    # # stock.df['z_sum_ewm'] = stock.df['z_sum'].ewm(span=7).mean()
-    # # print(stock.df[['z_sum', 'z_sum_rolling', 'z_sum_ewm']].tail(20))
+    # evaluate_score rejects more than 20 trades, so the backtest stops at the 21st
+    return _genome_fitness(series, genome, tensors, evaluate_score, max_trades = 20)
 
-    # plot the z values
-    # fig, axs = plt.subplots(4, 1, layout='constrained')
-    # axs[0].plot(stock.df['Close'].tail(450))
-    # axs[1].plot(stock.df['z_sum'].tail(450))
-    # axs[2].plot(stock.df['z_sum_rolling'].tail(450))
-    # axs[3].plot(stock.df['z_sum_ewm'].tail(200))
-    # plt.show()
+def multi_window_fitness(series:pd.DataFrame, genome:Genome, windows:list[tuple[int, int]], tensors:IndicatorTensorStore = None, score:callable = evaluate_score, quantile:float = None, max_trades:int = 20) -> float:
+    """
+    This function evaluates the fitness of the genome on several training windows at once;
+    the genome fuzzifies the span of the windows once, and its strategy is backtested on
+    each window. The indicators of a window are warmed up by the bars of the span before
+    it, so the fitness of a window that does not start the span can differ from
+    evaluate_fitness on the window alone
     
-    if stock is None:
-        fitness = float("-inf")
-        return fitness
+    Arguments:
+        series:pd.DataFrame
+            the time series data spanning the windows
 
-    # initialize the following variables
-    stock.df['trailingstop'] = 0.
-    stock.df['returns'] = 1.0
-    stock.df['change'] = stock.df['Close'].pct_change()+1
-    stock.df['regime'] = 0
-    has_long_position = False
-    num_trades = 0
-    buy_locator = list()
-    sell_locator = list()
-    trailingstop = 1
-    
-    for i in range(0, len(stock.df)-1):
-        # check condition for entry
-        condition1 = stock.df['z_sum_rolling'].iat[i] >= genome.genome_dict["entry_condition"].value[1]
-        condition2 = has_long_position is False
-        condition3 = stock.df['regime'].iat[i] != -1
-        if condition1 and condition2 and condition3:
-            # buy stock in the next day
-            stock.df['regime'].iat[i+1] = 1
-            has_long_position = True
-            num_trades += 1
-            buy_locator.append(stock.df.iloc[i])
-            trailingstop = 1
+        genome:Genome
+            the genome to be asssessed
+
+        windows:list[tuple[int, int]]
+            the start and stop rows of each window in series
+
+        tensors:IndicatorTensorStore
+            the precomputed all-window indicator tensors of the stock, if any
+
+        score:callable
+            a function of the BacktestResult of a window that returns its fitness;
+            evaluate_score by default
+
+        quantile:float
+            if given, the fitness is this quantile of the fitness of the windows, e.g. 0.25;
+            otherwise, it is their mean
+
+        max_trades:int
+            if given, the backtest of a window stops, and the window is given a fitness
+            of -inf, when more positions than this are bought; evaluate_score rejects more
+            than 20 trades
+
+    Returns:
+        fitness:float
+            the mean, or the quantile, of the fitness of the genome on the windows
+    """
+    # get the fuzzified technical indicators of the span and its corresponding inference value z_sum
+    stock = get_fuzzy_stock_df(series = series, genome = genome, tensors = tensors)
+    if stock is None:
+        return float('-inf')
+
+    z_sum_rolling = stock.df['z_sum_rolling'].to_numpy()
+    change = (stock.df['Close'].pct_change()+1).to_numpy()
+
+    window_fitness = list()
+    for start, stop in windows:
+        # the change of the first bar of a window is unknown within the window, as in evaluate_fitness
+        window_change = change[start:stop].copy()
+        window_change[:1] = np.nan
+
+        regime, returns, num_trades = backtest(
+            z_sum_rolling = z_sum_rolling[start:stop],
+            change = window_change,
+            entry_condition = genome.genome_dict["entry_condition"].value,
+            stop_loss = genome.genome_dict["stop_loss"].value,
+            max_trades = max_trades
+        )
+        if len(returns) < len(window_change) or (max_trades is not None and num_trades > max_trades):
+            window_fitness.append(float('-inf'))
             continue
-            
-        # establish trailing stop
-        if has_long_position is True:
-            trailingstop *= stock.df['change'].iat[i]
-                
-        # check conditions for exit
-        condition1 = stock.df['z_sum_rolling'].iat[i] < genome.genome_dict["entry_condition"].value[0]
-        condition2 = trailingstop < genome.genome_dict["stop_loss"].value
-        condition3 = has_long_position is True
-        if (condition1 or condition2) and condition3:
-            stock.df['regime'].iat[i+1] = -1
-            has_long_position = False
-            sell_locator.append(stock.df.iloc[i])
-            trailingstop = 1
+        result = BacktestResult(regime = regime, returns = returns, change = window_change, num_trades = num_trades)
+        window_fitness.append(score(result))
 
-    # put 1 between 1 and -1 
-    for i in range(1, len(stock.df)):
-        if stock.df['regime'].iat[i-1] == 1 and stock.df['regime'].iat[i] == 0:
-            stock.df['regime'].iat[i] = 1
+    return aggregate_fitness(window_fitness, quantile = quantile)
 
-    # compute returns
-    for i in range(0, len(stock.df)):
-        if stock.df['regime'].iat[i] != 0:
-            stock.df['returns'].iat[i] = stock.df['change'].iat[i]
-    
-    # get returns for buy and hold strategy
-    bnh_returns = stock.df['change'].cumprod().iat[-1]
-    
-    # get the returns of the strategy
-    strat_returns = stock.df['returns'].cumprod().iat[-1]
-    
-    # get the downside returns
-    downside_returns_df = None
-    downside_returns_df = stock.df.loc[stock.df['returns'] < 1]
+def aggregate_fitness(window_fitness:list[float], quantile:float = None) -> float:
+    """
+    This function aggregates the fitness of a genome on several windows
     
-    # compute for the downside returns standard deviation
-    downside_returns_std = downside_returns_df['returns'].std()
+    Arguments:
+        window_fitness:list[float]
+            the fitness of the genome on each window; -inf for a rejected window
+
+        quantile:float
+            if given, the fitness is this quantile of the fitness of the windows, the
+            nearest lower one, so a rejected window does not make the quantile NaN;
+            otherwise, it is their mean, which is -inf if any window is rejected
 
-    # compute for the sortino ration of the strategy
-    strat_sortino_ratio = sortino_ratio(portfolio_returns = strat_returns, std_downside_portfolio_returns = downside_returns_std)
+    Returns:
+        fitness:float
+            the aggregated fitness; -inf if any fitness is NaN
+    """
+    window_fitness = np.asarray(window_fitness, dtype = np.float64)
+    if len(window_fitness) == 0 or np.isnan(window_fitness).any():
+        return float('-inf')
+    if quantile is None:
+        return float(window_fitness.mean())
+    return float(np.quantile(window_fitness, quantile, method = "lower"))
+
+def screen_fitness(series:pd.DataFrame, genome:Genome, tensors:IndicatorTensorStore = None) -> float:
+    """
+    This function scores a genome on a prefix of a training window, for the screening
+    rounds of successive_halving with evaluate_fitness
     
-    # compute for max drawdown
-    max_drawdown = np.ptp(stock.df["returns"])/stock.df["returns"].max()
+    Arguments:
+        series:pd.DataFrame
+            the prefix of the time series data where the genome will be evaluated
 
-    # check if sortino ratio is negative or NaN;
-    # if it is negative or NaN, degenerate it into 0
-    if np.isnan(strat_sortino_ratio) or num_trades > 20:
-        strat_sortino_ratio = float('-inf')
+        genome:Genome
+            the genome to be asssessed
 
-    if (strat_sortino_ratio == float('-inf')) and (max_drawdown == 0.):
-        fitness = float("-inf")
+        tensors:IndicatorTensorStore
+            the precomputed all-window indicator tensors of the stock, if any
 
-    elif strat_sortino_ratio > 0:
-        # fitness = strat_sortino_ratio * (1/(1+num_trades)) * max_drawdown
-        fitness = strat_sortino_ratio * (1-max_drawdown)
-    
-    elif strat_sortino_ratio < 0:
-        # fitness = strat_sortino_ratio * (num_trades) * max_drawdown
-        fitness = strat_sortino_ratio * max_drawdown
-    # print(strat_sortino_ratio)
-    # print(num_trades)
-    # print(max_drawdown)
-    
-    # compute for the standard deviation of the strategy
-    # return_std = stock.df['returns'].std()
-    
-    # compute for the sharpe ration of the strategy
-    # strat_sharpe_ratio = sharpe_ratio(portfolio_returns = stock.df['returns'].cumprod()[-1], std_portfolio_returns = return_std)
-    
-    # compute for the total returns and plot these
-    # stock.df['change'].cumprod().plot(label = 'Buy and hold')
-    # stock.df['returns'].cumprod().plot(label = 'Fuzzy Logic').legend()
-    # stock.df['returns'].cumprod().tail(450).plot(label = 'Fuzzy Logic')
-    
-    # show the percent change of the returns for buy and hold vs fuzzy logic
-    # print(stock.df['change'].cumprod()[-1], stock.df['returns'].cumprod()[-1])
-    
-    return fitness
-    # return (stock, num_trades, bnh_returns, strat_returns, strat_sharpe_ratio, strat_sortino_ratio, max_drawdown)
+    Returns:
+        fitness:float
+            -inf if the genome buys more than 20 positions in the prefix, which it would
+            also do in the whole window; NaN if the prefix is too short to score it,
+            e.g. if it has not traded yet; otherwise the fitness of evaluate_fitness
+    """
+    result = backtest_genome(series = series, genome = genome, tensors = tensors, max_trades = 20)
+    if result is None:
+        return float('nan')
+    if result.stopped:
+        return float('-inf')
+
+    fitness = evaluate_score(result)
+    return fitness if np.isfinite(fitness) else float('nan')
 
 def sortino_ratio(portfolio_returns:float ,std_downside_portfolio_returns:float, risk_free_rate_returns:float = 2.5) -> float:
     """
@@ -480,7 +396,185 @@ def sharpe_ratio(portfolio_returns:float ,std_portfolio_returns :float, risk_fre
         sharpe_ratio = (portfolio_returns-risk_free_rate_returns)/std_portfolio_returns
         return sharpe_ratio
 
-def test_fitness(series:pd.DataFrame, genome:Genome) -> list[Union[int, float]]:
+def backtest(z_sum_rolling:np.ndarray, change:np.ndarray, entry_condition:list[float], stop_loss:float, max_trades:int = None, max_drawdown:float = None) -> (np.ndarray, np.ndarray, int):
+    """
+    This function simulates the long-only strategy of the fuzzy GA on plain arrays; a
+    position is bought on the bar after z_sum_rolling reaches the entry level, and is
+    sold on the bar after z_sum_rolling falls below the exit level or the trailing stop
+    is hit. A position is not bought on the bar right after it is sold.
+
+    Arguments:
+        z_sum_rolling:np.ndarray
+            the (T,) rolling inference values of the genome
+
+        change:np.ndarray
+            the (T,) ratio of each closing price to the one before, i.e. pct_change() + 1
+
+        entry_condition:list[float]
+            the exit and the entry levels of z_sum_rolling, in this order
+
+        stop_loss:float
+            the position is sold when the product of its changes since it was bought
+            falls below this value
+
+        max_trades:int
+            if given, the simulation stops when more positions than this are bought
+
+        max_drawdown:float
+            if given, the simulation stops when the growth of the strategy falls by more
+            than this fraction from its running peak
+
+    Returns:
+        regime, returns, num_trades: np.ndarray, np.ndarray, int
+            the (T,) regime, 1 while the position is held, -1 on the bar it is sold and
+            0 otherwise; the (T,) returns of the strategy, the change wherever the regime
+            is not 0 and 1 elsewhere; and the number of positions bought. if the
+            simulation stops at a limit, the arrays end at the bar the limit is hit
+    """
+    exit_level, entry_level = entry_condition[0], entry_condition[1]
+    z = np.asarray(z_sum_rolling, dtype = np.float64).tolist()
+    growth = np.asarray(change, dtype = np.float64).tolist()
+
+    has_long_position = False
+    sold = False
+    trailingstop = 1
+    entries = list()
+    exits = list()
+
+    # the growth of the strategy and its running peak, for the drawdown limit
+    equity = 1.
+    peak = 1.
+    last = len(z)-1
+
+    # the decisions depend on the position, so the bars are visited in order
+    for i in range(0, len(z)-1):
+        # check condition for entry
+        if z[i] >= entry_level and not has_long_position and not sold:
+            # buy stock in the next day
+            entries.append(i+1)
+            has_long_position = True
+            trailingstop = 1
+
+            # stop at the trade that breaks the limit
+            if max_trades is not None and len(entries) > max_trades:
+                last = i+1
+                break
+            continue
+        sold = False
+
+        # establish trailing stop
+        if has_long_position:
+            trailingstop *= growth[i]
+
+            # stop at the bar where the drawdown breaks the limit
+            equity *= growth[i]
+            peak = max(peak, equity)
+            if max_drawdown is not None and 1 - equity / peak > max_drawdown:
+                last = i
+                break
+
+        # check conditions for exit
+        if (z[i] < exit_level or trailingstop < stop_loss) and has_long_position:
+            exits.append(i+1)
+            has_long_position = False
+            sold = True
+            trailingstop = 1
+
+            # the position also earns the change of the bar it is sold
+            equity *= growth[i+1]
+            peak = max(peak, equity)
+            if max_drawdown is not None and 1 - equity / peak > max_drawdown:
+                last = i+1
+                break
+
+    # hold the position from the bar it is bought until the bar it is sold
+    held = np.zeros(last+2, dtype = np.int64)
+    held[entries] += 1
+    held[exits] -= 1
+    regime = np.cumsum(held[:-1])
+    regime[exits] = -1
+
+    # compute returns
+    returns = np.where(regime != 0, np.asarray(change, dtype = np.float64)[:last+1], 1.0)
+    return regime, returns, len(entries)
+
+def backtest_stock(stock:fuzzy_TA, genome:Genome) -> int:
+    """
+    This function runs the backtest of a genome on its fuzzified stock and writes the
+    change, regime, and returns columns of stock.df
+
+    Arguments:
+        stock:fuzzy_TA
+            the fuzzified stock with z_sum_rolling, from get_fuzzy_stock_df
+
+        genome:Genome
+            the genome whose entry condition and stop loss are used
+
+    Returns:
+        num_trades:int
+            the number of positions bought
+    """
+    change = stock.df['Close'].pct_change()+1
+    regime, returns, num_trades = backtest(
+        z_sum_rolling = stock.df['z_sum_rolling'].to_numpy(),
+        change = change.to_numpy(),
+        entry_condition = genome.genome_dict["entry_condition"].value,
+        stop_loss = genome.genome_dict["stop_loss"].value
+    )
+    stock.df['change'] = change
+    stock.df['regime'] = regime
+    stock.df['returns'] = returns
+    return num_trades
+
+def backtest_genome(series:pd.DataFrame, genome:Genome, tensors:IndicatorTensorStore = None, max_trades:int = None, max_drawdown:float = None) -> Union[BacktestResult, None]:
+    """
+    This function fuzzifies the stock with the rule base of a genome and backtests the
+    strategy of the genome once
+
+    Arguments:
+        series:pd.DataFrame
+            the time series data where the genome will be evaluated
+
+        genome:Genome
+            the genome to be asssessed
+
+        tensors:IndicatorTensorStore
+            the precomputed all-window indicator tensors of the stock, if any
+
+        max_trades:int
+            if given, the backtest stops when more positions than this are bought
+
+        max_drawdown:float
+            if given, the backtest stops when the strategy falls by more than this
+            fraction from its running peak
+
+    Returns:
+        result:Union[BacktestResult, None]
+            the metrics of the backtest; None if the stock could not be fuzzified
+    """
+    # get the fuzzified technical indicators of a stock and its corresponding inference value z_sum
+    stock = get_fuzzy_stock_df(series = series, genome = genome, tensors = tensors)
+    if stock is None:
+        return None
+
+    # simulate the strategy of the genome on the stock
+    change = (stock.df['Close'].pct_change()+1).to_numpy()
+    regime, returns, num_trades = backtest(
+        z_sum_rolling = stock.df['z_sum_rolling'].to_numpy(),
+        change = change,
+        entry_condition = genome.genome_dict["entry_condition"].value,
+        stop_loss = genome.genome_dict["stop_loss"].value,
+        max_trades = max_trades,
+        max_drawdown = max_drawdown
+    )
+    result = BacktestResult(regime = regime, returns = returns, change = change[:len(returns)], num_trades = num_trades, stopped = len(returns) < len(change))
+
+    # a limit broken on the last bar does not shorten the backtest
+    if (max_trades is not None and num_trades > max_trades) or (max_drawdown is not None and result.max_drawdown > max_drawdown):
+        result.stopped = True
+    return result
+
+def test_fitness(series:pd.DataFrame, genome:Genome, tensors:IndicatorTensorStore = None) -> list[Union[int, float]]:
     """
     This function evaluates the fitness of the genome
     
@@ -491,7 +585,7 @@ def test_fitness(series:pd.DataFrame, genome:Genome) -> list[Union[int, float]]:
     Returns:
         None:        
     """     
-    stock = get_fuzzy_stock_df(series = series, genome = genome)
+    stock = get_fuzzy_stock_df(series = series, genome = genome, tensors = tensors)
     # # initialize the fuzzy_TA instance
     # stock = fuzzy_TA(series)
 
@@ -525,73 +619,11 @@ def test_fitness(series:pd.DataFrame, genome:Genome) -> list[Union[int, float]]:
     # axs[3].plot(stock.df['z_sum_ewm'].tail(200))
     plt.show()
 
-    # initialize the following variables
-    stock.df['trailingstop'] = 0.
-    stock.df['returns'] = 1.0
-    stock.df['change'] = stock.df['Close'].pct_change()+1
-    stock.df['regime'] = 0
-    has_long_position = False
-    num_trades = 0
-    buy_locator = list()
-    sell_locator = list()
-    trailingstop = 1
-    
-    for i in range(0, len(stock.df)-1):
-        # check condition for entry
-        condition1 = stock.df['z_sum_rolling'].iat[i] >= genome.genome_dict["entry_condition"].value[1]
-        condition2 = has_long_position is False
-        condition3 = stock.df['regime'].iat[i] != -1
-        if condition1 and condition2 and condition3:
-            # buy stock in the next day
-            stock.df['regime'].iat[i+1] = 1
-            has_long_position = True
-            num_trades += 1
-            buy_locator.append(stock.df.iloc[i])
-            trailingstop = 1
-            continue
-            
-        # establish trailing stop
-        if has_long_position is True:
-            trailingstop *= stock.df['change'].iat[i]
-                
-        # check conditions for exit
-        condition1 = stock.df['z_sum_rolling'].iat[i] < genome.genome_dict["entry_condition"].value[0]
-        condition2 = trailingstop < genome.genome_dict["stop_loss"].value
-        condition3 = has_long_position is True
-        if( (condition1) or (condition2) ) and condition3:
-            stock.df['regime'].iat[i+1] = -1
-            has_long_position = False
-            sell_locator.append(stock.df.iloc[i])
-            trailingstop = 1
-
-    # put 1 between 1 and -1 
-    for i in range(1, len(stock.df)):
-        if stock.df['regime'].iat[i-1] == 1 and stock.df['regime'].iat[i] == 0:
-            stock.df['regime'].iat[i] = 1
-
-    # compute returns
-    for i in range(0, len(stock.df)):
-        if stock.df['regime'].iat[i] != 0:
-            stock.df['returns'].iat[i] = stock.df['change'].iat[i]
-    
-    # get returns for buy and hold strategy
-    bnh_returns = stock.df['change'].cumprod().iat[-1]
-    
-    # get the returns of the strategy
-    strat_returns = stock.df['returns'].cumprod().iat[-1]
-    
-    # get the downside returns
-    downside_returns_df = None
-    downside_returns_df = stock.df.loc[stock.df['returns'] < 1]
-    
-    # compute for the downside returns standard deviation
-    downside_returns_std = downside_returns_df['returns'].std()
-
-    # compute for the sortino ration of the strategy
-    strat_sortino_ratio = sortino_ratio(portfolio_returns = stock.df['returns'].cumprod().iat[-1], std_downside_portfolio_returns = downside_returns_std)
-    
-    # compute for max drawdown
-    max_drawdown = np.ptp(stock.df["returns"])/stock.df["returns"].max()
+    # simulate the strategy of the genome on the stock
+    num_trades = backtest_stock(stock = stock, genome = genome)
+    result = BacktestResult(regime = stock.df['regime'], returns = stock.df['returns'], change = stock.df['change'], num_trades = num_trades)
+    strat_sortino_ratio = result.sortino
+    max_drawdown = result.returns_range
 
     # check if sortino ratio is negative or NaN;
     # if it is negative or NaN, degenerate it into 0
@@ -624,23 +656,35 @@ def test_fitness(series:pd.DataFrame, genome:Genome) -> list[Union[int, float]]:
     return fitness, num_trades
     # return (stock, num_trades, bnh_returns, strat_returns, strat_sharpe_ratio, strat_sortino_ratio, max_drawdown)
 
-def get_fuzzy_stock_df(series:pd.DataFrame, genome:Genome) -> pd.DataFrame:
+def get_fuzzy_stock_df(series:pd.DataFrame, genome:Genome, cache:Union[IndicatorCache, None] = indicator_cache, tensors:IndicatorTensorStore = None, tail:int = None) -> pd.DataFrame:
     """
     This function evaluates the fitness of the genome
     
     Arguments:
-        self:
-            some text
+        series:pd.DataFrame
+            the time series data where the genome will be evaluated
+
+        genome:Genome
+            the genome to be asssessed
+
+        cache:Union[IndicatorCache, None]
+            the store where the raw indicator series are looked up first; genomes
+            that share indicator parameters on the same series reuse the same series.
+            by default this is the cache shared by the process; if None, nothing is cached
+
+        tensors:IndicatorTensorStore
+            the precomputed all-window indicator tensors of the stock; the RSI is sliced
+            from here when the series is a section of the precomputed history
+
+        tail:int
+            if given, only z_sum and z_sum_rolling of the last tail bars are computed, from
+            these bars and the warm-up their indicators need; see fuzzy_tail
             
     Returns:
-        None:        
+        stock:fuzzy_TA
+            the fuzzified stock with its inference value z_sum and z_sum_rolling
     """     
-
-    # initialize the fuzzy_TA instance
-    stock = fuzzy_TA(series)
-
-    # momentum indicators
-    stock.RSI(
+    RSI_params = dict(
         window = genome.genome_dict["RSI_window"].value,
         p1 = genome.genome_dict["RSI_p1"].value,
         p2 = genome.genome_dict["RSI_p2"].value,
@@ -654,33 +698,41 @@ def get_fuzzy_stock_df(series:pd.DataFrame, genome:Genome) -> pd.DataFrame:
         hi_left_node = genome.genome_dict["RSI_high_membership"].value[0],
         hi_right_node = genome.genome_dict["RSI_high_membership"].value[1]
     )
+    z_rolling_window = genome.genome_dict["z_rolling_window"].value
+
+    # keep only the tail and its warm-up
+    if tail is not None:
+        start = max(len(series) - tail - warm_up([("RSI", RSI_params)], z_rolling_window), 0)
+        series = series.iloc[start:]
+
+    # initialize the fuzzy_TA instance on a copy, so the columns added by the
+    # indicators do not end up in the caller's series
+    stock = fuzzy_TA(series.copy(), cache = cache, tensors = tensors)
+
+    # momentum indicators
+    stock.RSI(**RSI_params)
     
     # compute for the total value of z
     try:
-        stock.z_total()
+        stock.z_total(tail = None if tail is None else tail + z_rolling_window - 1)
     except:
         return None    
-    stock.df['z_sum_rolling']=stock.df['z_sum'].rolling(genome.genome_dict["z_rolling_window"].value).mean()
+    stock.df['z_sum_rolling']=stock.df['z_sum'].rolling(z_rolling_window).mean()
     
     return stock
 
-def multi_obj_fitnes(series:pd.DataFrame, genome:Genome):
+def multi_obj_fitnes(series:pd.DataFrame, genome:Genome, tensors:IndicatorTensorStore = None):
     """
     Some text
     """
     fitness_functions = ["sortino_fitness", "sharpe_fitness", "num_trades_fitness", "max_drawdown_fitness"]
     fitness_func_operator = random.choice(fitness_functions)
 
-    if fitness_func_operator == "sortino_fitness":
-        fitness = sortino_fitness(series=series, genome= genome)
-
-    elif fitness_func_operator == "sharpe_fitness":
-        fitness = sharpe_fitness(series=series, genome= genome)
-    
-    elif fitness_func_operator == "num_trades_fitness":
-        fitness = num_trades_fitness(series=series, genome= genome)
-
-    elif fitness_func_operator == "max_drawdown_fitness":
-        fitness = max_drawdown_fitness(series=series, genome= genome)
-
-    return fitness
\ No newline at end of file
+    # the objectives are formulas of the same backtest
+    scores = {
+        "sortino_fitness": sortino_score,
+        "sharpe_fitness": sharpe_score,
+        "num_trades_fitness": num_trades_score,
+        "max_drawdown_fitness": max_drawdown_score
+    }
+    return _genome_fitness(series, genome, tensors, scores[fitness_func_operator])
\ No newline at end of file
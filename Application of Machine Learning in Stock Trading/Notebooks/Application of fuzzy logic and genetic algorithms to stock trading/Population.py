@@ -1,5 +1,7 @@
 import copy
+import hashlib
 import itertools
+import numpy as np
 from Genome import Genome
 from typing import Union
 
@@ -71,7 +73,77 @@ class Population():
             seed_genome_copy = Genome(seed_genome.genome)
             self.population.append(copy.deepcopy(seed_genome_copy))
 
-        
+
+    @staticmethod
+    def genome_key(genome:Genome) -> str:
+        """
+        This function computes for the canonical hash of the gene values of a genome;
+        two genomes with the same genes and values have the same key, whatever their IDs
+
+        Arguments:
+            genome:Genome
+                the genome to be hashed
+
+        Returns:
+            key:str
+                a hex digest identifying the gene values of the genome
+        """
+        digest = hashlib.blake2b(digest_size = 16)
+        for gene in genome.genome:
+            # ints, floats, and numpy scalars of the same value hash the same
+            digest.update(gene.name.encode())
+            digest.update(np.asarray(gene.value, dtype = np.float64).tobytes())
+        return digest.hexdigest()
+
+    def unique(self) -> (list[Genome], np.ndarray):
+        """
+        This function finds the genomes of the population with the same gene values,
+        e.g. the copies of the seed genome, or a parent selected several times
+
+        Arguments:
+            self
+                the instance of the class
+
+        Returns:
+            unique_genomes, inverse:(list[Genome], np.ndarray)
+                the first genome of each set of genomes with the same gene values, in
+                the order of the population, and the position of the genome of each
+                genome of the population in unique_genomes; a fitness computed for
+                unique_genomes is scattered back to the population by indexing it with
+                inverse
+        """
+        positions = dict()
+        inverse = np.empty(len(self.population), dtype = np.int64)
+        for idx, genome in enumerate(self.population):
+            inverse[idx] = positions.setdefault(self.genome_key(genome), len(positions))
+        unique_genomes = [None] * len(positions)
+        for idx in range(len(self.population) - 1, -1, -1):
+            unique_genomes[inverse[idx]] = self.population[idx]
+        return unique_genomes, inverse
+
+    @staticmethod
+    def duplicate_stats(inverse:np.ndarray) -> dict:
+        """
+        This function computes for the number of duplicate genomes from the inverse index of unique
+
+        Arguments:
+            inverse:np.ndarray
+                the position of each genome in the unique genomes
+
+        Returns:
+            stats:dict
+                the number of genomes, unique genomes, and duplicates, and the fraction of
+                the genomes that are duplicates
+        """
+        num_genomes = len(inverse)
+        num_unique = int(inverse.max()) + 1 if num_genomes > 0 else 0
+        return {
+            "genomes": num_genomes,
+            "unique": num_unique,
+            "duplicates": num_genomes - num_unique,
+            "duplicate_ratio": (num_genomes - num_unique) / num_genomes if num_genomes > 0 else 0.0,
+        }
+
     def __len__(self) -> int:
         """
         This function returns the number of genomes in the population
@@ -1,269 +1,257 @@
-import copy
-from multiprocessing import Pool, cpu_count
+import math
+import numpy as np
 import pandas as pd
-from Population import Population
-import random
+from Genome import Genome
+from fitness_cache import FitnessCache
+from fitness_evaluator import FitnessEvaluator
+from typing import Union
 
-def RWS(population: Population, fitness_func: callable, series: pd.DataFrame, num_population:int = 100, num_new_population = 50) -> Population:
+def evaluate_population(genome_list:list[Genome], fitness_func:callable, series:Union[pd.DataFrame, list[pd.DataFrame]], cache:FitnessCache = None, evaluator:FitnessEvaluator = None, window:Union[int, list[int]] = None, bars:int = None) -> np.ndarray:
     """
-    This function selects the genomes in a population through the roullete
-    wheel method
+    This function evaluates the fitness of the genomes of a population on a training set
     
     Arguments:
-        population:Populatoion
+        genome_list:list[Genome]
+            the genomes to be assessed
+
+        fitness_func:callable
+            the fitness function
+
+        series:Union[pd.DataFrame, list[pd.DataFrame]]
+            the training set where the genomes will be evaluated; or several training
+            sets, for a fitness function that takes the rows of the windows in their
+            span, e.g. multi_window_fitness. without an evaluator, the training sets
+            should be slices of one time series, and the span only holds their rows
+
+        cache:FitnessCache
+            if given, the genomes whose fitness on the training set is cached, or that
+            are copies of another genome in the list, are not evaluated again
+
+        evaluator:FitnessEvaluator
+            if given, the genomes are evaluated by its workers on its training window
+            with the given id; otherwise by a temporary evaluator on series
+
+        window:Union[int, list[int]]
+            the id of the training window in the evaluator, or the ids of several;
+            series should be these windows
+
+        bars:int
+            if given, the genomes are evaluated on the first bars of the training set only
+
     Returns:
-        new_population:Population
+        fitness:np.ndarray
+            the fitness of each genome in genome_list
     """
-    fitness_list = list()
-    series_list = list()
-    func_args_list = list()
-    genome_list = population.population
-    valid_fitness_list = list()
-    valid_genome_list = list()
-    new_population_list = list()
-    
-    # create a list containing the training data set with the same length as the population list 
-    for _ in range(len(genome_list)):
-        series_list.append(copy.deepcopy(series))
-        
-    # join the series list and population list to produce one single iterable
-    # this will be used in the starmap function in the multiprocessing module
-    for i in range(len(genome_list)):
-        func_args_list.append((series_list[i], genome_list[i]))
+    if bars is not None:
+        assert not isinstance(series, list), "several training sets are evaluated on all of their bars"
+        series = series.iloc[:bars]
+
+    # the positions of the genomes whose evaluation did not complete in the last call, e.g. on a timeout
+    incomplete = list()
+
+    def evaluate(genomes:list[Genome]) -> list[float]:
+        if evaluator is not None:
+            fitness_list = evaluator.evaluate(genome_list = genomes, window = window, bars = bars, fitness_func = fitness_func)
+            incomplete[:] = evaluator.incomplete
+            return fitness_list
+        if len(genomes) == 0:
+            return list()
+
+        # without an evaluator, a temporary one publishes the training set to its workers
+        # once, instead of a copy of it per genome, and is closed at the end of the call
+        windows = series if isinstance(series, list) else [series]
+        with FitnessEvaluator(train_set = windows, fitness_func = fitness_func) as temporary:
+            fitness_list = temporary.evaluate(genome_list = genomes, window = list(range(len(windows))) if isinstance(series, list) else 0)
+            incomplete[:] = temporary.incomplete
+            return fitness_list
+
+    if cache is None:
+        return np.asarray(evaluate(genome_list), dtype = np.float64)
+    return np.asarray(cache.evaluate(genome_list = genome_list, fitness_func = fitness_func, series = series, evaluate = evaluate, incomplete = lambda: incomplete), dtype = np.float64)
+
+def successive_halving(genome_list:list[Genome], fitness_func:callable, series:pd.DataFrame, min_bars:int = 125, eta:int = 2, screen_func:callable = None, cache:FitnessCache = None, evaluator:FitnessEvaluator = None, window:int = None) -> np.ndarray:
+    """
+    This function evaluates the genomes of a population in rounds on longer and longer
+    prefixes of the training set; after each round, only the best 1/eta of the genomes
+    are evaluated on a prefix eta times longer, until the survivors are evaluated on the
+    whole training set with the fitness function. The indicators only look back, so a
+    prefix is the start of the backtest on the whole training set, and a genome rejected
+    on a prefix, e.g. for too many trades, would also be rejected on the whole of it.
+
+    The prefixes are scored by the screen function: -inf rejects a genome, and NaN marks
+    a genome that cannot be scored on the prefix yet, e.g. one still in the warm-up of
+    its indicators; these are promoted after the scored genomes if there is room
     
-    # evaluate the genomes in the population
-    with Pool(cpu_count()) as p:
-        fitness_list = p.starmap(fitness_func, func_args_list) 
-
-    # sequential processing
-    # for genome in genome_list:
-    #     fitness_list.append(fitness_func(series = series, genome = genome))
-
-    for idx, fitness in enumerate(fitness_list):
-        if fitness != float('-inf'):
-            valid_fitness_list.append(fitness)
-            valid_genome_list.append(genome_list[idx])
-
-    # get the lowest fitness value in the population
-    lowest_fitness = 0.
-    for fitness in valid_fitness_list:
-        if (fitness < lowest_fitness):
-            lowest_fitness = fitness
+    Arguments:
+        genome_list:list[Genome]
+            the genomes to be assessed
+
+        fitness_func:callable
+            the fitness function
+
+        series:pd.DataFrame
+            the training set where the genomes will be evaluated
+
+        min_bars:int
+            the number of bars of the first round
+
+        eta:int
+            the factor by which the prefix grows and the genomes are cut every round
+
+        screen_func:callable
+            the fitness function of the prefixes, e.g. screen_fitness; the fitness
+            function if not given
+
+        cache, evaluator, window
+            as in evaluate_population
+
+    Returns:
+        fitness:np.ndarray
+            the fitness of each genome on the whole training set; -inf for the genomes
+            that were not promoted to the last round
+    """
+    assert eta > 1, "eta should be greater than 1"
+    assert not isinstance(series, list), "successive halving screens a single training window"
+    screen_func = fitness_func if screen_func is None else screen_func
+    fitness = np.full(len(genome_list), float('-inf'))
+    alive = np.arange(len(genome_list))
+    bars = min_bars
+
+    # without an evaluator, one temporary evaluator serves every round
+    temporary = None
+    if evaluator is None and len(genome_list) > 0:
+        temporary = evaluator = FitnessEvaluator(train_set = [series], fitness_func = fitness_func, screen_func = None if screen_func is fitness_func else screen_func)
+        window = 0
+
+    try:
+        while len(alive) > 0:
+            # the last round is on the whole training set
+            last_round = bars >= len(series)
+            round_fitness = evaluate_population(
+                genome_list = [genome_list[idx] for idx in alive],
+                fitness_func = fitness_func if last_round else screen_func,
+                series = series,
+                cache = cache,
+                evaluator = evaluator,
+                window = window,
+                bars = None if last_round else bars
+            )
+            if last_round:
+                fitness[alive] = round_fitness
+                break
+
+            # promote the best of the genomes that are not rejected to the next round;
+            # the genomes that have no score yet sort after the rest
+            valid = np.flatnonzero(~(round_fitness == float('-inf')))
+            promoted = valid[np.argsort(-round_fitness[valid], kind = "stable")][:math.ceil(len(alive) / eta)]
+            alive = alive[np.sort(promoted)]
+            bars *= eta
+    finally:
+        if temporary is not None:
+            temporary.close()
+
+    return fitness
+
+def adjust_fitness(fitness:np.ndarray) -> tuple[np.ndarray, np.ndarray, float]:
+    """
+    This function removes the invalid genomes and shifts the fitness of the rest so the
+    lowest is at least 1, as the selection operators need positive fitness
     
-    # adjust the fitness of all individuals in the population
-    adjusted_fitness_list = list()
-    for idx, fitness in enumerate(valid_fitness_list):
-        adjusted_fitness_list.append(fitness - lowest_fitness + 1)
-
-    # compute for the total fitness of the population
-    total_fitness = 0
-    for adjusted_fitness in adjusted_fitness_list:
-        if adjusted_fitness != float('-inf'):
-            total_fitness +=  adjusted_fitness
+    Arguments:
+        fitness:np.ndarray
+            the fitness of each genome in the population; -inf or NaN for an invalid genome
+
+    Returns:
+        valid, adjusted_fitness, average_fitness:tuple[np.ndarray, np.ndarray, float]
+            the positions of the valid genomes in the population, their adjusted fitness,
+            and the average adjusted fitness
+    """
+    fitness = np.asarray(fitness, dtype = np.float64)
+    valid = np.flatnonzero(fitness > float('-inf'))
+    if len(valid) == 0:
+        return valid, np.zeros(0), float('nan')
+
+    # shift the fitness by the lowest fitness in the population, if it is negative
+    lowest_fitness = min(fitness[valid].min(), 0.)
+    adjusted_fitness = fitness[valid] - lowest_fitness + 1
+    return valid, adjusted_fitness, adjusted_fitness.mean()
+
+def _spin(cumulative:np.ndarray, pointers:np.ndarray) -> np.ndarray:
+    # the first position whose cumulative sum reaches each pointer; the last position
+    # catches pointers beyond the total through rounding
+    return np.minimum(np.searchsorted(cumulative, pointers, side = "left"), len(cumulative) - 1)
+
+def RWS(fitness:np.ndarray, num_new_population:int = 50) -> np.ndarray:
+    """
+    This function selects the genomes in a population through the roullete
+    wheel method
     
-    average_fitness = total_fitness/len(adjusted_fitness_list)
+    Arguments:
+        fitness:np.ndarray
+            the adjusted, positive fitness of the genomes
 
-    # compute for the selection probability of an individual 
+        num_new_population:int
+            the number of genomes to be selected
+
+    Returns:
+        selected:np.ndarray
+            the positions of the selected genomes
+    """
+    # compute for the cumulative selection probability of an individual 
     # based on the total fitness of the population
-    selection_probability_list = list()
-    for adjusted_fitness in adjusted_fitness_list:
-        selection_probability_list.append(adjusted_fitness/total_fitness)
-
-    for i in range(num_new_population):
-        if len(new_population_list) > 50:
-            break
-        else:
-            idx = 0
-            probability_sum = selection_probability_list[idx]
-            selection_probability = random.uniform(0,1)
-            while probability_sum < selection_probability:
-                idx += 1
-                probability_sum += selection_probability_list[idx]
-            new_population_list.append(valid_genome_list[idx])
-
-    new_population = Population(new_population_list)
-
-    return new_population, average_fitness
-
-def rank(population: Population, fitness_func: callable, series: pd.DataFrame, num_population:int = 100, num_new_population = 50) -> Population:
+    cumulative = np.cumsum(fitness / fitness.sum())
+    return _spin(cumulative, np.random.uniform(0, 1, num_new_population))
+
+def rank(fitness:np.ndarray, num_new_population:int = 50) -> np.ndarray:
     """
     This function selects the genomes in a population through
     rank selection
 
     Arguments:
-        population:Populatoion
+        fitness:np.ndarray
+            the adjusted, positive fitness of the genomes
+
+        num_new_population:int
+            the number of genomes to be selected
+
     Returns:
-        new_population:Population
+        selected:np.ndarray
+            the positions of the selected genomes
     """
-    fitness_list = list()
-    series_list = list()
-    func_args_list = list()
-    genome_list = population.population
-    valid_fitness_list = list()
-    valid_genome_list = list()
-    new_population_list = list()
-    genome_rank_list = list()
-
-    # create a list containing the training data set with the same length as the population list 
-    for _ in range(len(genome_list)):
-        series_list.append(copy.deepcopy(series))
-        
-    # join the series list and population list to produce one single iterable
-    # this will be used in the starmap function in the multiprocessing module
-    for i in range(len(genome_list)):
-        func_args_list.append((series_list[i], genome_list[i]))
-    
-    # evaluate the genomes in the population
-    with Pool(cpu_count()) as p:
-        fitness_list = p.starmap(fitness_func, func_args_list) 
-    
-    # sequential processing
-    # for genome in genome_list:
-    #     fitness_list.append(fitness_func(series = series, genome = genome))
-
-    for idx, fitness in enumerate(fitness_list):
-        if fitness != float('-inf'):
-            valid_fitness_list.append(fitness)
-            valid_genome_list.append(genome_list[idx])
-
-    # get the lowest fitness value in the population
-    lowest_fitness = 0.
-    for fitness in valid_fitness_list:
-        if (fitness < lowest_fitness):
-            lowest_fitness = fitness
-    
-    # adjust the fitness of all individuals in the population
-    adjusted_fitness_list = list()
-    for idx, fitness in enumerate(valid_fitness_list):
-        adjusted_fitness_list.append(fitness - lowest_fitness + 1)
-
-    # compute for the total fitness of the population
-    total_fitness = 0
-    for adjusted_fitness in adjusted_fitness_list:
-        if adjusted_fitness != float('-inf'):
-            total_fitness +=  adjusted_fitness
-    
-    average_fitness = total_fitness/len(adjusted_fitness_list)    
-
-    # sort the list of genomes
-    temp_fitness_value = 0
-    temp_genome = None
-    for i in range(len(adjusted_fitness_list)):
-        for j in range(len(adjusted_fitness_list)-i):
-            if adjusted_fitness_list[j+i] < adjusted_fitness_list[i]:
-                temp_fitness_value = adjusted_fitness_list[i]
-                adjusted_fitness_list[i] = adjusted_fitness_list[j+i]
-                adjusted_fitness_list[j+i] = temp_fitness_value
-
-                temp_genome = valid_genome_list[i]
-                valid_genome_list[i] = valid_genome_list[j+i]
-                valid_genome_list[j+i] = temp_genome
-
-    for i in range(len(adjusted_fitness_list)):
-        genome_rank_list.append(i+1)
-
-    # compute for the total fitness of the population
-    total_rank = 0
-    for rank in genome_rank_list:
-        total_rank +=  rank
-
-    # compute for the selection probability of an individual 
+    # sort the genomes from the least to the most fit; the least fit has rank 1
+    order = np.argsort(fitness, kind = "stable")
+    ranks = np.arange(1, len(fitness) + 1)
+
+    # compute for the cumulative selection probability of an individual 
     # based on the total rank of the population
-    selection_probability_list = list()
-    for rank in genome_rank_list:
-        selection_probability_list.append(rank/total_rank)
-
-    # select the new population based on ranking selection
-    for i in range(num_new_population):
-        if len(new_population_list) > 50:
-            break
-        else:
-            idx = 0
-            probability_sum = selection_probability_list[idx]
-            selection_probability = random.uniform(0,1)
-            while probability_sum < selection_probability:
-                idx += 1
-                probability_sum += selection_probability_list[idx]
-            new_population_list.append(valid_genome_list[idx])
-
-    new_population = Population(new_population_list)
-
-    return new_population, average_fitness
+    cumulative = np.cumsum(ranks / ranks.sum())
+    return order[_spin(cumulative, np.random.uniform(0, 1, num_new_population))]
     
-def tournament(population: Population, fitness_func: callable, series: pd.DataFrame, num_population:int = 100, num_new_population = 50) -> Population:
+def tournament(fitness:np.ndarray, num_new_population:int = 50, tournament_size:int = 2) -> np.ndarray:
     """
     This function selects the genomes in a population through
     tournament selection
 
     Arguments:
-        population:Populatoion
-    Returns:
-        new_population:Population
-    """
-    fitness_list = list()
-    series_list = list()
-    func_args_list = list()
-    genome_list = population.population
-    valid_fitness_list = list()
-    valid_genome_list = list()
-    new_population_list = list()
-    
-    # create a list containing the training data set with the same length as the population list 
-    for _ in range(len(genome_list)):
-        series_list.append(copy.deepcopy(series))
-        
-    # join the series list and population list to produce one single iterable
-    # this will be used in the starmap function in the multiprocessing module
-    for i in range(len(genome_list)):
-        func_args_list.append((series_list[i], genome_list[i]))
-    
-    # evaluate the genomes in the population
-    with Pool(cpu_count()) as p:
-        fitness_list = p.starmap(fitness_func, func_args_list) 
-
-    # sequential processing
-    # for genome in genome_list:
-    #     fitness_list.append(fitness_func(series = series, genome = genome))
-
-    for idx, fitness in enumerate(fitness_list):
-        if fitness != float('-inf'):
-            valid_fitness_list.append(fitness)
-            valid_genome_list.append(genome_list[idx])
-
-    # get the lowest fitness value in the population
-    lowest_fitness = 0.
-    for fitness in valid_fitness_list:
-        if (fitness < lowest_fitness):
-            lowest_fitness = fitness
-    
-    # adjust the fitness of all individuals in the population
-    adjusted_fitness_list = list()
-    for idx, fitness in enumerate(valid_fitness_list):
-        adjusted_fitness_list.append(fitness - lowest_fitness + 1)
-
-    # compute for the total fitness of the population
-    total_fitness = 0
-    for adjusted_fitness in adjusted_fitness_list:
-        if adjusted_fitness != float('-inf'):
-            total_fitness +=  adjusted_fitness
-
-    average_fitness = total_fitness/len(adjusted_fitness_list)    
-
-    # select the genomes for the new population
-    for i in range(num_new_population):
-        idx_a = random.randint(0, len(adjusted_fitness_list)-1)
-        idx_b = random.randint(0, len(adjusted_fitness_list)-1)
+        fitness:np.ndarray
+            the adjusted, positive fitness of the genomes
 
-        if adjusted_fitness_list[idx_a] > adjusted_fitness_list[idx_b]:
-            new_population_list.append(valid_genome_list[idx_a])
-        else:
-            new_population_list.append(valid_genome_list[idx_b])
+        num_new_population:int
+            the number of genomes to be selected
 
-    new_population = Population(new_population_list)
+        tournament_size:int
+            the number of genomes, drawn with replacement, in each tournament
 
-    return new_population, average_fitness
+    Returns:
+        selected:np.ndarray
+            the positions of the selected genomes
+    """
+    # the winner of each tournament is its fittest genome
+    contestants = np.random.randint(0, len(fitness), size = (num_new_population, tournament_size))
+    winners = np.argmax(fitness[contestants], axis = 1)
+    return contestants[np.arange(num_new_population), winners]
     
-def SUS(population: Population, fitness_func: callable, series: pd.DataFrame, num_population:int = 100, num_new_population = 50) -> Population:
+def SUS(fitness:np.ndarray, num_new_population:int = 50) -> np.ndarray:
     """
     This function selects the genomes in a population through
     Stochastic universal sampling
@@ -272,80 +260,27 @@ def SUS(population: Population, fitness_func: callable, series: pd.DataFrame, nu
     https://en.wikipedia.org/wiki/Stochastic_universal_sampling
 
     Arguments:
-        population:Populatoion
+        fitness:np.ndarray
+            the adjusted, positive fitness of the genomes
+
+        num_new_population:int
+            the number of genomes to be selected
+
     Returns:
-        new_population:Population
+        selected:np.ndarray
+            the positions of the selected genomes
     """
-    fitness_list = list()
-    series_list = list()
-    func_args_list = list()
-    genome_list = population.population
-    valid_fitness_list = list()
-    valid_genome_list = list()
-    new_population_list = list()
-    
-    # create a list containing the training data set with the same length as the population list 
-    for _ in range(len(genome_list)):
-        series_list.append(copy.deepcopy(series))
-        
-    # join the series list and population list to produce one single iterable
-    # this will be used in the starmap function in the multiprocessing module
-    for i in range(len(genome_list)):
-        func_args_list.append((series_list[i], genome_list[i]))
-    
-    # evaluate the genomes in the population
-    with Pool(cpu_count()) as p:
-        fitness_list = p.starmap(fitness_func, func_args_list) 
-    
-    # sequential processing
-    # for genome in genome_list:
-    #     fitness_list.append(fitness_func(series = series, genome = genome))
-
-    for idx, fitness in enumerate(fitness_list):
-        if fitness != float('-inf'):
-            valid_fitness_list.append(fitness)
-            valid_genome_list.append(genome_list[idx])
-
-    # get the lowest fitness value in the population
-    lowest_fitness = 0.
-    for fitness in valid_fitness_list:
-        if (fitness < lowest_fitness):
-            lowest_fitness = fitness
-    
-    # adjust the fitness of all individuals in the population
-    adjusted_fitness_list = list()
-    for idx, fitness in enumerate(valid_fitness_list):
-        adjusted_fitness_list.append(fitness - lowest_fitness + 1)
-
-    # compute for the total fitness of the population
-    total_fitness = 0
-    for adjusted_fitness in adjusted_fitness_list:
-        if adjusted_fitness != float('-inf'):
-            total_fitness +=  adjusted_fitness
-    
-    average_fitness = total_fitness/len(adjusted_fitness_list)    
-
-    # compute for the selection probability of an individual 
-    # based on the total fitness of the population
-    selection_probability_list = list()
-    for adjusted_fitness in adjusted_fitness_list:
-        selection_probability_list.append(adjusted_fitness/total_fitness)
-
-    # define the pointer distance and the list of pointers to be used
-    pointer_distance = total_fitness/num_new_population
-    start = random.uniform(0,1)
-    pointers = [start + i*pointer_distance for i in range(num_new_population)]
-
-    # select the genomes for the new population
-    new_population_list = list()
-    for point in pointers:
-        idx = 0
-        fitness_sum = adjusted_fitness_list[idx]
-        while fitness_sum < point:
-            idx += 1
-            fitness_sum += adjusted_fitness_list[idx]
-        new_population_list.append(copy.deepcopy(valid_genome_list[idx]))
-
-    new_population = Population(new_population_list)
-
-    return new_population, average_fitness
\ No newline at end of file
+    # define the pointer distance and the evenly spaced pointers from a random start
+    cumulative = np.cumsum(fitness)
+    pointer_distance = cumulative[-1] / num_new_population
+    start = np.random.uniform(0, pointer_distance)
+    pointers = start + np.arange(num_new_population) * pointer_distance
+    return _spin(cumulative, pointers)
+
+# the selection operators, by name
+SELECTION_OPERATORS = {
+    "RWS": RWS,
+    "SUS": SUS,
+    "tournament": tournament,
+    "rank": rank
+}
@@ -0,0 +1,154 @@
+import os
+import json
+import random
+import numpy as np
+from Gene import Gene
+from population_array import GenomeLayout, PopulationArray
+
+# the version of the layout of a checkpoint; a checkpoint of another version is not read
+CHECKPOINT_VERSION = 1
+
+def get_random_state(generator:np.random.Generator = None) -> (dict, dict):
+    """
+    This function takes the state of the random number generators of an evolution: the
+    random module, used to pick the operators and the windows, the numpy global
+    generator, used by the selection and the crossover, and the generator of the mutations
+
+    Arguments:
+        generator:np.random.Generator
+            the generator of the mutations, if any
+
+    Returns:
+        state, arrays:(dict, dict)
+            the scalars of the states, which can be written as json, and the key arrays
+            of the two Mersenne Twister generators
+    """
+    version, keys, gauss_next = random.getstate()
+    _, numpy_keys, position, has_gauss, cached_gaussian = np.random.get_state()
+    state = {
+        "random": {"version": version, "gauss_next": gauss_next},
+        "numpy": {"position": int(position), "has_gauss": int(has_gauss), "cached_gaussian": float(cached_gaussian)},
+        "generator": None if generator is None else generator.bit_generator.state,
+    }
+    arrays = {
+        "random_keys": np.asarray(keys, dtype = np.uint32),
+        "numpy_keys": np.asarray(numpy_keys, dtype = np.uint32),
+    }
+    return state, arrays
+
+def set_random_state(state:dict, arrays:dict, generator:np.random.Generator = None) -> None:
+    """
+    This function restores the state of the random number generators taken by get_random_state
+
+    Arguments:
+        state:dict
+            the scalars of the states
+
+        arrays:dict
+            the key arrays of the two Mersenne Twister generators
+
+        generator:np.random.Generator
+            the generator of the mutations; its state is restored if the checkpoint has one
+
+    Returns:
+        None
+    """
+    random.setstate((state["random"]["version"], tuple(int(key) for key in arrays["random_keys"]), state["random"]["gauss_next"]))
+    np.random.set_state(("MT19937", arrays["numpy_keys"], state["numpy"]["position"], state["numpy"]["has_gauss"], state["numpy"]["cached_gaussian"]))
+    if generator is not None and state["generator"] is not None:
+        assert generator.bit_generator.state["bit_generator"] == state["generator"]["bit_generator"], "the generator of the mutations is of another kind"
+        generator.bit_generator.state = state["generator"]
+
+def write_checkpoint(path:str, population:PopulationArray, fitness:np.ndarray = None, generation:int = 0, metadata:dict = None, arrays:dict = None, compress:bool = False) -> None:
+    """
+    This function writes a checkpoint of an evolution as a numpy .npz archive of plain
+    arrays: the gene values and ids of the genomes, their fitness, the names, types, and
+    bounds of the genes, and the metadata as a json string. The archive is written to a
+    temporary file first, so an interrupted write never leaves a partial checkpoint
+
+    Arguments:
+        path:str
+            the path of the checkpoint
+
+        population:PopulationArray
+            the population
+
+        fitness:np.ndarray
+            the fitness of each genome; NaN for the genomes not evaluated yet
+
+        generation:int
+            the number of generations run
+
+        metadata:dict
+            other scalars to be kept, which can be written as json, e.g. the state of the
+            random number generators
+
+        arrays:dict
+            other numeric arrays to be kept
+
+        compress:bool
+            if True, the arrays are compressed with zlib
+
+    Returns:
+        None
+    """
+    layout = population.layout
+    fitness = np.full(len(population), np.nan) if fitness is None else np.asarray(fitness, dtype = np.float64)
+    assert len(fitness) == len(population), "every genome needs a fitness"
+    header = {"version": CHECKPOINT_VERSION, "generation": int(generation), "metadata": dict() if metadata is None else metadata}
+
+    contents = {
+        "header": np.array(json.dumps(header)),
+        "values": population.values,
+        "genome_ids": population.genome_ids,
+        "fitness": fitness,
+        "gene_names": np.array(layout.names, dtype = str),
+        "gene_types": np.array(layout.types, dtype = str),
+        "lower_bounds": np.array(layout.lower_bounds, dtype = np.float64),
+        "upper_bounds": np.array(layout.upper_bounds, dtype = np.float64),
+    }
+    for name, array in ({} if arrays is None else arrays).items():
+        assert name not in contents, f"{name} is a part of every checkpoint"
+        contents[name] = np.asarray(array)
+
+    directory = os.path.dirname(path)
+    if directory != "" and not os.path.exists(directory):
+        os.makedirs(directory)
+    temp_path = path + ".tmp"
+    with open(temp_path, 'wb') as output:
+        (np.savez_compressed if compress else np.savez)(output, **contents)
+    os.replace(temp_path, path)
+
+def read_checkpoint(path:str) -> dict:
+    """
+    This function reads a checkpoint written by write_checkpoint; no object is unpickled
+
+    Arguments:
+        path:str
+            the path of the checkpoint
+
+    Returns:
+        checkpoint:dict
+            the population as a PopulationArray, its fitness, the generation, the metadata,
+            and the other arrays of the checkpoint
+    """
+    with np.load(path, allow_pickle = False) as archive:
+        contents = {name: archive[name] for name in archive.files}
+
+    header = json.loads(str(contents.pop("header")))
+    assert header["version"] == CHECKPOINT_VERSION, f"the checkpoint is of version {header['version']}, not {CHECKPOINT_VERSION}"
+
+    # the bounds of an int gene are ints, as in the genomes the layout was made from
+    gene_list = list()
+    for name, type, lower_bound, upper_bound in zip(contents.pop("gene_names"), contents.pop("gene_types"), contents.pop("lower_bounds"), contents.pop("upper_bounds")):
+        cast = int if type == "int" else float
+        gene_list.append(Gene(str(name), cast(lower_bound), cast(upper_bound), str(type)))
+    population = PopulationArray(GenomeLayout(gene_list), contents.pop("values"), contents.pop("genome_ids"))
+
+    return {
+        "population": population,
+        "fitness": contents.pop("fitness"),
+        "generation": header["generation"],
+        "metadata": header["metadata"],
+        "arrays": contents,
+    }
@@ -0,0 +1,225 @@
+from collections import OrderedDict
+from typing import Union
+import functools
+import hashlib
+import pandas as pd
+from Genome import Genome
+from Population import Population
+from indicator_cache import IndicatorCache
+
+class FitnessCache():
+    """
+    This class provides a size-bounded, least recently used (LRU) store of the fitness
+    of genomes. An entry is keyed by the hash of the gene values of the genome, the
+    fingerprint of the training window, and the name of the fitness function with the
+    arguments bound to it, e.g. the indicator tensors, so the seed copies of a population
+    and the parents that survive selection unchanged are only evaluated once per training
+    window. The fitness function should be
+    deterministic; a function that picks its objective at random, like multi_obj_fitnes,
+    would have its first pick cached.
+
+    The cache lives in the process that runs the selection; the genomes are looked up
+    before they are sent to the workers, and only the unique misses are evaluated.
+    """
+
+    def __init__(self, max_entries:int = 100_000) -> None:
+        """
+        This function initializes the cache
+
+        Arguments:
+            max_entries:int
+                the maximum number of fitness values kept in the cache
+
+        Returns:
+            None
+        """
+        self.max_entries = max_entries
+        self.store = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.history = list()
+
+    @staticmethod
+    def genome_key(genome:Genome) -> str:
+        # the canonical hash of the gene values of the genome, as in Population.genome_key
+        return Population.genome_key(genome)
+
+    @staticmethod
+    def window_key(series:Union[pd.DataFrame, list[pd.DataFrame]]) -> str:
+        # the fingerprint of the training window, as in the indicator cache, or of several windows in order
+        if isinstance(series, list):
+            return hashlib.blake2b("".join(IndicatorCache.fingerprint(window) for window in series).encode(), digest_size = 16).hexdigest()
+        return IndicatorCache.fingerprint(series)
+
+    @staticmethod
+    def function_key(fitness_func:callable) -> str:
+        # the name of the fitness function; a functools.partial is keyed by its function and
+        # the arguments it binds, e.g. the indicator tensors, which change the fitness
+        if isinstance(fitness_func, functools.partial):
+            arguments = [FitnessCache.argument_key(value) for value in fitness_func.args]
+            arguments += [f"{name}={FitnessCache.argument_key(value)}" for name, value in sorted(fitness_func.keywords.items())]
+            return f"{FitnessCache.function_key(fitness_func.func)}({', '.join(arguments)})"
+        return f"{fitness_func.__module__}.{fitness_func.__qualname__}"
+
+    @staticmethod
+    def argument_key(value:object) -> str:
+        # an argument with a key of its own, e.g. an IndicatorTensorStore, is keyed by it
+        key = getattr(value, "key", None)
+        return key() if callable(key) else repr(value)
+
+    def get(self, key:tuple) -> float:
+        """
+        This function returns the cached fitness if it exists
+
+        Arguments:
+            key:tuple
+                the genome, window, and function keys
+
+        Returns:
+            fitness:Union[float, None]
+                the cached fitness; None on a miss
+        """
+        # on a hit, mark the entry as the most recently used
+        if key in self.store:
+            self.hits += 1
+            self.store.move_to_end(key)
+            return self.store[key]
+
+        self.misses += 1
+        return None
+
+    def put(self, key:tuple, fitness:float) -> None:
+        """
+        This function stores the fitness of a genome and evicts the least recently used
+        entries beyond the bound
+
+        Arguments:
+            key:tuple
+                the genome, window, and function keys
+
+            fitness:float
+                the fitness of the genome
+
+        Returns:
+            None
+        """
+        self.store[key] = fitness
+        self.store.move_to_end(key)
+        while len(self.store) > self.max_entries:
+            self.store.popitem(last = False)
+            self.evictions += 1
+
+    def evaluate(self, genome_list:list[Genome], fitness_func:callable, series:Union[pd.DataFrame, list[pd.DataFrame]], evaluate:callable, incomplete:callable = None) -> list[float]:
+        """
+        This function returns the fitness of the genomes, evaluating only the genomes
+        whose fitness on the window is not cached; duplicate genomes in the list are
+        evaluated once
+
+        Arguments:
+            genome_list:list[Genome]
+                the genomes to be assessed
+
+            fitness_func:callable
+                the fitness function
+
+            series:Union[pd.DataFrame, list[pd.DataFrame]]
+                the training window, or several training windows
+
+            evaluate:callable
+                a function that takes the list of genomes to be evaluated and returns
+                their fitness, e.g. through a pool of workers
+
+            incomplete:callable
+                if given, a function that returns the positions, in the list last given to
+                evaluate, of the genomes whose evaluation did not complete, e.g. on a
+                timeout; their fitness is returned but not cached, so they are evaluated
+                again on the next lookup
+
+        Returns:
+            fitness_list:list[float]
+                the fitness of each genome in genome_list
+        """
+        window = self.window_key(series)
+        function = self.function_key(fitness_func)
+        keys = [(self.genome_key(genome), window, function) for genome in genome_list]
+
+        # look up the genomes, and collect the first genome of each missing key;
+        # a copy of a missing genome is a hit, since it is not evaluated again
+        fitness_list = list()
+        missing = dict()
+        for idx, key in enumerate(keys):
+            if key in missing:
+                self.hits += 1
+                fitness_list.append(None)
+                continue
+            fitness_list.append(self.get(key))
+            if fitness_list[-1] is None:
+                missing[key] = idx
+
+        # evaluate the missing genomes and store the fitness of those that completed
+        evaluated = dict()
+        if len(missing) > 0:
+            evaluated = dict(zip(missing, evaluate([genome_list[idx] for idx in missing.values()])))
+            skipped = set() if incomplete is None else set(incomplete())
+            for position, (key, fitness) in enumerate(evaluated.items()):
+                if position not in skipped:
+                    self.put(key, fitness)
+
+        return [evaluated[key] if fitness is None else fitness for key, fitness in zip(keys, fitness_list)]
+
+    def stats(self) -> dict:
+        """
+        This function returns the hit and miss counters of the cache
+
+        Arguments:
+            self
+                the instance of the class
+
+        Returns:
+            stats:dict
+                the number of hits, misses, evictions, and entries, and the hit rate of the cache
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups > 0 else 0.,
+            "evictions": self.evictions,
+            "entries": len(self.store)
+        }
+
+    def end_generation(self) -> dict:
+        """
+        This function records the counters of the generation in the history and resets them
+
+        Arguments:
+            self
+                the instance of the class
+
+        Returns:
+            stats:dict
+                the counters of the generation
+        """
+        stats = self.stats()
+        self.history.append(stats)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        return stats
+
+    def clear(self) -> None:
+        """
+        This function removes all entries from the cache
+
+        Arguments:
+            self
+                the instance of the class
+
+        Returns:
+            None
+        """
+        self.store.clear()
+
+    def __len__(self) -> int:
+        return len(self.store)
@@ -0,0 +1,423 @@
+import os
+import signal
+import time
+import weakref
+from multiprocessing import Pool, TimeoutError, cpu_count
+from multiprocessing.shared_memory import SharedMemory
+from typing import Union
+import numpy as np
+import pandas as pd
+from Gene import Gene
+from Genome import Genome
+from helper_module import SlidingWindows
+from indicator_cache import indicator_cache
+
+# the state of a worker process, set once by _initialize_worker
+_worker = dict()
+
+class EvaluationTimeout(Exception):
+    """
+    This exception is raised in a worker when the evaluation of a genome runs past its timeout
+    """
+
+def _raise_timeout(signum:int, frame:object) -> None:
+    # an alarm that arrives after the evaluation returned is ignored
+    if _worker.get("evaluating", False):
+        raise EvaluationTimeout()
+
+def estimate_cost(genome:Genome) -> float:
+    """
+    This function estimates the relative cost of evaluating a genome from its window genes,
+    e.g. RSI_window and z_rolling_window
+
+    Arguments:
+        genome:Genome
+            the genome to be assessed
+
+    Returns:
+        cost:float
+            the relative cost of the evaluation
+    """
+    return 1. + sum(float(gene.value) for gene in genome.genome if gene.name.endswith("window"))
+
+def _initialize_worker(blocks:list[tuple[str, str, str]], index:pd.Index, windows:np.ndarray, functions:list[callable]) -> None:
+    """
+    This function attaches a worker process to the training data in shared memory
+
+    Arguments:
+        blocks:list[tuple[str, str, str]]
+            the column, dtype, and shared memory name of each column of the training data
+
+        index:pd.Index
+            the dates of the training data
+
+        windows:np.ndarray
+            the (windows x 2) start and stop rows of each training window
+
+        functions:list[callable]
+            the fitness functions a task may ask for, by position
+
+    Returns:
+        None
+    """
+    memories = list()
+    columns = dict()
+    for column, dtype, name in blocks:
+        memory = SharedMemory(name = name)
+        memories.append(memory)
+        columns[column] = np.ndarray((len(index),), dtype = np.dtype(dtype), buffer = memory.buf)
+
+    _worker["memories"] = memories
+    _worker["columns"] = columns
+    _worker["index"] = index
+    _worker["windows"] = windows
+    _worker["functions"] = functions
+
+    # the timeout of an evaluation interrupts the worker with an alarm, where there is one
+    if hasattr(signal, "setitimer"):
+        signal.signal(signal.SIGALRM, _raise_timeout)
+
+def _evaluate_task(task:tuple[int, list[tuple[str, object]], Union[int, tuple[int]], int, int, float]) -> tuple[int, float, int, int, float, int, bool]:
+    """
+    This function evaluates one genome on one training window, or on several, in a worker process
+
+    Arguments:
+        task:tuple[int, list[tuple[str, object]], Union[int, tuple[int]], int, int, float]
+            the position of the genome in its list, the names and values of its genes,
+            the id of the window, or the ids of several windows, the number of bars of
+            the window to use, or None for all of them, the position of the fitness
+            function, and the timeout in seconds, or None
+
+    Returns:
+        position, fitness, hits, misses, elapsed, pid, timed_out:tuple[int, float, int, int, float, int, bool]
+            the position of the genome, its fitness, the hits and misses of the indicator
+            cache of the worker during the evaluation, the seconds it took, the process id
+            of the worker, and whether the evaluation ran past its timeout
+    """
+    position, genes, window, bars, function, timeout = task
+
+    # the genes rebuilt in a worker only carry their values, which is all a fitness function reads
+    genome = Genome([Gene(name = name, lower_bound = None, upper_bound = None, type = None, value = value) for name, value in genes])
+
+    # several windows are evaluated on their span, with the rows of each window in the span
+    kwargs = dict()
+    if isinstance(window, tuple):
+        bounds = _worker["windows"][list(window)]
+        start, stop = bounds[:, 0].min(), bounds[:, 1].max()
+        kwargs["windows"] = [(int(a - start), int(b - start)) for a, b in bounds]
+    else:
+        start, stop = _worker["windows"][window]
+        stop = stop if bars is None else min(start + bars, stop)
+
+    # a private copy of the window, so the fitness function may modify it
+    series = pd.DataFrame({column: values[start:stop].copy() for column, values in _worker["columns"].items()}, index = _worker["index"][start:stop])
+
+    hits, misses = indicator_cache.hits, indicator_cache.misses
+    started = time.perf_counter()
+    alarm = timeout is not None and hasattr(signal, "setitimer")
+    timed_out = False
+    try:
+        _worker["evaluating"] = True
+        if alarm:
+            signal.setitimer(signal.ITIMER_REAL, timeout)
+        fitness = _worker["functions"][function](series = series, genome = genome, **kwargs)
+        _worker["evaluating"] = False
+    except EvaluationTimeout:
+        # a runaway evaluation is the worst fitness
+        fitness = float('-inf')
+        timed_out = True
+    finally:
+        _worker["evaluating"] = False
+        if alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+    elapsed = time.perf_counter() - started
+    return position, fitness, indicator_cache.hits - hits, indicator_cache.misses - misses, elapsed, os.getpid(), timed_out
+
+def window_span(train_set:Union[SlidingWindows, list[pd.DataFrame]]) -> tuple[pd.DataFrame, np.ndarray]:
+    """
+    This function computes for the span of time series the training windows are
+    sliced from, and the rows of each window in the span
+
+    Arguments:
+        train_set:Union[SlidingWindows, list[pd.DataFrame]]
+            the training windows
+
+    Returns:
+        frame, windows:tuple[pd.DataFrame, np.ndarray]
+            the span, and the (windows x 2) start and stop rows of each window
+    """
+    assert len(train_set) > 0, "the training set has no windows"
+
+    # the sliding windows know their series and rows, so the windows are not sliced
+    if isinstance(train_set, SlidingWindows):
+        windows = np.arange(len(train_set), dtype = np.int64)[:, None] + np.array([0, train_set.window], dtype = np.int64)
+        return train_set.series.iloc[:int(windows[-1, 1])], windows
+
+    frame = pd.concat(train_set)
+    frame = frame[~frame.index.duplicated()].sort_index()
+
+    values = frame.to_numpy()
+    windows = np.zeros((len(train_set), 2), dtype = np.int64)
+    for idx, window in enumerate(train_set):
+        start = frame.index.get_loc(window.index[0]) if len(window) > 0 else 0
+        stop = start + len(window)
+
+        # a window must be a contiguous slice of the span with the same values
+        assert frame.index[start:stop].equals(window.index), f"window {idx} is not a contiguous slice of the training set"
+        assert np.array_equal(values[start:stop], window[frame.columns].to_numpy(), equal_nan = True), f"window {idx} disagrees with another window"
+        windows[idx] = start, stop
+    return frame, windows
+
+def _release(pool:Pool, memories:list[SharedMemory]) -> None:
+    # stop the workers, then free the shared memory
+    if pool is not None:
+        pool.terminate()
+        pool.join()
+    for memory in memories:
+        memory.close()
+        memory.unlink()
+
+class FitnessEvaluator():
+    """
+    This class provides a long-lived pool of workers that evaluate the fitness of genomes.
+    The training windows are published once in shared memory as the columns of the span
+    they are sliced from, and the workers attach to them when they start; a task only
+    carries the gene values of a genome and the id of a window. The workers and the
+    shared memory are released by close(), or when the evaluator is garbage collected.
+
+    The genomes are dispatched one at a time, most costly first, so a slow genome
+    starts early instead of stalling the end of a generation, and a genome that runs
+    past the timeout is given a fitness of -inf. The positions of the genomes whose
+    evaluation did not complete, by a timeout or a restart of the workers, are kept in
+    incomplete, so their -inf is not taken as their fitness, e.g. by a FitnessCache.
+    """
+
+    def __init__(self, train_set:Union[SlidingWindows, list[pd.DataFrame]], fitness_func:callable, processes:int = None, timeout:float = None, cost_func:callable = estimate_cost, screen_func:callable = None) -> None:
+        """
+        This function publishes the training windows and starts the workers
+
+        Arguments:
+            train_set:Union[SlidingWindows, list[pd.DataFrame]]
+                the training windows, as returned by split_train_set; a list of
+                windows should hold slices of one time series
+
+            fitness_func:callable
+                the fitness function; it is sent to the workers once
+
+            processes:int
+                the number of workers; cpu_count() if not given
+
+            timeout:float
+                the seconds an evaluation may take before its genome is given a fitness
+                of -inf; no limit if not given
+
+            cost_func:callable
+                a function that estimates the relative cost of evaluating a genome
+
+            screen_func:callable
+                if given, a second fitness function the workers can run, e.g. to screen
+                the genomes on a prefix of a window in successive_halving
+
+        Returns:
+            None
+        """
+        self.fitness_func = fitness_func
+        self.screen_func = screen_func
+        self.functions = [fitness_func] if screen_func is None else [fitness_func, screen_func]
+        self.processes = cpu_count() if processes is None else processes
+        self.timeout = timeout
+        self.cost_func = cost_func
+        self.reports = list()
+        self.history = list()
+        self.incomplete = list()
+        self.indicator_hits = 0
+        self.indicator_misses = 0
+        self.pool = None
+        self.memories = list()
+        self._finalizer = weakref.finalize(self, _release, None, self.memories)
+
+        frame, self.windows = window_span(train_set)
+        self.index = frame.index
+
+        # copy each column of the span into its own block of shared memory
+        self.blocks = list()
+        for column in frame.columns:
+            values = frame[column].to_numpy()
+            assert values.dtype.kind in "biuf", f"column {column} is not numeric and cannot be shared"
+            memory = SharedMemory(create = True, size = max(values.nbytes, 1))
+            self.memories.append(memory)
+            np.ndarray(values.shape, dtype = values.dtype, buffer = memory.buf)[:] = values
+            self.blocks.append((column, values.dtype.str, memory.name))
+
+        self._start_pool()
+
+    def _start_pool(self) -> None:
+        # start the workers; they attach to the shared memory when they start
+        self.pool = Pool(self.processes, initializer = _initialize_worker, initargs = (self.blocks, self.index, self.windows, self.functions))
+        self._finalizer.detach()
+        self._finalizer = weakref.finalize(self, _release, self.pool, self.memories)
+
+    def _restart_pool(self) -> None:
+        # stop the workers, keeping the shared memory, and start new ones
+        self._finalizer.detach()
+        self.pool.terminate()
+        self.pool.join()
+        self._start_pool()
+
+    def window(self, window:int) -> pd.DataFrame:
+        # a copy of the training window with the given id, as the workers see it
+        assert self.pool is not None, "the evaluator is closed"
+        start, stop = self.windows[window]
+        columns = dict()
+        for (column, dtype, _), memory in zip(self.blocks, self.memories):
+            columns[column] = np.ndarray((len(self.index),), dtype = np.dtype(dtype), buffer = memory.buf)[start:stop].copy()
+        return pd.DataFrame(columns, index = self.index[start:stop])
+
+    def evaluate(self, genome_list:list[Genome], window:Union[int, list[int]], bars:int = None, fitness_func:callable = None) -> list[float]:
+        """
+        This function evaluates the fitness of the genomes on a training window
+
+        Arguments:
+            genome_list:list[Genome]
+                the genomes to be assessed
+
+            window:Union[int, list[int]]
+                the id of the training window, its position in the training set; or the
+                ids of several windows, for a fitness function that takes the rows of
+                the windows in their span, e.g. multi_window_fitness
+
+            bars:int
+                if given, the genomes are evaluated on the first bars of the window only
+
+            fitness_func:callable
+                the fitness_func or the screen_func of the evaluator; the fitness_func if
+                not given
+
+        Returns:
+            fitness_list:list[float]
+                the fitness of each genome in genome_list; -inf for the genomes whose
+                evaluation did not complete, whose positions are kept in incomplete
+        """
+        assert self.pool is not None, "the evaluator is closed"
+        if isinstance(window, (list, tuple, np.ndarray)):
+            assert bars is None, "several windows are evaluated on all of their bars"
+            window = tuple(int(idx) for idx in window)
+        assert all(0 <= idx < len(self.windows) for idx in np.atleast_1d(window)), f"there is no training window {window}"
+        function = 0 if fitness_func is None else [id(func) for func in self.functions].index(id(fitness_func))
+
+        # dispatch the most costly genomes first, one at a time, to whichever worker is free
+        costs = np.array([self.cost_func(genome) for genome in genome_list], dtype = np.float64)
+        order = np.argsort(-costs, kind = "stable")
+        tasks = [(int(position), [(gene.name, gene.value) for gene in genome_list[position].genome], window, bars, function, self.timeout) for position in order]
+
+        started = time.perf_counter()
+        fitness_list = [float('-inf')] * len(genome_list)
+        complete = [False] * len(genome_list)
+        busy = dict()
+        timeouts = 0
+        received = 0
+        results = self.pool.imap_unordered(_evaluate_task, tasks, chunksize = 1)
+        while received < len(tasks):
+            try:
+                # a worker that does not return well after its own timeout is stuck,
+                # e.g. in code that the alarm cannot interrupt
+                result = results.next(timeout = None if self.timeout is None else 2 * self.timeout + 1)
+            except TimeoutError:
+                # the genomes still out keep a fitness of -inf, and the workers are replaced
+                timeouts += len(tasks) - received
+                self._restart_pool()
+                break
+
+            position, fitness, hits, misses, elapsed, pid, timed_out = result
+            fitness_list[position] = fitness
+            complete[position] = not timed_out
+            self.indicator_hits += hits
+            self.indicator_misses += misses
+            busy[pid] = busy.get(pid, 0.) + elapsed
+            timeouts += timed_out
+            received += 1
+
+        self.reports.append({
+            "tasks": len(tasks),
+            "timeouts": timeouts,
+            "wall": time.perf_counter() - started,
+            "busy": sum(busy.values()),
+            "workers": busy
+        })
+        self.incomplete = [position for position, done in enumerate(complete) if not done]
+        return fitness_list
+
+    def end_generation(self) -> dict:
+        """
+        This function records the utilization of the workers during the generation in the
+        history, and starts the count of the next generation
+
+        Arguments:
+            self
+                the instance of the class
+
+        Returns:
+            report:dict
+                the number of evaluations and timeouts, the wall and busy seconds, the
+                utilization of the workers, and the busy seconds of each worker
+        """
+        workers = dict()
+        for report in self.reports:
+            for pid, busy in report["workers"].items():
+                workers[pid] = workers.get(pid, 0.) + busy
+
+        wall = sum(report["wall"] for report in self.reports)
+        busy = sum(report["busy"] for report in self.reports)
+        report = {
+            "tasks": sum(report["tasks"] for report in self.reports),
+            "timeouts": sum(report["timeouts"] for report in self.reports),
+            "wall": wall,
+            "busy": busy,
+            "utilization": busy / (wall * self.processes) if wall > 0 else 0.,
+            "workers": workers
+        }
+        self.history.append(report)
+        self.reports = list()
+        return report
+
+    def stats(self) -> dict:
+        """
+        This function returns the indicator cache counters aggregated over the workers
+
+        Arguments:
+            self
+                the instance of the class
+
+        Returns:
+            stats:dict
+                the number of hits and misses, and the hit rate of the indicator caches
+        """
+        lookups = self.indicator_hits + self.indicator_misses
+        return {
+            "hits": self.indicator_hits,
+            "misses": self.indicator_misses,
+            "hit_rate": self.indicator_hits / lookups if lookups > 0 else 0.
+        }
+
+    def close(self) -> None:
+        """
+        This function stops the workers and frees the shared memory
+
+        Arguments:
+            self
+                the instance of the class
+
+        Returns:
+            None
+        """
+        self._finalizer()
+        self.pool = None
+
+    def __enter__(self) -> "FitnessEvaluator":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.windows)
@@ -0,0 +1,145 @@
+"""
+The RSI fuzzy inference of a whole population at once, as a standalone API: the fitness
+functions evaluate one genome at a time in the workers of a FitnessEvaluator, so neither
+Fitness, Selection, nor Evolution calls it. It is meant for analyses that fuzzify many
+genomes on one stock, e.g. a population against an IndicatorTensor, in a few numpy
+operations instead of one get_fuzzy_stock_df per genome.
+"""
+import numpy as np
+import pandas as pd
+from Genome import Genome
+from fuzzy_membership_func import trimf_array, linearf_array
+
+# the columns of the parameter matrix of the RSI rule base;
+# these are the arguments of fuzzy_TA.RSI other than the window
+RSI_PARAM_COLUMNS = [
+    "p1", "p2", "p3", "p4",
+    "lo_left_node", "lo_right_node",
+    "md_left_node", "md_middle_node", "md_right_node",
+    "hi_left_node", "hi_right_node"
+]
+
+# the default nodes of fuzzy_TA.RSI, in the order of the node columns of the parameter matrix
+RSI_DEFAULT_NODES = [0., 50., 0., 50., 100., 50., 100.]
+
+def genome_RSI_params(genome_list:list[Genome]) -> (np.ndarray, np.ndarray, np.ndarray):
+    """
+    This function collects the RSI rule parameters of a list of genomes into arrays
+
+    Arguments:
+        genome_list:list[Genome]
+            the genomes whose parameters will be collected
+
+    Returns:
+        params, RSI_windows, z_rolling_windows: np.ndarray, np.ndarray, np.ndarray
+            the (genomes x 11) parameter matrix with the columns in RSI_PARAM_COLUMNS,
+            the RSI window of each genome, and the z_sum rolling window of each genome
+    """
+    params = np.empty((len(genome_list), len(RSI_PARAM_COLUMNS)), dtype = np.float64)
+    RSI_windows = np.empty(len(genome_list), dtype = np.int64)
+    z_rolling_windows = np.empty(len(genome_list), dtype = np.int64)
+
+    for i, genome in enumerate(genome_list):
+        genome_dict = genome.genome_dict
+        params[i, 0:4] = [genome_dict[f"RSI_p{j}"].value for j in range(1, 5)]
+        params[i, 4:6] = genome_dict["RSI_low_membership"].value
+        params[i, 6:9] = genome_dict["RSI_middle_membership"].value
+        params[i, 9:11] = genome_dict["RSI_high_membership"].value
+        RSI_windows[i] = genome_dict["RSI_window"].value
+        z_rolling_windows[i] = genome_dict["z_rolling_window"].value
+
+    return params, RSI_windows, z_rolling_windows
+
+def batch_RSI_z_sum(indicator:np.ndarray, params:np.ndarray, rows:np.ndarray = None) -> np.ndarray:
+    """
+    This function fuzzifies and defuzzifies an RSI series with the rule base of fuzzy_TA.RSI
+    for a whole population at once; row i of the result equals the z_sum that
+    fuzzy_TA.RSI followed by fuzzy_TA.z_total produces for genome i
+
+    Arguments:
+        indicator:np.ndarray
+            a (T,) RSI series shared by all genomes, or a (windows x T) matrix of RSI series,
+            e.g. a row range of an IndicatorTensor
+
+        params:np.ndarray
+            the (genomes x 11) parameter matrix with the columns in RSI_PARAM_COLUMNS
+
+        rows:np.ndarray
+            when the indicator is a matrix, the row of the indicator used by each genome
+
+    Returns:
+        z_sum:np.ndarray
+            the (genomes x T) inference values of the genomes; a row of NaN for a genome
+            whose membership nodes are not increasing, which fuzzy_TA.RSI would reject
+    """
+    indicator = np.asarray(indicator, dtype = np.float64)
+    params = np.atleast_2d(np.asarray(params, dtype = np.float64))
+    assert params.shape[1] == len(RSI_PARAM_COLUMNS), f"params must have {len(RSI_PARAM_COLUMNS)} columns"
+
+    # gather the indicator series of every genome as a (genomes x T) matrix
+    if indicator.ndim == 1:
+        x = indicator[np.newaxis, :]
+    else:
+        assert rows is not None, "rows must be given when the indicator is a matrix"
+        x = indicator[np.asarray(rows)]
+
+    # a genome whose nodes are not increasing is fuzzified with the default nodes, so the
+    # rest of the population is still computed, and its row is set to NaN at the end
+    nodes = params[:, 4:]
+    valid = (nodes[:, 0] < nodes[:, 1]) & (nodes[:, 2] < nodes[:, 3]) & (nodes[:, 3] < nodes[:, 4]) & (nodes[:, 5] < nodes[:, 6])
+    params = params.copy()
+    params[~valid, 4:] = RSI_DEFAULT_NODES
+
+    # columns of the parameter matrix, shaped (genomes x 1) so they broadcast along time
+    p1, p2, p3, p4, lo_l, lo_r, md_l, md_m, md_r, hi_l, hi_r = (params[:, [j]] for j in range(params.shape[1]))
+
+    # compute for the membership values of the RSI values
+    u_lo = linearf_array(x, [lo_l, lo_r], positive_slope = False)
+    u_md = trimf_array(x, [md_l, md_m, md_r])
+    u_hi = linearf_array(x, [hi_l, hi_r], positive_slope = True)
+
+    # the following are the fuzzy rules for RSI;
+    # the medium rule is undefined where RSI is exactly 50 or missing, as in fuzzy_TA.RSI
+    z_lo = p1 * ((u_lo * 25) + 75)
+    z_md = np.where(x < 50, p2 * ((u_md * -25) + 75), np.where(x > 50, p3 * ((u_md * 25) + 25), np.nan))
+    z_hi = p4 * ((u_hi * -25) + 25)
+
+    # NaN-aware weighted average of the consequents; undefined terms are skipped in the
+    # numerator while the memberships still count in the denominator, as in fuzzy_TA.z_total
+    u_sum = np.zeros(np.broadcast_shapes(x.shape, p1.shape))
+    z_sum = np.zeros_like(u_sum)
+    for u, z in ((u_lo, z_lo), (u_md, z_md), (u_hi, z_hi)):
+        u_sum += np.where(np.isnan(u), 0., u)
+        uz = z * u
+        z_sum += np.where(np.isnan(uz), 0., uz)
+
+    with np.errstate(divide = 'ignore', invalid = 'ignore'):
+        z_sum = z_sum / u_sum
+    z_sum[~valid] = np.nan
+    return z_sum
+
+def batch_rolling_mean(z_sum:np.ndarray, windows:np.ndarray) -> np.ndarray:
+    """
+    This function computes for the rolling mean of each row of z_sum with its own window;
+    this is z_sum_rolling of get_fuzzy_stock_df for a whole population
+
+    Arguments:
+        z_sum:np.ndarray
+            the (genomes x T) inference values of the genomes
+
+        windows:np.ndarray
+            the rolling window of each genome
+
+    Returns:
+        z_sum_rolling:np.ndarray
+            the (genomes x T) rolling mean of the inference values
+    """
+    windows = np.asarray(windows)
+    z_sum_rolling = np.empty_like(z_sum)
+
+    # genomes sharing a window are rolled together as the columns of one dataframe
+    for window in np.unique(windows):
+        rows = np.flatnonzero(windows == window)
+        z_sum_rolling[rows] = pd.DataFrame(z_sum[rows].T).rolling(int(window)).mean().to_numpy().T
+
+    return z_sum_rolling
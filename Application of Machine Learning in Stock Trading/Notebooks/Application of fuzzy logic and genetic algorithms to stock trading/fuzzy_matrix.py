@@ -0,0 +1,170 @@
+from typing import Union
+import numpy as np
+import pandas as pd
+
+class FuzzyMatrix():
+    """
+    This class provides the columnar storage of the membership values (u) and the
+    consequents (z) of fuzzy_TA. The columns live in one preallocated (T x K) array and
+    a registry maps the name of a column to its position, so adding the rules of an
+    indicator writes into the array instead of inserting new blocks into a dataframe.
+    For a panel of tickers, each column is itself a (T x tickers) matrix and the array
+    is (T x tickers x K).
+    """
+
+    def __init__(self, index:pd.Index, capacity:int = 64, dtype:type = np.float64, tickers:pd.Index = None) -> None:
+        """
+        This function initializes the storage
+
+        Arguments:
+            index:pd.Index
+                the dates of the stock data; these label the rows of the array
+
+            capacity:int
+                the number of columns allocated upfront; the 18 indicators of fuzzy_TA
+                use at most 54 columns. the array doubles if more columns are registered
+
+            dtype:type
+                the dtype of the array, np.float64 or np.float32
+
+            tickers:pd.Index
+                if given, the tickers of a panel; every column then holds one value per
+                row and ticker
+
+        Returns:
+            None
+        """
+        self.index = index
+        self.tickers = tickers
+        self.shape = (len(index),) if tickers is None else (len(index), len(tickers))
+        self.dtype = np.dtype(dtype)
+        self.columns = list()
+        self.positions = dict()
+        self.allocations = 0
+        self.array = self._allocate(capacity)
+
+    def _allocate(self, capacity:int) -> np.ndarray:
+        """
+        This function allocates an array of missing values; the columns are the last
+        axis, so the reduction over the columns of a row is contiguous
+
+        Arguments:
+            capacity:int
+                the number of columns of the array
+
+        Returns:
+            array:np.ndarray
+                the (T x capacity) array, or (T x tickers x capacity) for a panel
+        """
+        self.allocations += 1
+        return np.full(self.shape + (capacity,), np.nan, dtype = self.dtype)
+
+    def register(self, names:Union[str, list[str]]) -> list[int]:
+        """
+        This function reserves columns for the given names; names that are already
+        registered keep their position
+
+        Arguments:
+            names:Union[str, list[str]]
+                the name or names of the columns
+
+        Returns:
+            positions:list[int]
+                the positions of the columns in the array
+        """
+        names = [names] if isinstance(names, str) else names
+        for name in names:
+            if name in self.positions:
+                continue
+
+            # double the capacity when the array is full
+            if len(self.columns) == self.array.shape[-1]:
+                array = self._allocate(max(2 * self.array.shape[-1], 1))
+                array[..., :len(self.columns)] = self.array[..., :len(self.columns)]
+                self.array = array
+
+            self.positions[name] = len(self.columns)
+            self.columns.append(name)
+        return [self.positions[name] for name in names]
+
+    def assign(self, name:str, values:Union[pd.Series, np.ndarray, float], mask:Union[pd.Series, np.ndarray] = None) -> None:
+        """
+        This function writes values into a column, registering the column if needed;
+        this replaces df[name] = values and df.loc[mask, name] = values
+
+        Arguments:
+            name:str
+                the name of the column
+
+            values:Union[pd.Series, np.ndarray, float]
+                the values of the column, aligned with the rows (and tickers), or a scalar
+
+            mask:Union[pd.Series, np.ndarray]
+                if given, only the entries where the mask is True are written
+
+        Returns:
+            None
+        """
+        column = self.array[..., self.register(name)[0]]
+        values = values if np.isscalar(values) else np.asarray(values)
+        if mask is None:
+            column[:] = values
+        else:
+            mask = np.asarray(mask, dtype = bool)
+            column[mask] = values if np.isscalar(values) else values[mask]
+
+    def clear(self) -> None:
+        """
+        This function removes all columns without releasing the array
+
+        Arguments:
+            self
+                the instance of the class
+
+        Returns:
+            None
+        """
+        self.array[..., :len(self.columns)] = np.nan
+        self.columns = list()
+        self.positions = dict()
+
+    @property
+    def values(self) -> np.ndarray:
+        # the (T x K) view of the registered columns, (T x tickers x K) for a panel
+        return self.array[..., :len(self.columns)]
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        This function returns a dataframe view of the registered columns for inspection;
+        the dataframe shares memory with the array, so it is not copied. the dataframe
+        of a panel is a copy with (column, ticker) columns
+
+        Arguments:
+            self
+                the instance of the class
+
+        Returns:
+            frame:pd.DataFrame
+                the (T x K) dataframe of the columns
+        """
+        if self.tickers is None:
+            return pd.DataFrame(self.values, index = self.index, columns = list(self.columns), copy = False)
+
+        columns = pd.MultiIndex.from_product([self.columns, self.tickers])
+        values = self.values.transpose(0, 2, 1).reshape(len(self.index), -1)
+        return pd.DataFrame(values, index = self.index, columns = columns)
+
+    def __setitem__(self, name:str, values:Union[pd.Series, np.ndarray, float]) -> None:
+        self.assign(name, values)
+
+    def __getitem__(self, name:str) -> Union[pd.Series, pd.DataFrame]:
+        # a view of the column; writing into it writes into the array
+        if self.tickers is None:
+            return pd.Series(self.array[:, self.positions[name]], index = self.index, name = name, copy = False)
+        return pd.DataFrame(self.array[..., self.positions[name]], index = self.index, columns = self.tickers, copy = False)
+
+    def __contains__(self, name:str) -> bool:
+        return name in self.positions
+
+    def __len__(self) -> int:
+        return len(self.columns)
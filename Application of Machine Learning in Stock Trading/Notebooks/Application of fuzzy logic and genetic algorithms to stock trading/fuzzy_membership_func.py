@@ -1,3 +1,5 @@
+import numpy as np
+
 # define the triangular membership function
 def trimf(val:int, vector:list[int]) -> float:
     """
@@ -81,4 +83,78 @@ def linearf(val:int, vector:list[int], positive_slope:bool = True) -> float:
        elif val > b:
            return 0
        else:
-           return  (b - val)/(b - a)
\ No newline at end of file
+           return  (b - val)/(b - a)
+
+# define the array version of the triangular membership function
+def trimf_array(vals:np.ndarray, vector:list[float]) -> np.ndarray:
+    """
+    Triangular Membership Function (array version)
+        This function calculates the fuzzy values of an array of crisp inputs using a triangular membership function.
+        The vector is validated once per call instead of once per element; NaN inputs remain NaN.
+
+    Arguments:
+        vals:np.ndarray
+            array-like of crisp values to be fuzzified (e.g. a pandas Series)
+
+        vector:list[float]
+            a vector with 3 values pertaining to the left base, peak, and right base of the triangular membership function.
+            the vector should satisfy the following property:
+            a < b < c
+            each value may also be an array that broadcasts against vals, e.g. a (genomes x 1)
+            column for a (genomes x T) vals, to fuzzify with a different vector per row
+
+    Returns
+        fuzzy_values:np.ndarray
+            fuzzified values from the crisp values
+    """
+
+    # check if the vector is of length 3
+    assert len(vector) == 3, "the length of the vector must be equal to 3"
+
+    # unpack and check the values of the vector if it statisfies the property a < b < c
+    a, b, c = vector
+    assert np.all(np.less(a, b)), "a must be less than to b"
+    assert np.all(np.less(b, c)), "b must be less than to c"
+
+    # compute for the fuzzy values from the crisp values;
+    # the rising and falling edges are clipped at 0 outside of [a, c]
+    vals = np.asarray(vals, dtype = np.float64)
+    return np.maximum(np.minimum((vals - a)/(b - a), (c - vals)/(c - b)), 0.0)
+
+# define the array version of the linear membership function
+def linearf_array(vals:np.ndarray, vector:list[float], positive_slope:bool = True) -> np.ndarray:
+    """
+    Linear Membership Function (array version)
+        This function computes for the degree of membership of an array of crisp values through a linear membership function.
+        The vector is validated once per call instead of once per element; NaN inputs remain NaN.
+
+    Arguments
+        vals:np.ndarray
+            array-like of crisp values to be fuzzified (e.g. a pandas Series)
+
+        vector:list[float]
+            A length 2 vector that defines the linear boundaries of the
+            linear membership function; it should satisfy a < b.
+            each value may also be an array that broadcasts against vals
+
+        positive_slope:bool
+            boolean paramater that checks if the slope to be used is positive or negative
+
+    Returns
+        fuzzy_values:np.ndarray
+            The fuzzified values from the crisp inputs
+    """
+
+    # check if the input vector is of length 2
+    assert len(vector) == 2, "The vector must of of length 2"
+
+    # unpack the vector and check if it statisfies the property a < b
+    a, b = vector
+    assert np.all(np.less(a, b)), "a must be less than b"
+
+    # compute for the fuzzy values from the crisp values
+    vals = np.asarray(vals, dtype = np.float64)
+    if positive_slope:
+        return np.clip((vals - a)/(b - a), 0.0, 1.0)
+    else:
+        return np.clip((b - vals)/(b - a), 0.0, 1.0)
@@ -0,0 +1,557 @@
+import os
+import glob
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from fuzzy_ta import fuzzy_TA
+from fuzzy_matrix import FuzzyMatrix
+from stock_store import StockStore
+from typing import Union
+
+# the columns of the stock data used by fuzzy_TA
+PANEL_FIELDS = ['Close', 'Open', 'High', 'Low', 'Volume']
+
+def load_panel(directory:str, tickers:list[str] = None, fields:list[str] = PANEL_FIELDS, store:StockStore = None) -> pd.DataFrame:
+    """
+    This function reads the csv files of several stocks into one date-aligned panel
+
+    Arguments:
+        directory:str
+            the directory of the csv files, one file per ticker named <ticker>.csv
+
+        tickers:list[str]
+            the tickers to be read; if None, every csv file in the directory is read
+
+        fields:list[str]
+            the columns of the stock data to be kept
+
+        store:StockStore
+            if given, the stocks are loaded from the binary store of the directory instead
+            of parsing the csv files
+
+    Returns:
+        panel:pd.DataFrame
+            a dataframe indexed by the union of the dates of the stocks with (field, ticker)
+            columns; a ticker has missing values on the dates it was not traded
+    """
+    if tickers is None:
+        tickers = sorted(os.path.splitext(os.path.basename(path))[0] for path in glob.glob(os.path.join(directory, '*.csv')))
+
+    if store is not None:
+        frames = [store.load(ticker)[fields] for ticker in tickers]
+    else:
+        frames = [pd.read_csv(os.path.join(directory, f'{ticker}.csv'), index_col = 'Date', parse_dates = True)[fields] for ticker in tickers]
+    panel = pd.concat(frames, axis = 1, keys = tickers).sort_index()
+    return panel.swaplevel(axis = 1)[fields]
+
+class Panel(dict):
+    """
+    This class holds the columns of a panel of stocks the way a dataframe holds the columns
+    of one stock; every column is a (T x tickers) dataframe, so the code of fuzzy_TA that
+    reads and writes self.df runs on all tickers at once
+    """
+
+    def __init__(self, index:pd.Index, tickers:pd.Index) -> None:
+        """
+        This function initializes an empty panel
+
+        Arguments:
+            index:pd.Index
+                the rows of the panel
+
+            tickers:pd.Index
+                the tickers of the panel
+
+        Returns:
+            None
+        """
+        super().__init__()
+        self.index = index
+        self.tickers = tickers
+
+    def __setitem__(self, name:str, values:Union[pd.DataFrame, np.ndarray]) -> None:
+        # arrays, e.g. z_sum, are labelled with the rows and tickers of the panel
+        if not isinstance(values, pd.DataFrame):
+            values = pd.DataFrame(np.asarray(values), index = self.index, columns = self.tickers)
+        super().__setitem__(name, values)
+
+def _rolling_windows(frame:pd.DataFrame, window:int, reduce:callable) -> pd.DataFrame:
+    """
+    This function applies a reduction to every full rolling window of each column; this is
+    rolling(window).apply(func, raw = True) without a python call per window
+
+    Arguments:
+        frame:pd.DataFrame
+            the (T x tickers) values
+
+        window:int
+            the length of the windows
+
+        reduce:callable
+            a function that reduces a (windows x window) array along its last axis
+
+    Returns:
+        result:pd.DataFrame
+            the (T x tickers) reductions; windows that are not full or hold a missing
+            value are missing, as in pandas
+    """
+    # each ticker is a contiguous row, so the values of a window are contiguous and
+    # are summed in the same order as the array pandas passes to the function
+    values = np.ascontiguousarray(frame.to_numpy(dtype = np.float64).T)
+    result = np.full(values.shape, np.nan)
+
+    if values.shape[1] >= window:
+        for j, x in enumerate(values):
+            result[j, window - 1:] = reduce(sliding_window_view(x, window))
+        incomplete = sliding_window_view(np.isnan(values), window, axis = -1).any(axis = -1)
+        result[:, window - 1:][incomplete] = np.nan
+
+    return pd.DataFrame(result.T, index = frame.index, columns = frame.columns)
+
+class fuzzy_TA_panel(fuzzy_TA):
+    """
+    This class performs the fuzzy technical analysis of fuzzy_TA on a panel of stocks,
+    computing every indicator, membership value, and z_sum column-wise for all tickers
+    at once.
+
+    The stocks are listed on different dates and are not traded on every date, so the
+    panel is first aligned by bar: the rows of each ticker where it was traded are stacked
+    from the first row, and the shorter tickers are padded with missing values at the end.
+    Each ticker then sees exactly the series that fuzzy_TA sees for it alone, and since
+    every indicator only looks back, the padding never reaches a traded row.
+    """
+
+    def __init__(self, panel:pd.DataFrame, capacity:int = 64, dtype:type = np.float64) -> None:
+        """
+        Arguments:
+            panel: pd.DataFrame
+                a date-aligned dataframe with (field, ticker) columns, e.g. from load_panel;
+                a ticker is traded on the dates where its closing price is not missing
+
+            capacity: int
+                the number of membership and consequent columns allocated upfront
+
+            dtype: type
+                the dtype of the membership and consequent matrices, np.float64 or np.float32
+
+        Returns:
+            None
+        """
+        self.panel = panel
+        self.dates = panel.index
+        self.tickers = panel['Close'].columns
+
+        # the row of each traded date in the bar-aligned panel
+        self.traded = panel['Close'].notna().to_numpy()
+        self.bars = self.traded.sum(axis = 0)
+        self.rows = np.cumsum(self.traded, axis = 0) - 1
+
+        df = Panel(pd.RangeIndex(self.bars.max(initial = 0), name = 'Bar'), self.tickers)
+        for field in panel.columns.get_level_values(0).unique():
+            df[field] = self.to_bars(panel[field])
+
+        super().__init__(df, cache = None, tensors = None, capacity = capacity, dtype = dtype)
+
+    def _matrix(self, capacity:int, dtype:type) -> FuzzyMatrix:
+        """
+        Allocates the storage of the membership values or of the consequents
+
+        Arguments:
+            capacity: int
+                the number of columns allocated upfront
+
+            dtype: type
+                the dtype of the matrix
+
+        Returns:
+            matrix: FuzzyMatrix
+                the empty (bars x tickers x capacity) matrix
+        """
+        return FuzzyMatrix(self.df.index, capacity = capacity, dtype = dtype, tickers = self.tickers)
+
+    def to_bars(self, frame:pd.DataFrame) -> np.ndarray:
+        """
+        Stacks the traded dates of each ticker from the first row
+
+        Arguments:
+            frame: pd.DataFrame
+                the date-aligned (dates x tickers) values
+
+        Returns:
+            bars: np.ndarray
+                the bar-aligned (bars x tickers) values
+        """
+        tickers = np.broadcast_to(np.arange(len(self.tickers)), self.traded.shape)
+        bars = np.full((self.bars.max(initial = 0), len(self.tickers)), np.nan)
+        bars[self.rows[self.traded], tickers[self.traded]] = frame.to_numpy(dtype = np.float64)[self.traded]
+        return bars
+
+    def to_dates(self, frame:Union[pd.DataFrame, np.ndarray]) -> pd.DataFrame:
+        """
+        Places bar-aligned values back on the dates of the panel, e.g.
+        stock.to_dates(stock.df['z_sum'])
+
+        Arguments:
+            frame: Union[pd.DataFrame, np.ndarray]
+                the bar-aligned (bars x tickers) values
+
+        Returns:
+            dates: pd.DataFrame
+                the date-aligned (dates x tickers) values, missing where a ticker was not traded
+        """
+        tickers = np.broadcast_to(np.arange(len(self.tickers)), self.traded.shape)
+        dates = np.full(self.traded.shape, np.nan)
+        dates[self.traded] = np.asarray(frame, dtype = np.float64)[self.rows[self.traded], tickers[self.traded]]
+        return pd.DataFrame(dates, index = self.dates, columns = self.tickers)
+
+    # the intermediates of fuzzy_TA are computed by the ta library one series at a time;
+    # the following compute the same arithmetic on all tickers at once
+
+    def _normalized_OBV(self) -> pd.DataFrame:
+        """
+        Computes for the On Balance Volume normalized by its sum
+
+        Returns:
+            OBV: pd.DataFrame
+                the normalized On Balance Volume
+        """
+        def compute() -> pd.DataFrame:
+            close, volume = self.df['Close'], self.df['Volume']
+            OBV = volume.where(~(close < close.shift(1)), -volume).cumsum()
+
+            # each ticker is normalized by the sum over its own bars
+            volume_sum = [OBV[ticker].iloc[:bars].sum() for ticker, bars in zip(self.tickers, self.bars)]
+            return (OBV/volume_sum)*100
+
+        return self._node('OBV', (), compute)
+
+    def _RSI(self, column:str, window:int, fillna:bool = False) -> pd.DataFrame:
+        """
+        Computes for the relative strength index of a column, following ta.momentum.RSIIndicator
+
+        Arguments:
+            column: str
+                the column of the stock data, e.g. 'Close' or 'OBV'
+
+            window: int
+                window or number of elements to be included in the calculation
+
+            fillna: bool
+                if True, fill NaN values
+
+        Returns:
+            rsi: pd.DataFrame
+                the relative strength index
+        """
+        def compute() -> pd.DataFrame:
+            diff = self.df[column].diff(1)
+            up_direction = diff.where(diff > 0, 0.0)
+            down_direction = -diff.where(diff < 0, 0.0)
+            min_periods = 0 if fillna else window
+            emaup = up_direction.ewm(alpha = 1 / window, min_periods = min_periods, adjust = False).mean()
+            emadn = down_direction.ewm(alpha = 1 / window, min_periods = min_periods, adjust = False).mean()
+            rsi = (100 - (100 / (1 + emaup / emadn))).where(emadn != 0, 100.)
+            return self._fillna(rsi, 50) if fillna else rsi
+
+        return self._node('RSI', (column, window, fillna), compute)
+
+    def _WilliamsR(self, window:int, fillna:bool = False) -> pd.DataFrame:
+        """
+        Computes for the Williams %R, following ta.momentum.WilliamsRIndicator
+
+        Arguments:
+            window: int
+                lookback period of the highest high and lowest low
+
+            fillna: bool
+                if True, fill NaN values
+
+        Returns:
+            wr: pd.DataFrame
+                the Williams %R
+        """
+        def compute() -> pd.DataFrame:
+            min_periods = 0 if fillna else window
+            highest_high = self.df['High'].rolling(window, min_periods = min_periods).max()
+            lowest_low = self.df['Low'].rolling(window, min_periods = min_periods).min()
+            wr = -100 * (highest_high - self.df['Close']) / (highest_high - lowest_low)
+            return self._fillna(wr, -50) if fillna else wr
+
+        return self._node('WilliamsR', (window, fillna), compute)
+
+    def _Ultimate(self, window1:int, window2:int, window3:int, weight1:float, weight2:float, weight3:float, fillna:bool = False) -> pd.DataFrame:
+        """
+        Computes for the Ultimate oscillator, following ta.momentum.UltimateOscillator
+
+        Arguments:
+            window1, window2, window3: int
+                the short, medium, and long periods
+
+            weight1, weight2, weight3: float
+                the weights of the short, medium, and long averages
+
+            fillna: bool
+                if True, fill NaN values
+
+        Returns:
+            uo: pd.DataFrame
+                the Ultimate oscillator
+        """
+        def compute() -> pd.DataFrame:
+            high, low, close = self.df['High'], self.df['Low'], self.df['Close']
+            close_shift = close.shift(1)
+
+            # the maximum skips missing values while the minimum does not, as in ta
+            true_range = np.fmax(np.fmax(high - low, (high - close_shift).abs()), (low - close_shift).abs())
+            buying_pressure = close - np.minimum(low, close_shift)
+
+            averages = list()
+            for window in (window1, window2, window3):
+                min_periods = 0 if fillna else window
+                averages.append(
+                    buying_pressure.rolling(window, min_periods = min_periods).sum()
+                    / true_range.rolling(window, min_periods = min_periods).sum()
+                )
+
+            uo = 100.0 * ((weight1 * averages[0]) + (weight2 * averages[1]) + (weight3 * averages[2])) / (weight1 + weight2 + weight3)
+            return self._fillna(uo, 50) if fillna else uo
+
+        return self._node('Ultimate', (window1, window2, window3, weight1, weight2, weight3, fillna), compute)
+
+    def _TSI(self, window_slow:int, window_fast:int, fillna:bool = False) -> pd.DataFrame:
+        """
+        Computes for the True Strength Index of the closing price, following ta.momentum.TSIIndicator
+
+        Arguments:
+            window_slow: int
+                the span of the first smoothing
+
+            window_fast: int
+                the span of the second smoothing
+
+            fillna: bool
+                if True, fill NaN values
+
+        Returns:
+            tsi: pd.DataFrame
+                the True Strength Index
+        """
+        def compute() -> pd.DataFrame:
+            diff_close = self.df['Close'] - self.df['Close'].shift(1)
+            min_periods_r = 0 if fillna else window_slow
+            min_periods_s = 0 if fillna else window_fast
+
+            def smooth(frame:pd.DataFrame) -> pd.DataFrame:
+                return (
+                    frame.ewm(span = window_slow, min_periods = min_periods_r, adjust = False).mean()
+                    .ewm(span = window_fast, min_periods = min_periods_s, adjust = False).mean()
+                )
+
+            tsi = smooth(diff_close) / smooth(diff_close.abs())
+            tsi *= 100
+            return self._fillna(tsi, 0) if fillna else tsi
+
+        return self._node('TSI', (window_slow, window_fast, fillna), compute)
+
+    def _CMF(self, window:int, fillna:bool = False) -> pd.DataFrame:
+        """
+        Computes for the Chaikin Money Flow, following ta.volume.ChaikinMoneyFlowIndicator
+
+        Arguments:
+            window: int
+                window or number of elements to be included in the calculation
+
+            fillna: bool
+                if True, fill NaN values
+
+        Returns:
+            cmf: pd.DataFrame
+                the Chaikin Money Flow
+        """
+        def compute() -> pd.DataFrame:
+            high, low, close, volume = self.df['High'], self.df['Low'], self.df['Close'], self.df['Volume']
+            mfv = ((close - low) - (high - close)) / (high - low)
+            mfv = mfv.fillna(0.0)
+            mfv *= volume
+            min_periods = 0 if fillna else window
+            cmf = mfv.rolling(window, min_periods = min_periods).sum() / volume.rolling(window, min_periods = min_periods).sum()
+            return self._fillna(cmf, 0) if fillna else cmf
+
+        return self._node('CMF', (window, fillna), compute)
+
+    def _MFI(self, window:int, fillna:bool = False) -> pd.DataFrame:
+        """
+        Computes for the Money Flow Index, following ta.volume.MFIIndicator
+
+        Arguments:
+            window: int
+                window or number of elements to be included in the calculation
+
+            fillna: bool
+                if True, fill NaN values
+
+        Returns:
+            mfi: pd.DataFrame
+                the Money Flow Index
+        """
+        def compute() -> pd.DataFrame:
+            typical_price = (self.df['High'] + self.df['Low'] + self.df['Close']) / 3.0
+            up_down = np.where(
+                typical_price > typical_price.shift(1),
+                1,
+                np.where(typical_price < typical_price.shift(1), -1, 0),
+            )
+            mfr = typical_price * self.df['Volume'] * up_down
+
+            # the positive and the negative money flow of the window
+            positive = lambda x: np.sum(np.where(x >= 0.0, x, 0.0), axis = -1)
+            negative = lambda x: np.sum(np.where(x < 0.0, x, 0.0), axis = -1)
+            if fillna:
+                n_positive_mf = mfr.rolling(window, min_periods = 0).apply(positive, raw = True)
+                n_negative_mf = abs(mfr.rolling(window, min_periods = 0).apply(negative, raw = True))
+            else:
+                n_positive_mf = _rolling_windows(mfr, window, positive)
+                n_negative_mf = abs(_rolling_windows(mfr, window, negative))
+
+            mfi = 100 - (100 / (1 + n_positive_mf / n_negative_mf))
+            return self._fillna(mfi, 50) if fillna else mfi
+
+        return self._node('MFI', (window, fillna), compute)
+
+    def _BB_pband(self, window:int, window_dev:int, fillna:bool = False) -> pd.DataFrame:
+        """
+        Computes for the Bollinger percentage band, following ta.volatility.BollingerBands
+
+        Arguments:
+            window: int
+                window or number of elements to be included in the calculation
+
+            window_dev: int
+                n factor standard deviation
+
+            fillna: bool
+                if True, fill NaN values
+
+        Returns:
+            pband: pd.DataFrame
+                the Bollinger percentage band
+        """
+        def compute() -> pd.DataFrame:
+            close = self.df['Close']
+            min_periods = 0 if fillna else window
+            mavg = close.rolling(window, min_periods = min_periods).mean()
+            mstd = close.rolling(window, min_periods = min_periods).std(ddof = 0)
+            hband = mavg + window_dev * mstd
+            lband = mavg - window_dev * mstd
+            pband = (close - lband) / (hband - lband).where(hband != lband, np.nan)
+            return self._fillna(pband, 0) if fillna else pband
+
+        return self._node('BB_pband', (window, window_dev, fillna), compute)
+
+    def _CCI(self, window:int, constant:float, fillna:bool = False) -> pd.DataFrame:
+        """
+        Computes for the Commodity Channel Index, following ta.trend.CCIIndicator
+
+        Arguments:
+            window: int
+                window or number of elements to be included in the calculation
+
+            constant: float
+                the scaling constant of the mean deviation
+
+            fillna: bool
+                if True, fill NaN values
+
+        Returns:
+            cci: pd.DataFrame
+                the Commodity Channel Index
+        """
+        def compute() -> pd.DataFrame:
+            typical_price = (self.df['High'] + self.df['Low'] + self.df['Close']) / 3.0
+            min_periods = 0 if fillna else window
+
+            # the mean absolute deviation of the window
+            mad = lambda x: np.mean(np.abs(x - np.mean(x, axis = -1, keepdims = True)), axis = -1)
+            if fillna:
+                deviation = typical_price.rolling(window, min_periods = 0).apply(mad, raw = True)
+            else:
+                deviation = _rolling_windows(typical_price, window, mad)
+
+            cci = (typical_price - typical_price.rolling(window, min_periods = min_periods).mean()) / (constant * deviation)
+            return self._fillna(cci, 0) if fillna else cci
+
+        return self._node('CCI', (window, constant, fillna), compute)
+
+    def _PSAR(self, step:float, max_step:float, fillna:bool = False) -> pd.DataFrame:
+        """
+        Computes for the Parabolic Stop and Reverse, following ta.trend.PSARIndicator;
+        the recursion runs bar by bar, with every ticker updated at once
+
+        Arguments:
+            step: float
+                the acceleration factor step
+
+            max_step: float
+                the maximum acceleration factor
+
+            fillna: bool
+                if True, fill NaN values
+
+        Returns:
+            psar: pd.DataFrame
+                the Parabolic SAR
+        """
+        def compute() -> pd.DataFrame:
+            high = self.df['High'].to_numpy(dtype = np.float64)
+            low = self.df['Low'].to_numpy(dtype = np.float64)
+            psar = self.df['Close'].to_numpy(dtype = np.float64, copy = True)
+
+            up_trend = np.ones(len(self.tickers), dtype = bool)
+            acceleration_factor = np.full(len(self.tickers), step)
+            up_trend_high = high[0].copy() if len(high) > 0 else None
+            down_trend_low = low[0].copy() if len(low) > 0 else None
+
+            for i in range(2, len(psar)):
+                max_high = high[i]
+                min_low = low[i]
+
+                psar[i] = np.where(
+                    up_trend,
+                    psar[i - 1] + (acceleration_factor * (up_trend_high - psar[i - 1])),
+                    psar[i - 1] - (acceleration_factor * (psar[i - 1] - down_trend_low)),
+                )
+
+                # the tickers whose trend reverses, and those whose trend extends
+                reversal_up = up_trend & (min_low < psar[i])
+                reversal_down = ~up_trend & (max_high > psar[i])
+                reversal = reversal_up | reversal_down
+                new_high = up_trend & ~reversal & (max_high > up_trend_high)
+                new_low = ~up_trend & ~reversal & (min_low < down_trend_low)
+
+                psar[i] = np.where(reversal_up, up_trend_high, np.where(reversal_down, down_trend_low, psar[i]))
+                up_trend_high = np.where(reversal_down | new_high, max_high, up_trend_high)
+                down_trend_low = np.where(reversal_up | new_low, min_low, down_trend_low)
+                acceleration_factor = np.where(
+                    reversal,
+                    step,
+                    np.where(new_high | new_low, np.minimum(acceleration_factor + step, max_step), acceleration_factor),
+                )
+
+                # the SAR does not go past the extremes of the previous two bars
+                up = up_trend & ~reversal
+                down = ~up_trend & ~reversal
+                psar[i] = np.where(
+                    up & (low[i - 2] < psar[i]), low[i - 2],
+                    np.where(up & (low[i - 1] < psar[i]), low[i - 1], psar[i])
+                )
+                psar[i] = np.where(
+                    down & (high[i - 2] > psar[i]), high[i - 2],
+                    np.where(down & (high[i - 1] > psar[i]), high[i - 1], psar[i])
+                )
+
+                up_trend = up_trend != reversal
+
+            psar = pd.DataFrame(psar, index = self.df.index, columns = self.tickers)
+            return self._fillna(psar, -1) if fillna else psar
+
+        return self._node('PSAR', (step, max_step, fillna), compute)
@@ -0,0 +1,744 @@
+import inspect
+import math
+from collections import deque
+from typing import Union
+import numpy as np
+import pandas as pd
+from Genome import Genome
+from fuzzy_ta import fuzzy_TA
+
+# The online states below reproduce the arithmetic of the pandas and ta functions
+# used by fuzzy_TA step by step, so a value produced from the state of the previous
+# bars equals the value fuzzy_TA computes over the whole history. As in pandas,
+# infinite values enter the windows and the exponentially weighted means as NaN.
+
+def _observed(value:float) -> np.float64:
+    # pandas converts infinite values to NaN before rolling and ewm
+    value = np.float64(value)
+    return value if np.isfinite(value) else np.float64(np.nan)
+
+class EWMState():
+    """
+    This class provides the online state of pd.Series.ewm(...).mean()
+    with ignore_na = False
+    """
+
+    def __init__(self, com:float, min_periods:int = 0, adjust:bool = False) -> None:
+        """
+        This function initializes the state
+
+        Arguments:
+            com:float
+                the center of mass of the exponentially weighted mean
+
+            min_periods:int
+                the minimum number of observations before a value is produced
+
+            adjust:bool
+                the adjust argument of pd.Series.ewm
+
+        Returns:
+            None
+        """
+        alpha = 1. / (1. + com)
+        self.old_wt_factor = 1. - alpha
+        self.new_wt = 1. if adjust else alpha
+        self.adjust = adjust
+        self.min_periods = max(min_periods, 1)
+        self.weighted = np.float64(np.nan)
+        self.old_wt = 1.
+        self.nobs = 0
+
+    @classmethod
+    def span(cls, span:float, min_periods:int = 0, adjust:bool = False) -> "EWMState":
+        return cls(com = (span - 1) / 2, min_periods = min_periods, adjust = adjust)
+
+    @classmethod
+    def alpha(cls, alpha:float, min_periods:int = 0, adjust:bool = False) -> "EWMState":
+        return cls(com = (1 - alpha) / alpha, min_periods = min_periods, adjust = adjust)
+
+    def update(self, value:float) -> np.float64:
+        value = _observed(value)
+        is_observation = value == value
+        self.nobs += is_observation
+
+        if self.weighted == self.weighted:
+            # the weight of the past decays on every bar, including missing ones
+            self.old_wt *= self.old_wt_factor
+            if is_observation:
+                # avoid numerical errors on constant series, as pandas does
+                if self.weighted != value:
+                    self.weighted = (self.old_wt * self.weighted) + (self.new_wt * value)
+                    self.weighted /= (self.old_wt + self.new_wt)
+                self.old_wt = self.old_wt + self.new_wt if self.adjust else 1.
+        elif is_observation:
+            self.weighted = value
+
+        return self.weighted if self.nobs >= self.min_periods else np.float64(np.nan)
+
+class RollingMeanState():
+    """
+    This class provides the online state of pd.Series.rolling(window).mean();
+    the window sum is Kahan compensated as in pandas
+    """
+
+    def __init__(self, window:int, min_periods:int = None) -> None:
+        self.window = window
+        self.min_periods = window if min_periods is None else min_periods
+        self.values = deque(maxlen = window)
+        self._reset()
+
+    def _reset(self) -> None:
+        self.nobs = 0
+        self.sum_x = 0.
+        self.neg_ct = 0
+        self.compensation_add = 0.
+        self.compensation_remove = 0.
+        self.num_consecutive_same_value = 0
+        self.prev_value = np.float64(np.nan)
+
+    def _add(self, value:np.float64) -> None:
+        if value == value:
+            self.nobs += 1
+            y = value - self.compensation_add
+            t = self.sum_x + y
+            self.compensation_add = t - self.sum_x - y
+            self.sum_x = t
+            if math.copysign(1., value) < 0:
+                self.neg_ct += 1
+
+            # count repeated values so a constant window yields the value itself
+            if value == self.prev_value:
+                self.num_consecutive_same_value += 1
+            else:
+                self.num_consecutive_same_value = 1
+            self.prev_value = value
+
+    def _remove(self, value:np.float64) -> None:
+        if value == value:
+            self.nobs -= 1
+            y = -value - self.compensation_remove
+            t = self.sum_x + y
+            self.compensation_remove = t - self.sum_x - y
+            self.sum_x = t
+            if math.copysign(1., value) < 0:
+                self.neg_ct -= 1
+
+    def update(self, value:float) -> np.float64:
+        value = _observed(value)
+
+        # a window of one is set up again on every bar, as in pandas
+        if self.window == 1:
+            self._reset()
+            self.prev_value = value
+            self.num_consecutive_same_value = 0
+        elif len(self.values) == self.window:
+            self._remove(self.values[0])
+        elif len(self.values) == 0:
+            self.prev_value = value
+        self.values.append(value)
+        self._add(value)
+
+        if self.nobs >= self.min_periods and self.nobs > 0:
+            result = self.sum_x / self.nobs
+            if self.num_consecutive_same_value >= self.nobs:
+                result = self.prev_value
+            elif self.neg_ct == 0 and result < 0:
+                result = np.float64(0.)
+            elif self.neg_ct == self.nobs and result > 0:
+                result = np.float64(0.)
+            return result
+        return np.float64(np.nan)
+
+class RollingStdState():
+    """
+    This class provides the online state of pd.Series.rolling(window).std(ddof);
+    the variance is updated with Welford's method as in pandas
+    """
+
+    def __init__(self, window:int, min_periods:int = None, ddof:int = 1) -> None:
+        self.window = window
+        self.min_periods = window if min_periods is None else min_periods
+        self.ddof = ddof
+        self.values = deque(maxlen = window)
+        self._reset()
+
+    def _reset(self) -> None:
+        self.nobs = 0
+        self.mean_x = 0.
+        self.ssqdm_x = 0.
+        self.compensation_add = 0.
+        self.compensation_remove = 0.
+        self.num_consecutive_same_value = 0
+        self.prev_value = np.float64(np.nan)
+
+    def _add(self, value:np.float64) -> None:
+        if value != value:
+            return
+        self.nobs += 1
+        if value == self.prev_value:
+            self.num_consecutive_same_value += 1
+        else:
+            self.num_consecutive_same_value = 1
+        self.prev_value = value
+
+        prev_mean = self.mean_x - self.compensation_add
+        y = value - self.compensation_add
+        t = y - self.mean_x
+        self.compensation_add = t + self.mean_x - y
+        self.mean_x = self.mean_x + t / self.nobs
+        self.ssqdm_x = self.ssqdm_x + (value - prev_mean) * (value - self.mean_x)
+
+    def _remove(self, value:np.float64) -> None:
+        if value == value:
+            self.nobs -= 1
+            if self.nobs:
+                prev_mean = self.mean_x - self.compensation_remove
+                y = value - self.compensation_remove
+                t = y - self.mean_x
+                self.compensation_remove = t + self.mean_x - y
+                self.mean_x = self.mean_x - t / self.nobs
+                self.ssqdm_x = self.ssqdm_x - (value - prev_mean) * (value - self.mean_x)
+            else:
+                self.mean_x = 0.
+                self.ssqdm_x = 0.
+
+    def update(self, value:float) -> np.float64:
+        value = _observed(value)
+
+        # a window of one is set up again on every bar, as in pandas
+        if self.window == 1:
+            self._reset()
+            self.prev_value = value
+        elif len(self.values) == self.window:
+            self._remove(self.values[0])
+        elif len(self.values) == 0:
+            self.prev_value = value
+        self.values.append(value)
+        self._add(value)
+
+        if self.nobs >= self.min_periods and self.nobs > self.ddof:
+            if self.nobs == 1 or self.num_consecutive_same_value >= self.nobs:
+                variance = np.float64(0.)
+            else:
+                variance = np.float64(self.ssqdm_x / (self.nobs - self.ddof))
+            # negative variances from rounding are clipped to zero, as in pandas
+            return np.sqrt(variance) if variance >= 0 else np.float64(0.)
+        return np.float64(np.nan)
+
+class RollingExtremaState():
+    """
+    This class provides the online state of pd.Series.rolling(window).min() and .max();
+    monotonic queues keep the candidates for the extrema of the window
+    """
+
+    def __init__(self, window:int, min_periods:int = None) -> None:
+        self.window = window
+        self.min_periods = window if min_periods is None else min_periods
+        self.count = 0
+        self.observed = deque(maxlen = window)
+        self.min_queue = deque()
+        self.max_queue = deque()
+
+    def update(self, value:float) -> (np.float64, np.float64):
+        value = _observed(value)
+        i = self.count
+        self.count += 1
+
+        # drop the candidates that left the window
+        for queue in (self.min_queue, self.max_queue):
+            while queue and queue[0][0] <= i - self.window:
+                queue.popleft()
+
+        self.observed.append(value == value)
+        if value == value:
+            while self.min_queue and self.min_queue[-1][1] >= value:
+                self.min_queue.pop()
+            self.min_queue.append((i, value))
+            while self.max_queue and self.max_queue[-1][1] <= value:
+                self.max_queue.pop()
+            self.max_queue.append((i, value))
+
+        nobs = sum(self.observed)
+        if nobs >= self.min_periods and nobs > 0:
+            return self.min_queue[0][1], self.max_queue[0][1]
+        return np.float64(np.nan), np.float64(np.nan)
+
+class RollingMADState():
+    """
+    This class provides the online state of the rolling mean absolute deviation
+    computed by ta.trend.CCIIndicator; the deviation of each window is evaluated
+    on the window itself, so this costs O(window) per bar
+    """
+
+    def __init__(self, window:int, min_periods:int = None) -> None:
+        self.window = window
+        self.min_periods = window if min_periods is None else min_periods
+        self.values = deque(maxlen = window)
+
+    def update(self, value:float) -> np.float64:
+        self.values.append(_observed(value))
+        x = np.fromiter(self.values, dtype = np.float64, count = len(self.values))
+        if np.count_nonzero(x == x) >= max(self.min_periods, 1):
+            return np.mean(np.abs(x - np.mean(x)))
+        return np.float64(np.nan)
+
+class RSIState():
+    """
+    This class provides the online state of ta.momentum.RSIIndicator;
+    the gains and losses are Wilder smoothed
+    """
+
+    def __init__(self, window:int) -> None:
+        self.prev_close = np.float64(np.nan)
+        self.emaup = EWMState.alpha(1 / window, min_periods = window)
+        self.emadn = EWMState.alpha(1 / window, min_periods = window)
+
+    def update(self, close:float) -> np.float64:
+        diff = np.float64(close) - self.prev_close
+        self.prev_close = np.float64(close)
+
+        # the first difference is missing and counts as neither a gain nor a loss
+        up = diff if diff > 0 else np.float64(0.)
+        down = -(diff if diff < 0 else np.float64(0.))
+        emaup = self.emaup.update(up)
+        emadn = self.emadn.update(down)
+        if emadn == 0:
+            return np.float64(100.)
+        return 100 - (100 / (1 + (emaup / emadn)))
+
+class StochRSIState():
+    """
+    This class provides the online state of ta.momentum.StochRSIIndicator
+    """
+
+    def __init__(self, window:int, smooth1:int, smooth2:int) -> None:
+        self.rsi = RSIState(window)
+        self.extrema = RollingExtremaState(window)
+        self.k = RollingMeanState(smooth1)
+        self.d = RollingMeanState(smooth2)
+
+    def update(self, close:float) -> (np.float64, np.float64):
+        rsi = self.rsi.update(close)
+        lowest_low_rsi, highest_high_rsi = self.extrema.update(rsi)
+        stochrsi = (rsi - lowest_low_rsi) / (highest_high_rsi - lowest_low_rsi)
+        stochrsi_k = self.k.update(stochrsi)
+        return stochrsi_k, self.d.update(stochrsi_k)
+
+class WilliamsRState():
+    """
+    This class provides the online state of ta.momentum.WilliamsRIndicator
+    """
+
+    def __init__(self, lbp:int) -> None:
+        self.high = RollingExtremaState(lbp)
+        self.low = RollingExtremaState(lbp)
+
+    def update(self, high:float, low:float, close:float) -> np.float64:
+        _, highest_high = self.high.update(high)
+        lowest_low, _ = self.low.update(low)
+        return -100 * (highest_high - np.float64(close)) / (highest_high - lowest_low)
+
+class TSIState():
+    """
+    This class provides the online state of ta.momentum.TSIIndicator
+    """
+
+    def __init__(self, window_slow:int, window_fast:int) -> None:
+        self.prev_close = np.float64(np.nan)
+        self.smoothed = [EWMState.span(window_slow, window_slow), EWMState.span(window_fast, window_fast)]
+        self.smoothed_abs = [EWMState.span(window_slow, window_slow), EWMState.span(window_fast, window_fast)]
+
+    def update(self, close:float) -> np.float64:
+        diff_close = np.float64(close) - self.prev_close
+        self.prev_close = np.float64(close)
+        smoothed = self.smoothed[1].update(self.smoothed[0].update(diff_close))
+        smoothed_abs = self.smoothed_abs[1].update(self.smoothed_abs[0].update(abs(diff_close)))
+        return (smoothed / smoothed_abs) * 100
+
+class MACDState():
+    """
+    This class provides the online state of ta.trend.MACD
+    """
+
+    def __init__(self, window_fast:int, window_slow:int, window_sign:int) -> None:
+        self.emafast = EWMState.span(window_fast, window_fast)
+        self.emaslow = EWMState.span(window_slow, window_slow)
+        self.signal = EWMState.span(window_sign, window_sign)
+
+    def update(self, close:float) -> (np.float64, np.float64, np.float64):
+        macd = self.emafast.update(close) - self.emaslow.update(close)
+        macd_signal = self.signal.update(macd)
+        return macd, macd - macd_signal, macd_signal
+
+class STCState():
+    """
+    This class provides the online state of ta.trend.STCIndicator
+    """
+
+    def __init__(self, window_slow:int, window_fast:int, cycle:int, smooth1:int, smooth2:int) -> None:
+        self.emafast = EWMState.span(window_fast, window_fast)
+        self.emaslow = EWMState.span(window_slow, window_slow)
+        self.macd_extrema = RollingExtremaState(cycle)
+        self.stoch_d = EWMState.span(smooth1, smooth1)
+        self.stoch_d_extrema = RollingExtremaState(cycle)
+        self.stc = EWMState.span(smooth2, smooth2)
+
+    def update(self, close:float) -> np.float64:
+        macd = self.emafast.update(close) - self.emaslow.update(close)
+        macdmin, macdmax = self.macd_extrema.update(macd)
+        stoch_k = 100 * (macd - macdmin) / (macdmax - macdmin)
+        stoch_d = self.stoch_d.update(stoch_k)
+        stoch_d_min, stoch_d_max = self.stoch_d_extrema.update(stoch_d)
+        stoch_kd = 100 * (stoch_d - stoch_d_min) / (stoch_d_max - stoch_d_min)
+        return self.stc.update(stoch_kd)
+
+class BollingerPbandState():
+    """
+    This class provides the online state of ta.volatility.bollinger_pband
+    """
+
+    def __init__(self, window:int, window_dev:int) -> None:
+        self.window_dev = window_dev
+        self.mavg = RollingMeanState(window)
+        self.mstd = RollingStdState(window, ddof = 0)
+
+    def update(self, close:float) -> np.float64:
+        mavg = self.mavg.update(close)
+        mstd = self.mstd.update(close)
+        hband = mavg + self.window_dev * mstd
+        lband = mavg - self.window_dev * mstd
+        width = hband - lband if hband != lband else np.float64(np.nan)
+        return (np.float64(close) - lband) / width
+
+class CCIState():
+    """
+    This class provides the online state of ta.trend.CCIIndicator
+    """
+
+    def __init__(self, window:int, constant:float) -> None:
+        self.constant = constant
+        self.mean = RollingMeanState(window)
+        self.mad = RollingMADState(window)
+
+    def update(self, high:float, low:float, close:float) -> np.float64:
+        typical_price = (np.float64(high) + np.float64(low) + np.float64(close)) / 3.0
+        return (typical_price - self.mean.update(typical_price)) / (self.constant * self.mad.update(typical_price))
+
+class PSARState():
+    """
+    This class provides the state machine of ta.trend.PSARIndicator
+    """
+
+    def __init__(self, step:float, max_step:float) -> None:
+        self.step = step
+        self.max_step = max_step
+        self.count = 0
+        self.up_trend = True
+        self.acceleration_factor = step
+        self.up_trend_high = None
+        self.down_trend_low = None
+        self.psar = None
+        self.highs = deque(maxlen = 2)
+        self.lows = deque(maxlen = 2)
+
+    def update(self, high:float, low:float, close:float) -> np.float64:
+        high, low, close = np.float64(high), np.float64(low), np.float64(close)
+        if self.count == 0:
+            self.up_trend_high = high
+            self.down_trend_low = low
+
+        # the first two values of the PSAR are the closing prices
+        if self.count < 2:
+            psar = close
+        else:
+            reversal = False
+            if self.up_trend:
+                psar = self.psar + (self.acceleration_factor * (self.up_trend_high - self.psar))
+                if low < psar:
+                    reversal = True
+                    psar = self.up_trend_high
+                    self.down_trend_low = low
+                    self.acceleration_factor = self.step
+                else:
+                    if high > self.up_trend_high:
+                        self.up_trend_high = high
+                        self.acceleration_factor = min(self.acceleration_factor + self.step, self.max_step)
+                    low1, low2 = self.lows[1], self.lows[0]
+                    if low2 < psar:
+                        psar = low2
+                    elif low1 < psar:
+                        psar = low1
+            else:
+                psar = self.psar - (self.acceleration_factor * (self.psar - self.down_trend_low))
+                if high > psar:
+                    reversal = True
+                    psar = self.down_trend_low
+                    self.up_trend_high = high
+                    self.acceleration_factor = self.step
+                else:
+                    if low < self.down_trend_low:
+                        self.down_trend_low = low
+                        self.acceleration_factor = min(self.acceleration_factor + self.step, self.max_step)
+                    high1, high2 = self.highs[1], self.highs[0]
+                    if high2 > psar:
+                        psar = high2
+                    elif high1 > psar:
+                        psar = high1
+            self.up_trend = self.up_trend != reversal
+
+        self.count += 1
+        self.psar = psar
+        self.highs.append(high)
+        self.lows.append(low)
+        return psar
+
+class FisherState():
+    """
+    This class provides the online state of fuzzy_TA._fisher
+    """
+
+    def __init__(self, window:int, adjust:bool) -> None:
+        self.extrema = RollingExtremaState(window)
+        self.smooth = EWMState.span(5, adjust = adjust)
+        self.fisher = EWMState.span(3, adjust = adjust)
+
+    def update(self, high:float, low:float) -> np.float64:
+        med = (np.float64(high) + np.float64(low)) / 2
+        ndaylow, ndayhigh = self.extrema.update(med)
+        raw = (2 * ((med - ndaylow) / (ndayhigh - ndaylow))) - 1
+        smooth = self.smooth.update(raw)
+        _smooth = smooth if smooth == smooth else np.float64(0.)
+        return self.fisher.update(np.log((1 + _smooth) / (1 - _smooth)))
+
+def _MACD_states(window_fast, window_slow, window_sign, **kwargs) -> dict:
+    key = (window_fast, window_slow, window_sign)
+    return {("MACD_line", key): (MACDState(*key), lambda state, bar: state.update(bar['Close']), 0),
+            ("MACD_diff", key): (("MACD_line", key), 1),
+            ("MACD_signal", key): (("MACD_line", key), 2)}
+
+def _StochRSI_states(name, window, smooth1, smooth2, fillna, **kwargs) -> dict:
+    key = (window, smooth1, smooth2, fillna)
+    states = {("StochRSI_d", key): (StochRSIState(window, smooth1, smooth2), lambda state, bar: state.update(bar['Close']), 1)}
+    if name == "StochRSI_KxD":
+        states[("StochRSI_k", key)] = (("StochRSI_d", key), 0)
+    return states
+
+# the fuzzy_TA methods supported in streaming mode; each maps the arguments of the method
+# to the raw indicators it looks up, keyed as in fuzzy_TA._cached, together with the online
+# state of the indicator, the function that feeds a bar to the state, and the position of the
+# indicator in the output of the state. An indicator sharing the state of another one refers
+# to it by key and position instead
+STREAM_INDICATORS = {
+    "RSI": lambda window, fillna, **kwargs: {
+        ("RSI", (window, fillna)): (RSIState(window), lambda state, bar: state.update(bar['Close']), None)},
+    "StochRSI": lambda **kwargs: _StochRSI_states("StochRSI", **kwargs),
+    "StochRSI_KxD": lambda **kwargs: _StochRSI_states("StochRSI_KxD", **kwargs),
+    "WilliamsR": lambda window, fillna, **kwargs: {
+        ("WilliamsR", (window, fillna)): (WilliamsRState(window), lambda state, bar: state.update(bar['High'], bar['Low'], bar['Close']), None)},
+    "TSI": lambda **kwargs: {
+        # fuzzy_TA.TSI always computes the 25 and 13 day TSI
+        ("TSI", (25, 13, False)): (TSIState(25, 13), lambda state, bar: state.update(bar['Close']), None)},
+    "BB_pband": lambda window, window_dev, fillna, **kwargs: {
+        ("BB_pband", (window, window_dev, fillna)): (BollingerPbandState(window, window_dev), lambda state, bar: state.update(bar['Close']), None)},
+    "MACD": _MACD_states,
+    "CCI": lambda window, constant, fillna, **kwargs: {
+        ("CCI", (window, constant, fillna)): (CCIState(window, constant), lambda state, bar: state.update(bar['High'], bar['Low'], bar['Close']), None)},
+    "STC": lambda window_slow, window_fast, cycle, smooth1, smooth2, fillna, **kwargs: {
+        ("STC", (window_slow, window_fast, cycle, smooth1, smooth2, fillna)): (
+            STCState(window_slow, window_fast, cycle, smooth1, smooth2), lambda state, bar: state.update(bar['Close']), None)},
+    "PSAR": lambda step, max_step, fillna, **kwargs: {
+        ("PSAR", (step, max_step, fillna)): (PSARState(step, max_step), lambda state, bar: state.update(bar['High'], bar['Low'], bar['Close']), None)},
+    "Fisher_trans": lambda window, adjust, **kwargs: {
+        ("Fisher", (window, adjust)): (FisherState(window, adjust), lambda state, bar: state.update(bar['High'], bar['Low']), None)},
+}
+
+class StreamValues():
+    """
+    This class holds the latest values of the raw indicators of a stream; fuzzy_TA
+    looks the indicators up here the same way it looks them up in an IndicatorTensorStore
+    """
+
+    def __init__(self) -> None:
+        self.values = dict()
+
+    def lookup(self, name:str, params:tuple, index:pd.Index) -> Union[pd.Series, None]:
+        if (name, params) not in self.values:
+            return None
+        return pd.Series([self.values[(name, params)]], index = index, dtype = np.float64)
+
+class FuzzyStream():
+    """
+    This class provides the streaming mode of fuzzy_TA. The raw indicators are kept as
+    online states that are advanced by one bar at a time, so the memberships and the z_sum
+    of a new bar cost O(1) per indicator instead of a pass over the whole history.
+
+    The fuzzy rules are not duplicated here; on every bar, the methods of fuzzy_TA are
+    run on a one-row dataframe whose raw indicators are looked up from the online states,
+    so the rules of the stream are always those of the batch computation.
+    """
+
+    def __init__(self, z_rolling_window:int = None) -> None:
+        """
+        This function initializes the stream
+
+        Arguments:
+            z_rolling_window:int
+                if given, the window of the rolling mean of z_sum, as in get_fuzzy_stock_df
+
+        Returns:
+            None
+        """
+        self.rules = list()
+        self.states = dict()
+        self.values = StreamValues()
+        self.num_bars = 0
+        self.z_sum_rolling = RollingMeanState(z_rolling_window) if z_rolling_window is not None else None
+
+    @classmethod
+    def from_genome(cls, genome:Genome) -> "FuzzyStream":
+        """
+        This function creates the stream of the rule base that get_fuzzy_stock_df builds from a genome
+
+        Arguments:
+            genome:Genome
+                the genome whose rule base will be streamed
+
+        Returns:
+            stream:FuzzyStream
+                the stream of the genome
+        """
+        genome_dict = genome.genome_dict
+        stream = cls(z_rolling_window = genome_dict["z_rolling_window"].value)
+        stream.add(
+            "RSI",
+            window = genome_dict["RSI_window"].value,
+            p1 = genome_dict["RSI_p1"].value,
+            p2 = genome_dict["RSI_p2"].value,
+            p3 = genome_dict["RSI_p3"].value,
+            p4 = genome_dict["RSI_p4"].value,
+            lo_left_node = genome_dict["RSI_low_membership"].value[0],
+            lo_right_node = genome_dict["RSI_low_membership"].value[1],
+            md_left_node = genome_dict["RSI_middle_membership"].value[0],
+            md_middle_node = genome_dict["RSI_middle_membership"].value[1],
+            md_right_node = genome_dict["RSI_middle_membership"].value[2],
+            hi_left_node = genome_dict["RSI_high_membership"].value[0],
+            hi_right_node = genome_dict["RSI_high_membership"].value[1]
+        )
+        return stream
+
+    def add(self, method:str, **kwargs) -> None:
+        """
+        This function adds a fuzzy_TA rule to the stream; the rules are applied in the
+        order they are added, as the methods of fuzzy_TA would be called
+
+        Arguments:
+            method:str
+                the name of the fuzzy_TA method, e.g. "RSI"; see STREAM_INDICATORS
+
+            kwargs
+                the arguments of the fuzzy_TA method
+
+        Returns:
+            None
+        """
+        assert method in STREAM_INDICATORS, f"{method} is not supported in streaming mode"
+        assert self.num_bars == 0, "rules must be added before the first bar"
+
+        # resolve the arguments of the method, including its defaults
+        arguments = inspect.signature(getattr(fuzzy_TA, method)).bind(None, **kwargs)
+        arguments.apply_defaults()
+        arguments = dict(list(arguments.arguments.items())[1:])
+        assert not arguments.get("fillna", False), "fillna needs the future of the series and is not supported in streaming mode"
+
+        for key, state in STREAM_INDICATORS[method](**arguments).items():
+            if key not in self.states:
+                self.states[key] = state
+        self.rules.append((method, kwargs))
+
+    def update(self, bar:Union[pd.Series, dict], date = None) -> (dict, float):
+        """
+        This function advances the stream by one bar
+
+        Arguments:
+            bar:Union[pd.Series, dict]
+                the closing, opening, high, low, and volume of the new bar
+
+            date
+                the date of the bar; the name of the bar is used if it is a pd.Series
+
+        Returns:
+            u, z_sum:dict, float
+                the membership values of the bar keyed as the columns of fuzzy_TA.u,
+                and the inference value of the bar; if the stream has a z_rolling_window,
+                the rolling mean of the inference value is returned instead
+        """
+        self._advance(bar)
+        if date is None:
+            date = getattr(bar, "name", self.num_bars - 1)
+
+        # run the rule base of fuzzy_TA on the new bar
+        stock = fuzzy_TA(
+            pd.DataFrame({column: [bar[column]] for column in ("Close", "Open", "High", "Low", "Volume")}, index = [date]),
+            cache = None,
+            tensors = self.values)
+        for method, kwargs in self.rules:
+            getattr(stock, method)(**kwargs)
+        stock.z_total()
+
+        u = stock.u.to_frame().iloc[0].to_dict()
+        z_sum = stock.df['z_sum'].iloc[0]
+        if self.z_sum_rolling is not None:
+            z_sum = self.z_sum_rolling.update(z_sum)
+        return u, z_sum
+
+    def warm_up(self, df:pd.DataFrame) -> None:
+        """
+        This function advances the online states over the history of a stock
+        without evaluating the rules on every bar
+
+        Arguments:
+            df:pd.DataFrame
+                pandas dataframe containing the closing, opening, high, low, and volume of a stock
+
+        Returns:
+            None
+        """
+        for _, bar in df.iterrows():
+            self._advance(bar)
+
+        if self.z_sum_rolling is not None:
+            # the rolling mean of z_sum needs the inference values of the history;
+            # these are computed once in batch mode, which gives the same values
+            stock = fuzzy_TA(df.copy(), cache = None)
+            for method, kwargs in self.rules:
+                getattr(stock, method)(**kwargs)
+            stock.z_total()
+            for z_sum in stock.df['z_sum'].to_numpy():
+                self.z_sum_rolling.update(z_sum)
+
+    def _advance(self, bar:Union[pd.Series, dict]) -> None:
+        """
+        This function feeds a bar to the online states of the raw indicators
+
+        Arguments:
+            bar:Union[pd.Series, dict]
+                the closing, opening, high, low, and volume of the new bar
+
+        Returns:
+            None
+        """
+        with np.errstate(divide = 'ignore', invalid = 'ignore'):
+            outputs = dict()
+            for key, state in self.states.items():
+                if isinstance(state[0], tuple):
+                    continue
+                state, feed, position = state
+                outputs[key] = output = feed(state, bar)
+                self.values.values[key] = output if position is None else output[position]
+
+            # indicators sharing a state take their value from the output of that state
+            for key, state in self.states.items():
+                if isinstance(state[0], tuple):
+                    self.values.values[key] = outputs[state[0]][state[1]]
+        self.num_bars += 1
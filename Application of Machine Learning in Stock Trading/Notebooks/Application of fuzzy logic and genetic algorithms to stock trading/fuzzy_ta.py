@@ -1,25 +1,595 @@
 import pandas as pd
 import numpy as np
 import ta
-from fuzzy_membership_func import trimf, linearf
+from fuzzy_membership_func import trimf_array, linearf_array
+from indicator_cache import IndicatorCache, indicator_cache
+from fuzzy_matrix import FuzzyMatrix
+from typing import Union
 
 # build a class that will encapsulate a stock and perform fuzzy technical analysis on it
 class fuzzy_TA:
-    def __init__(self, df: pd.DataFrame) -> None:
+    def __init__(self, df: pd.DataFrame, cache: Union[IndicatorCache, None] = indicator_cache, tensors = None, capacity: int = 64, dtype: type = np.float64) -> None:
         """
         Arguments:
             df: pd.DataFrame
                 pandas dataframe containing the closing, opening, high, low, and volume of a stock
+
+            cache: Union[IndicatorCache, None]
+                the store where raw indicator series are looked up before they are computed;
+                by default this is the cache shared by all instances in the process.
+                if None, the indicators are always computed
+
+            tensors: IndicatorTensorStore
+                precomputed all-window indicator tensors of the stock; windowed indicators
+                found here are sliced from the tensors instead of being computed.
+                any object with the same lookup method works, e.g. the StreamValues of a FuzzyStream
+
+            capacity: int
+                the number of membership and consequent columns allocated upfront
+
+            dtype: type
+                the dtype of the membership and consequent matrices, np.float64 or np.float32
                 
         Returns:
             None
         """
         
         self.df = df
-        self.u = pd.DataFrame(index = self.df.index).astype(np.float64)
-        self.z = pd.DataFrame(index = self.df.index).astype(np.float64)
-        self.u_sum = pd.DataFrame(index = self.df.index).astype(np.float64)
-        self.z_sum = pd.DataFrame(index = self.df.index).astype(np.float64)
+        self.cache = cache
+        self.tensors = tensors
+        self.fingerprint = IndicatorCache.fingerprint(self.df) if self.cache is not None else None
+        self.u = self._matrix(capacity, dtype)
+        self.z = self._matrix(capacity, dtype)
+        self.u_sum = np.zeros(self.u.shape, dtype = dtype)
+        self.z_sum = np.zeros(self.z.shape, dtype = dtype)
+        self.graph = dict()
+
+    def _matrix(self, capacity: int, dtype: type) -> FuzzyMatrix:
+        """
+        Allocates the storage of the membership values or of the consequents
+        
+        Arguments:
+            capacity: int
+                the number of columns allocated upfront
+            
+            dtype: type
+                the dtype of the matrix
+        
+        Returns:
+            matrix: FuzzyMatrix
+                the empty matrix, with one row per row of the stock data
+        """
+        return FuzzyMatrix(self.df.index, capacity = capacity, dtype = dtype)
+
+    def _cached(self, name: str, params: tuple, compute: callable) -> pd.Series:
+        """
+        Looks up a raw indicator series in the precomputed tensors, then in the cache;
+        the series is computed and stored on a miss
+        
+        Arguments:
+            name: str
+                the name of the indicator
+            
+            params: tuple
+                the parameters of the indicator
+            
+            compute: callable
+                a function with no arguments that computes the indicator series
+        
+        Returns:
+            series: pd.Series
+                the raw indicator series
+        """
+        if self.tensors is not None and len(params) > 0:
+            series = self.tensors.lookup(name, params, self.df.index)
+            if series is not None:
+                return series
+
+        if self.cache is None:
+            return compute()
+        return self.cache.get_or_compute(self.fingerprint, name, params, compute)
+
+    def _node(self, name: str, params: tuple, compute: callable):
+        """
+        Evaluates a named intermediate result of this run at most once; the indicators
+        that depend on the same intermediate (an EMA, an RSI, the OBV, ...) share it
+        
+        Arguments:
+            name: str
+                the name of the intermediate
+            
+            params: tuple
+                the parameters of the intermediate
+            
+            compute: callable
+                a function with no arguments that computes the intermediate
+        
+        Returns:
+            node
+                the intermediate result
+        """
+        key = (name, params)
+        if key not in self.graph:
+            self.graph[key] = compute()
+        return self.graph[key]
+
+    @staticmethod
+    def _fillna(series: pd.Series, value: int = 0) -> pd.Series:
+        """
+        Fills the missing values of an indicator the way the ta library does when fillna is True
+        
+        Arguments:
+            series: pd.Series
+                the indicator series
+            
+            value: int
+                the value to fill gaps with; if -1 the gaps are filled backwards
+        
+        Returns:
+            series: pd.Series
+                the filled indicator series
+        """
+        series = series.replace([np.inf, -np.inf], np.nan)
+        if value == -1:
+            return series.ffill().bfill()
+        return series.ffill().fillna(value)
+
+    def _normalized_OBV(self) -> pd.Series:
+        """
+        Computes for the On Balance Volume normalized by its sum
+        
+        Returns:
+            OBV: pd.Series
+                the normalized On Balance Volume
+        """
+        def compute() -> pd.Series:
+            # compute for OBV
+            OBV = (
+                ta.volume.OnBalanceVolumeIndicator(
+                    close = self.df['Close'], 
+                    volume = self.df['Volume'], 
+                    fillna = False)
+                .on_balance_volume()
+            )
+
+            # normalize OBV
+            volume_sum = OBV.sum()
+            return (OBV/volume_sum)*100
+
+        return self._node('OBV', (), compute)
+
+    def _median_price(self) -> pd.Series:
+        """
+        Computes for the median of the high and low prices
+        
+        Returns:
+            med: pd.Series
+                the median price
+        """
+        return self._node('median_price', (), lambda: (self.df['High'] + self.df['Low']) / 2)
+
+    def _EMA(self, column: str, periods: int, fillna: bool = False) -> pd.Series:
+        """
+        Computes for the exponential moving average of a column as in the ta library
+        
+        Arguments:
+            column: str
+                the column of the stock data, e.g. 'Close'
+            
+            periods: int
+                the span of the moving average
+            
+            fillna: bool
+                if True, no minimum number of periods is required
+        
+        Returns:
+            ema: pd.Series
+                the exponential moving average
+        """
+        return self._node('EMA', (column, periods, fillna), lambda: (
+            self.df[column]
+            .ewm(span = periods, min_periods = 0 if fillna else periods, adjust = False)
+            .mean()
+        ))
+
+    def _RSI(self, column: str, window: int, fillna: bool = False) -> pd.Series:
+        """
+        Computes for the relative strength index of a column
+        
+        Arguments:
+            column: str
+                the column of the stock data, e.g. 'Close' or 'OBV'
+            
+            window: int
+                window or number of elements to be included in the calculation
+            
+            fillna: bool
+                if True, fill NaN values
+        
+        Returns:
+            rsi: pd.Series
+                the relative strength index
+        """
+        return self._node('RSI', (column, window, fillna), lambda: (
+            ta.momentum.RSIIndicator(
+                close = self.df[column],
+                window = window,
+                fillna = fillna)
+            .rsi()
+        ))
+
+    def _StochRSI(self, column: str, window: int, smooth1: int, smooth2: int, fillna: bool = False) -> (pd.Series, pd.Series):
+        """
+        Computes for the k and d lines of the stochastic RSI of a column from its shared RSI,
+        following ta.momentum.StochRSIIndicator
+        
+        Arguments:
+            column: str
+                the column of the stock data, e.g. 'Close' or 'OBV'
+            
+            window: int
+                window used in the computation of the RSI and of its stochastic
+            
+            smooth1: int
+                first smoothing constant, applied to the stochastic RSI to give k
+            
+            smooth2: int
+                second smoothing constant, applied to k to give d
+            
+            fillna: bool
+                if True, fill NaN values
+        
+        Returns:
+            k, d: pd.Series, pd.Series
+                the slow and fast stochastic RSI
+        """
+        def compute() -> (pd.Series, pd.Series):
+            rsi = self._RSI(column, window, fillna)
+            lowest_low_rsi = rsi.rolling(window).min()
+            stochrsi = (rsi - lowest_low_rsi) / (rsi.rolling(window).max() - lowest_low_rsi)
+            k = stochrsi.rolling(smooth1).mean()
+            d = k.rolling(smooth2).mean()
+            if fillna:
+                return self._fillna(k), self._fillna(d)
+            return k, d
+
+        return self._node('StochRSI', (column, window, smooth1, smooth2, fillna), compute)
+
+    def _MACD(self, window_fast: int, window_slow: int, window_sign: int) -> (pd.Series, pd.Series, pd.Series):
+        """
+        Computes for the MACD line, difference, and signal of the closing price from the
+        shared EMAs, following ta.trend.MACD
+        
+        Arguments:
+            window_fast: int
+                the span of the fast EMA
+            
+            window_slow: int
+                the span of the slow EMA
+            
+            window_sign: int
+                the span of the EMA of the MACD line
+        
+        Returns:
+            line, diff, signal: pd.Series, pd.Series, pd.Series
+                the MACD line, the MACD difference, and the MACD signal
+        """
+        def compute() -> (pd.Series, pd.Series, pd.Series):
+            line = self._EMA('Close', window_fast) - self._EMA('Close', window_slow)
+            signal = line.ewm(span = window_sign, min_periods = window_sign, adjust = False).mean()
+            return line, line - signal, signal
+
+        return self._node('MACD', (window_fast, window_slow, window_sign), compute)
+
+    def _STC(self, window_slow: int, window_fast: int, cycle: int, smooth1: int, smooth2: int, fillna: bool = False) -> pd.Series:
+        """
+        Computes for the Schaff Trend Cycle of the closing price from the shared EMAs,
+        following ta.trend.STCIndicator
+        
+        Arguments:
+            window_slow: int
+                the span of the slow EMA
+            
+            window_fast: int
+                the span of the fast EMA
+            
+            cycle: int
+                the window of the stochastics
+            
+            smooth1: int
+                the span of the EMA of the first stochastic
+            
+            smooth2: int
+                the span of the EMA of the second stochastic
+            
+            fillna: bool
+                if True, fill NaN values
+        
+        Returns:
+            stc: pd.Series
+                the Schaff Trend Cycle
+        """
+        def compute() -> pd.Series:
+            macd = self._EMA('Close', window_fast, fillna) - self._EMA('Close', window_slow, fillna)
+            macdmin = macd.rolling(window = cycle).min()
+            macdmax = macd.rolling(window = cycle).max()
+            stoch_k = 100 * (macd - macdmin) / (macdmax - macdmin)
+            stoch_d = stoch_k.ewm(span = smooth1, min_periods = 0 if fillna else smooth1, adjust = False).mean()
+            stoch_d_min = stoch_d.rolling(window = cycle).min()
+            stoch_d_max = stoch_d.rolling(window = cycle).max()
+            stoch_kd = 100 * (stoch_d - stoch_d_min) / (stoch_d_max - stoch_d_min)
+            stc = stoch_kd.ewm(span = smooth2, min_periods = 0 if fillna else smooth2, adjust = False).mean()
+            return self._fillna(stc) if fillna else stc
+
+        return self._node('STC', (window_slow, window_fast, cycle, smooth1, smooth2, fillna), compute)
+
+    def _fisher_raw(self, window: int = 14) -> pd.Series:
+        """
+        Computes for the median price scaled to [-1, 1] by its rolling minimum and maximum
+        
+        Arguments:
+            window: int
+                window used for the rolling minimum and maximum of the median price
+        
+        Returns:
+            raw: pd.Series
+                the scaled median price
+        """
+        def compute() -> pd.Series:
+            med = self._median_price()
+            ndaylow = med.rolling(window=window).min()
+            ndayhigh = med.rolling(window=window).max()
+            return (2 * ((med - ndaylow) / (ndayhigh - ndaylow))) - 1
+
+        return self._node('Fisher_raw', (window,), compute)
+
+    def _fisher(self, window: int = 14, adjust: bool = True) -> pd.Series:
+        """
+        Computes for the smoothed Fisher transform of the median price
+        
+        Arguments:
+            window: int
+                window used for the rolling minimum and maximum of the median price
+            
+            adjust: bool
+                passed to the exponentially weighted smoothing
+        
+        Returns:
+            fisher: pd.Series
+                the smoothed Fisher transform
+        """
+        def compute() -> pd.Series:
+            np.seterr(divide='ignore')
+
+            smooth = self._fisher_raw(window).ewm(span=5, adjust=adjust).mean()
+            _smooth = smooth.fillna(0)
+            
+            return (
+                (np.log((1 + _smooth) / (1 - _smooth)))
+                .ewm(span=3, adjust=adjust)
+                .mean()
+            )
+
+        return self._node('Fisher', (window, adjust), compute)
+
+    def _WilliamsR(self, window: int, fillna: bool = False) -> pd.Series:
+        """
+        Computes for the Williams %R of the stock
+        
+        Arguments:
+            window: int
+                lookback period of the highest high and lowest low
+            
+            fillna: bool
+                if True, fill NaN values
+        
+        Returns:
+            wr: pd.Series
+                the Williams %R
+        """
+        return self._node('WilliamsR', (window, fillna), lambda: (
+            ta.momentum.WilliamsRIndicator(
+                high = self.df['High'],
+                low = self.df['Low'],
+                close = self.df['Close'],
+                lbp = window,
+                fillna = fillna)
+            .williams_r()
+        ))
+
+    def _Ultimate(self, window1: int, window2: int, window3: int, weight1: float, weight2: float, weight3: float, fillna: bool = False) -> pd.Series:
+        """
+        Computes for the Ultimate oscillator of the stock
+        
+        Arguments:
+            window1, window2, window3: int
+                the short, medium, and long periods
+            
+            weight1, weight2, weight3: float
+                the weights of the short, medium, and long averages
+            
+            fillna: bool
+                if True, fill NaN values
+        
+        Returns:
+            uo: pd.Series
+                the Ultimate oscillator
+        """
+        return self._node('Ultimate', (window1, window2, window3, weight1, weight2, weight3, fillna), lambda: (
+            ta.momentum.ultimate_oscillator(
+                high = self.df['High'], 
+                low = self.df['Low'], 
+                close = self.df['Close'], 
+                window1 = window1, 
+                window2 = window2, 
+                window3 = window3, 
+                weight1 = weight1, 
+                weight2 = weight2, 
+                weight3 = weight3, 
+                fillna = fillna)
+        ))
+
+    def _TSI(self, window_slow: int, window_fast: int, fillna: bool = False) -> pd.Series:
+        """
+        Computes for the True Strength Index of the closing price
+        
+        Arguments:
+            window_slow: int
+                the span of the first smoothing
+            
+            window_fast: int
+                the span of the second smoothing
+            
+            fillna: bool
+                if True, fill NaN values
+        
+        Returns:
+            tsi: pd.Series
+                the True Strength Index
+        """
+        return self._node('TSI', (window_slow, window_fast, fillna), lambda: (
+            ta.momentum.tsi(
+                close = self.df['Close'],
+                window_slow = window_slow,
+                window_fast = window_fast,
+                fillna = fillna)
+        ))
+
+    def _CMF(self, window: int, fillna: bool = False) -> pd.Series:
+        """
+        Computes for the Chaikin Money Flow of the stock
+        
+        Arguments:
+            window: int
+                window or number of elements to be included in the calculation
+            
+            fillna: bool
+                if True, fill NaN values
+        
+        Returns:
+            cmf: pd.Series
+                the Chaikin Money Flow
+        """
+        return self._node('CMF', (window, fillna), lambda: (
+            ta.volume.chaikin_money_flow(
+                high = self.df['High'], 
+                low = self.df['Low'], 
+                close = self.df['Close'], 
+                volume = self.df['Volume'], 
+                window = window, 
+                fillna = fillna)
+        ))
+
+    def _MFI(self, window: int, fillna: bool = False) -> pd.Series:
+        """
+        Computes for the Money Flow Index of the stock
+        
+        Arguments:
+            window: int
+                window or number of elements to be included in the calculation
+            
+            fillna: bool
+                if True, fill NaN values
+        
+        Returns:
+            mfi: pd.Series
+                the Money Flow Index
+        """
+        return self._node('MFI', (window, fillna), lambda: (
+            ta.volume.MFIIndicator(
+                high = self.df['High'], 
+                low = self.df['Low'], 
+                close = self.df['Close'], 
+                volume = self.df['Volume'], 
+                window = window, 
+                fillna = fillna)
+            .money_flow_index()
+        ))
+
+    def _BB_pband(self, window: int, window_dev: int, fillna: bool = False) -> pd.Series:
+        """
+        Computes for the Bollinger percentage band of the closing price
+        
+        Arguments:
+            window: int
+                window or number of elements to be included in the calculation
+            
+            window_dev: int
+                n factor standard deviation
+            
+            fillna: bool
+                if True, fill NaN values
+        
+        Returns:
+            pband: pd.Series
+                the Bollinger percentage band
+        """
+        return self._node('BB_pband', (window, window_dev, fillna), lambda: (
+            ta.volatility.bollinger_pband(
+                close = self.df['Close'], 
+                window = window, 
+                window_dev = window_dev, 
+                fillna = fillna)
+        ))
+
+    def _CCI(self, window: int, constant: float, fillna: bool = False) -> pd.Series:
+        """
+        Computes for the Commodity Channel Index of the stock
+        
+        Arguments:
+            window: int
+                window or number of elements to be included in the calculation
+            
+            constant: float
+                the scaling constant of the mean deviation
+            
+            fillna: bool
+                if True, fill NaN values
+        
+        Returns:
+            cci: pd.Series
+                the Commodity Channel Index
+        """
+        return self._node('CCI', (window, constant, fillna), lambda: (
+            ta.trend.CCIIndicator(
+                high = self.df['High'],
+                low = self.df['Low'],
+                close = self.df['Close'],
+                window = window,
+                constant = constant,
+                fillna = fillna)
+            .cci()
+        ))
+
+    def _PSAR(self, step: float, max_step: float, fillna: bool = False) -> pd.Series:
+        """
+        Computes for the Parabolic Stop and Reverse of the stock
+        
+        Arguments:
+            step: float
+                the acceleration factor step
+            
+            max_step: float
+                the maximum acceleration factor
+            
+            fillna: bool
+                if True, fill NaN values
+        
+        Returns:
+            psar: pd.Series
+                the Parabolic SAR
+        """
+        return self._node('PSAR', (step, max_step, fillna), lambda: (
+            ta.trend.PSARIndicator(
+                high = self.df['High'],
+                low = self.df['Low'],
+                close = self.df['Close'],
+                step = step,
+                max_step = max_step,
+                fillna = fillna)
+            .psar()
+        ))
+
     # MOMENTUM INDICATORS
     
     def RSI(self, 
@@ -67,17 +637,12 @@ class fuzzy_TA:
         """
         
         # compute for the RSI of the stock
-        self.df[f'RSI{window}'] = (ta.momentum.RSIIndicator(
-            close = self.df['Close'],
-            window = window,
-            fillna = fillna)
-            .rsi()
-        )
+        self.df[f'RSI{window}'] = self._cached('RSI', (window, fillna), lambda: self._RSI('Close', window, fillna))
         
         # compute for the membership values of the RSI values
-        self.u[f'RSI{window}_lo'] = self.df[f'RSI{window}'].apply(lambda x: linearf(x, [lo_left_node, lo_right_node], positive_slope = False))
-        self.u[f'RSI{window}_md'] = self.df[f'RSI{window}'].apply(lambda x: trimf(x, [md_left_node, md_middle_node, md_right_node])) 
-        self.u[f'RSI{window}_hi'] = self.df[f'RSI{window}'].apply(lambda x: linearf(x, [hi_left_node, hi_right_node], positive_slope = True))
+        self.u[f'RSI{window}_lo'] = linearf_array(self.df[f'RSI{window}'], [lo_left_node, lo_right_node], positive_slope = False)
+        self.u[f'RSI{window}_md'] = trimf_array(self.df[f'RSI{window}'], [md_left_node, md_middle_node, md_right_node]) 
+        self.u[f'RSI{window}_hi'] = linearf_array(self.df[f'RSI{window}'], [hi_left_node, hi_right_node], positive_slope = True)
         
         # the following are the fuzzy rules for RSI
         # if RSI is low, then buy
@@ -85,10 +650,10 @@ class fuzzy_TA:
         
         # # if RSI is medium, then hold
         mask = (self.df[f'RSI{window}'] < 50)
-        self.z.loc[mask, f'RSI{window}_md'] = (p2 * ((self.u[f'RSI{window}_md'] * -25) + 75))
+        self.z.assign(f'RSI{window}_md', (p2 * ((self.u[f'RSI{window}_md'] * -25) + 75)), mask)
         
         mask = (self.df[f'RSI{window}'] > 50)
-        self.z.loc[mask, f'RSI{window}_md'] = (p3 * ((self.u[f'RSI{window}_md'] * 25) + 25))
+        self.z.assign(f'RSI{window}_md', (p3 * ((self.u[f'RSI{window}_md'] * 25) + 25)), mask)
 
         # if RSI is high then sell
         self.z[f'RSI{window}_hi'] = (p4 * ((self.u[f'RSI{window}_hi'] * -25) + 25))
@@ -139,20 +704,12 @@ class fuzzy_TA:
         """
         
         # calculate the stochasting RSI
-        self.df[f'StochRSI{window}'] = (
-            ta.momentum.StochRSIIndicator(
-                close = self.df['Close'],
-                window = window,
-                smooth1 = smooth1,
-                smooth2 = smooth2,
-                fillna = fillna)
-            .stochrsi_d()
-        )
+        self.df[f'StochRSI{window}'] = self._cached('StochRSI_d', (window, smooth1, smooth2, fillna), lambda: self._StochRSI('Close', window, smooth1, smooth2, fillna)[1])
 
         # calculate the membership values for low, medium and high RSI
-        self.u[f'StochRSI{window}_lo'] = self.df[f'StochRSI{window}'].apply(lambda x: linearf(x, [StochRSI_low_left_node, StochRSI_low_right_node], positive_slope = False))
-        self.u[f'StochRSI{window}_md'] = self.df[f'StochRSI{window}'].apply(lambda x: trimf(x, [StochRSI_mid_left_node, StochRSI_mid_middle_node, StochRSI_mid_right_node])) 
-        self.u[f'StochRSI{window}_hi'] = self.df[f'StochRSI{window}'].apply(lambda x: linearf(x, [StochRSI_high_left_node, StochRSI_high_ride_node], positive_slope = True))
+        self.u[f'StochRSI{window}_lo'] = linearf_array(self.df[f'StochRSI{window}'], [StochRSI_low_left_node, StochRSI_low_right_node], positive_slope = False)
+        self.u[f'StochRSI{window}_md'] = trimf_array(self.df[f'StochRSI{window}'], [StochRSI_mid_left_node, StochRSI_mid_middle_node, StochRSI_mid_right_node]) 
+        self.u[f'StochRSI{window}_hi'] = linearf_array(self.df[f'StochRSI{window}'], [StochRSI_high_left_node, StochRSI_high_ride_node], positive_slope = True)
         
         # the following are the fuzzy rules for StochRSI
         # if StochRSI is low, then buy
@@ -160,11 +717,11 @@ class fuzzy_TA:
         
         # if StochRSI is medium and StochRSI is less than 0.5, then buy
         mask = (self.df[f'StochRSI{window}'] < 0.5)
-        self.z.loc[mask, f'StochRSI{window}_md'] = (p2 * ((self.u[f'StochRSI{window}_md'] * -25) + 75))
+        self.z.assign(f'StochRSI{window}_md', (p2 * ((self.u[f'StochRSI{window}_md'] * -25) + 75)), mask)
         
         # if StochRSI is medium and StochRSI is more than 0.5, then sell
         mask = (self.df[f'StochRSI{window}'] > 0.5)
-        self.z.loc[mask, f'StochRSI{window}_md'] =  (p3 * ((self.u[f'StochRSI{window}_md'] * 25) + 25))
+        self.z.assign(f'StochRSI{window}_md', (p3 * ((self.u[f'StochRSI{window}_md'] * 25) + 25)), mask)
 
         # if StochRSI is high then sell
         self.z[f'StochRSI{window}_hi'] = (p4 * ((self.u[f'StochRSI{window}_hi'] * -25) + 25))
@@ -201,34 +758,18 @@ class fuzzy_TA:
         """
         
         # compute for the fast stochastic
-        self.df[f'StochRSI_d{window}'] = (
-            ta.momentum.StochRSIIndicator(
-                close = self.df['Close'],
-                window = window,
-                smooth1 = smooth1,
-                smooth2 = smooth2,
-                fillna = fillna)
-            .stochrsi_d()
-        )
+        self.df[f'StochRSI_d{window}'] = self._cached('StochRSI_d', (window, smooth1, smooth2, fillna), lambda: self._StochRSI('Close', window, smooth1, smooth2, fillna)[1])
         
         # compute for the slow stochastic
-        self.df[f'StochRSI_k{window}'] = (
-            ta.momentum.StochRSIIndicator(
-                close = self.df['Close'],
-                window = window,
-                smooth1 = smooth1,
-                smooth2 = smooth2,
-                fillna = fillna)
-            .stochrsi_k()
-        )
+        self.df[f'StochRSI_k{window}'] = self._cached('StochRSI_k', (window, smooth1, smooth2, fillna), lambda: self._StochRSI('Close', window, smooth1, smooth2, fillna)[0])
         
         # compute for the KxD difference
         KxD_diff =  self.df[f'StochRSI_k{window}'] - self.df[f'StochRSI_d{window}']
         
         # calculate the membership values for low, medium and high RSI
-        self.u[f'StochRSI_KxD{window}_neg'] = KxD_diff.apply(lambda x: linearf(x, [-0.10, 0], positive_slope = False))
-        self.u[f'StochRSI_KxD{window}_zero'] = KxD_diff.apply(lambda x: trimf(x, [-0.10, 0, 0.10])) 
-        self.u[f'StochRSI_KxD{window}_pos'] = KxD_diff.apply(lambda x: linearf(x, [0, 0.10], positive_slope = True))
+        self.u[f'StochRSI_KxD{window}_neg'] = linearf_array(KxD_diff, [-0.10, 0], positive_slope = False)
+        self.u[f'StochRSI_KxD{window}_zero'] = trimf_array(KxD_diff, [-0.10, 0, 0.10]) 
+        self.u[f'StochRSI_KxD{window}_pos'] = linearf_array(KxD_diff, [0, 0.10], positive_slope = True)
         
         # the following are the fuzzy rules for PPO
         # if PPO_hist is postive then buy
@@ -237,11 +778,11 @@ class fuzzy_TA:
         # if PPO_hist is zero
         mask = (KxD_diff > 0)
         # if KxD_diff is above 0, then lean towards buying
-        self.z.loc[mask, f'StochRSI_KxD{window}_zero'] = p0 + (p1 * ((self.u[f'StochRSI_KxD{window}_zero'] * -25) + 75))
+        self.z.assign(f'StochRSI_KxD{window}_zero', p0 + (p1 * ((self.u[f'StochRSI_KxD{window}_zero'] * -25) + 75)), mask)
 
         mask = (KxD_diff <= 0)
         # if KxD_diff is less than or equal to  0, then lean towards selling
-        self.z.loc[mask, f'StochRSI_KxD{window}_zero'] = p0 + (p1 * ((self.u[f'StochRSI_KxD{window}_zero'] * 25) + 25))
+        self.z.assign(f'StochRSI_KxD{window}_zero', p0 + (p1 * ((self.u[f'StochRSI_KxD{window}_zero'] * 25) + 25)), mask)
 
         # if KxD_diff is negative then sell
         self.z[f'StochRSI_KxD{window}_neg'] = p0 + (p1 * ((self.u[f'StochRSI_KxD{window}_neg'] * -25) + 25))
@@ -267,20 +808,12 @@ class fuzzy_TA:
             None        
         """
         # compute for Williams % R
-        self.df[f'WilliamsR{window}'] = (
-            ta.momentum.WilliamsRIndicator(
-                high = self.df['High'],
-                low = self.df['Low'],
-                close = self.df['Close'],
-                lbp = window,
-                fillna = fillna)
-            .williams_r()
-        )
+        self.df[f'WilliamsR{window}'] = self._cached('WilliamsR', (window, fillna), lambda: self._WilliamsR(window, fillna))
 
         # calculate the membership values for low, medium and high RSI
-        self.u[f'WilliamsR{window}_lo'] = self.df[f'WilliamsR{window}'].apply(lambda x: linearf(x, [-100, -80], positive_slope = False))
-        self.u[f'WilliamsR{window}_md'] = self.df[f'WilliamsR{window}'].apply(lambda x: trimf(x, [-100, -50, 0])) 
-        self.u[f'WilliamsR{window}_hi'] = self.df[f'WilliamsR{window}'].apply(lambda x: linearf(x, [-20, 0], positive_slope = True))
+        self.u[f'WilliamsR{window}_lo'] = linearf_array(self.df[f'WilliamsR{window}'], [-100, -80], positive_slope = False)
+        self.u[f'WilliamsR{window}_md'] = trimf_array(self.df[f'WilliamsR{window}'], [-100, -50, 0]) 
+        self.u[f'WilliamsR{window}_hi'] = linearf_array(self.df[f'WilliamsR{window}'], [-20, 0], positive_slope = True)
         
         # the following are the fuzzy rules for StochRSI
         # if StochRSI is low, then buy
@@ -288,11 +821,11 @@ class fuzzy_TA:
         
         # if StochRSI is medium and StochRSI is less than 0.5, then buy
         mask = (self.df[f'WilliamsR{window}'] < -50)
-        self.z.loc[mask, f'WilliamsR{window}_md'] = p0 + (p1 * ((self.u[f'WilliamsR{window}_md'] * -25) + 75))
+        self.z.assign(f'WilliamsR{window}_md', p0 + (p1 * ((self.u[f'WilliamsR{window}_md'] * -25) + 75)), mask)
         
         # if StochRSI is medium and StochRSI is more than 0.5, then sell
         mask = (self.df[f'WilliamsR{window}'] >= -50)
-        self.z.loc[mask, f'WilliamsR{window}_md'] = p0 + (p1 * ((self.u[f'WilliamsR{window}_md'] * 25) + 25))
+        self.z.assign(f'WilliamsR{window}_md', p0 + (p1 * ((self.u[f'WilliamsR{window}_md'] * 25) + 25)), mask)
 
         # if StochRSI is high then sell
         self.z[f'WilliamsR{window}_hi'] = p0 + (p1 * ((self.u[f'WilliamsR{window}_hi'] * -25) + 25))
@@ -334,22 +867,14 @@ class fuzzy_TA:
         """
         
         # compute for the Ultimate oscillator
-        self.df[f'Ultimate{window1}'] = ta.momentum.ultimate_oscillator(
-            high = self.df['High'], 
-            low = self.df['Low'], 
-            close = self.df['Close'], 
-            window1 = window1, 
-            window2 = window2, 
-            window3 = window3, 
-            weight1 = weight1, 
-            weight2 = weight2, 
-            weight3 = weight3, 
-            fillna = fillna)
+        self.df[f'Ultimate{window1}'] = self._cached('Ultimate', (window1, window2, window3, weight1, weight2, weight3, fillna), lambda: (
+            self._Ultimate(window1, window2, window3, weight1, weight2, weight3, fillna)
+        ))
     
         # calculate the membership values for low, medium and high ultimate oscillator
-        self.u[f'Ultimate{window1}_lo'] = self.df[f'Ultimate{window1}'].apply(lambda x: linearf(x, [0, 20], positive_slope = False))
-        self.u[f'Ultimate{window1}_md'] = self.df[f'Ultimate{window1}'].apply(lambda x: trimf(x, [0, 50, 100])) 
-        self.u[f'Ultimate{window1}_hi'] = self.df[f'Ultimate{window1}'].apply(lambda x: linearf(x, [80, 100], positive_slope = True))
+        self.u[f'Ultimate{window1}_lo'] = linearf_array(self.df[f'Ultimate{window1}'], [0, 20], positive_slope = False)
+        self.u[f'Ultimate{window1}_md'] = trimf_array(self.df[f'Ultimate{window1}'], [0, 50, 100]) 
+        self.u[f'Ultimate{window1}_hi'] = linearf_array(self.df[f'Ultimate{window1}'], [80, 100], positive_slope = True)
         
         # the following are the fuzzy rules for ultimate oscillator
         # if ultimate is low, then buy
@@ -357,11 +882,11 @@ class fuzzy_TA:
         
         # if ultimate is medium and ultimate is below 50 then do this; borderlining to buying
         mask = (self.df[f'Ultimate{window1}'] < 50)
-        self.z.loc[mask, f'Ultimate{window1}_md'] = p0 + (p1 * ((self.u[f'Ultimate{window1}_md'] * -25) + 75))
+        self.z.assign(f'Ultimate{window1}_md', p0 + (p1 * ((self.u[f'Ultimate{window1}_md'] * -25) + 75)), mask)
         
         # if ultimate is medium and ultimate is above or equal to  50 then do this; borderlining to selling
         mask = (self.df[f'Ultimate{window1}'] >= 50)
-        self.z.loc[mask, f'Ultimate{window1}_md'] = p0 + (p1 * ((self.u[f'Ultimate{window1}_md'] * 25) + 25))
+        self.z.assign(f'Ultimate{window1}_md', p0 + (p1 * ((self.u[f'Ultimate{window1}_md'] * 25) + 25)), mask)
 
         # if ultimate is high then sell
         self.z[f'Ultimate{window1}_hi'] = p0 + (p1 * ((self.u[f'Ultimate{window1}_hi'] * -25) + 25))
@@ -391,17 +916,12 @@ class fuzzy_TA:
         """
 
         # compute for the TSI of the stock
-        self.df[f'TSI{window_slow}x{window_fast}'] = (ta.momentum.tsi(
-            close = self.df['Close'],
-            window_slow = 25,
-            window_fast = 13,
-            fillna = False)
-        )
+        self.df[f'TSI{window_slow}x{window_fast}'] = self._cached('TSI', (25, 13, False), lambda: self._TSI(25, 13, False))
 
         # calculate the membership values for low, medium and high ultimate oscillator
-        self.u[f'TSI{window_slow}x{window_fast}_lo'] = self.df[f'TSI{window_slow}x{window_fast}'].apply(lambda x: linearf(x, [-0.5, -0.25], positive_slope = False))
-        self.u[f'TSI{window_slow}x{window_fast}_md'] = self.df[f'TSI{window_slow}x{window_fast}'].apply(lambda x: trimf(x, [-0.5, 0, 0.5])) 
-        self.u[f'TSI{window_slow}x{window_fast}_hi'] = self.df[f'TSI{window_slow}x{window_fast}'].apply(lambda x: linearf(x, [0.25, 0.5], positive_slope = True))
+        self.u[f'TSI{window_slow}x{window_fast}_lo'] = linearf_array(self.df[f'TSI{window_slow}x{window_fast}'], [-0.5, -0.25], positive_slope = False)
+        self.u[f'TSI{window_slow}x{window_fast}_md'] = trimf_array(self.df[f'TSI{window_slow}x{window_fast}'], [-0.5, 0, 0.5]) 
+        self.u[f'TSI{window_slow}x{window_fast}_hi'] = linearf_array(self.df[f'TSI{window_slow}x{window_fast}'], [0.25, 0.5], positive_slope = True)
 
 
         # the following are the fuzzy rules for ultimate oscillator
@@ -440,22 +960,14 @@ class fuzzy_TA:
         """
         
         
-        self.df[f'CMF{window}'] = (
-            ta.volume.chaikin_money_flow(
-                high = self.df['High'], 
-                low = self.df['Low'], 
-                close = self.df['Close'], 
-                volume = self.df['Volume'], 
-                window = window, 
-                fillna = fillna)
-            )
+        self.df[f'CMF{window}'] = self._cached('CMF', (window, fillna), lambda: self._CMF(window, fillna))
 
         # CMF_val = self.df[f'CMF{window}'].iloc[-1]
         
         # calculate the membership values for low, medium and high CMF
-        self.u[f'CMF{window}_lo'] = self.df[f'CMF{window}'].apply(lambda x: linearf(x, [-1, 0], positive_slope = False))
-        self.u[f'CMF{window}_md'] = self.df[f'CMF{window}'].apply(lambda x: trimf(x, [-1, 0, 1])) 
-        self.u[f'CMF{window}_hi'] = self.df[f'CMF{window}'].apply(lambda x: linearf(x, [0, 1], positive_slope = True))        
+        self.u[f'CMF{window}_lo'] = linearf_array(self.df[f'CMF{window}'], [-1, 0], positive_slope = False)
+        self.u[f'CMF{window}_md'] = trimf_array(self.df[f'CMF{window}'], [-1, 0, 1]) 
+        self.u[f'CMF{window}_hi'] = linearf_array(self.df[f'CMF{window}'], [0, 1], positive_slope = True)        
         
         # the following are the fuzzy rules for CMF
         # if CMF_val is negative then buy
@@ -463,11 +975,11 @@ class fuzzy_TA:
         
         # if CMF is medium and ultimate is below 0 then do this; borderlining to buying
         mask = (self.df[f'CMF{window}'] < 0)
-        self.z.loc[mask, f'CMF{window}_md'] = p0 + (p1 * ((self.u[f'CMF{window}_md'] * -25) + 75))
+        self.z.assign(f'CMF{window}_md', p0 + (p1 * ((self.u[f'CMF{window}_md'] * -25) + 75)), mask)
         
         # if CMF is medium and ultimate is above or equal to  0 then do this; borderlining to selling
         mask = (self.df[f'CMF{window}'] >= 0)
-        self.z.loc[mask, f'CMF{window}_md'] = p0 + (p1 * ((self.u[f'CMF{window}_md'] * 25) + 25))
+        self.z.assign(f'CMF{window}_md', p0 + (p1 * ((self.u[f'CMF{window}_md'] * 25) + 25)), mask)
 
         # if CMF is high then sell
         self.z[f'CMF{window}_hi'] = p0 + (p1 * ((self.u[f'CMF{window}_hi'] * -25) + 25))
@@ -493,21 +1005,12 @@ class fuzzy_TA:
             None
         """
         # calculate the money flow index for the window
-        self.df[f'MFI{window}'] = (
-            ta.volume.MFIIndicator(
-                high = self.df['High'], 
-                low = self.df['Low'], 
-                close = self.df['Close'], 
-                volume = self.df['Volume'], 
-                window = window, 
-                fillna = fillna)
-            .money_flow_index()
-        )
+        self.df[f'MFI{window}'] = self._cached('MFI', (window, fillna), lambda: self._MFI(window, fillna))
         
         # calculate the membership values for low, medium and high MFI
-        self.u[f'MFI{window}_lo'] = self.df[f'MFI{window}'].apply(lambda x: linearf(x, [0, 20], positive_slope = False))
-        self.u[f'MFI{window}_md'] = self.df[f'MFI{window}'].apply(lambda x: trimf(x, [0, 50, 100])) 
-        self.u[f'MFI{window}_hi'] = self.df[f'MFI{window}'].apply(lambda x: linearf(x, [80, 100], positive_slope = True))
+        self.u[f'MFI{window}_lo'] = linearf_array(self.df[f'MFI{window}'], [0, 20], positive_slope = False)
+        self.u[f'MFI{window}_md'] = trimf_array(self.df[f'MFI{window}'], [0, 50, 100]) 
+        self.u[f'MFI{window}_hi'] = linearf_array(self.df[f'MFI{window}'], [80, 100], positive_slope = True)
 
 
         # the following are the fuzzy rules for MFI
@@ -516,11 +1019,11 @@ class fuzzy_TA:
         
         # if CMF is medium and ultimate is below 0 then do this; borderlining to buying
         mask = (self.df[f'MFI{window}'] < 0)
-        self.z.loc[mask, f'MFI{window}_md'] = p0 + (p1 * ((self.u[f'MFI{window}_md'] * -25) + 75))
+        self.z.assign(f'MFI{window}_md', p0 + (p1 * ((self.u[f'MFI{window}_md'] * -25) + 75)), mask)
         
         # if CMF is medium and ultimate is above or equal to  0 then do this; borderlining to selling
         mask = (self.df[f'MFI{window}'] >= 0)
-        self.z.loc[mask, f'MFI{window}_md'] = p0 + (p1 * ((self.u[f'MFI{window}_md'] * 25) + 25))
+        self.z.assign(f'MFI{window}_md', p0 + (p1 * ((self.u[f'MFI{window}_md'] * 25) + 25)), mask)
 
         # if CMF is high then sell
         self.z[f'MFI{window}_hi'] = p0 + (p1 * ((self.u[f'MFI{window}_hi'] * -25) + 25))
@@ -547,32 +1050,16 @@ class fuzzy_TA:
         
         """
 
-        # compute for OBV
-        self.df['OBV'] = (
-            ta.volume.OnBalanceVolumeIndicator(
-                close = self.df['Close'], 
-                volume = self.df['Volume'], 
-                fillna = False)
-            .on_balance_volume()
-        )
-
-        # normalize OBV
-        volume_sum = self.df['OBV'].sum()
-        self.df['OBV'] = (self.df['OBV']/volume_sum)*100
+        # compute for the normalized OBV
+        self.df['OBV'] = self._cached('OBV', (), self._normalized_OBV)
 
         # compute for the RSI of the stock
-        self.df[f'RSI_OBV{window}'] = (
-            ta.momentum.RSIIndicator(
-                close = self.df['OBV'], 
-                window = window, 
-                fillna = fillna)
-            .rsi()
-        )
+        self.df[f'RSI_OBV{window}'] = self._cached('RSI_OBV', (window, fillna), lambda: self._RSI('OBV', window, fillna))
         
         # calculate the membership values for low, medium and high RSI_OBV
-        self.u[f'RSI_OBV{window}_lo'] = self.df[f'RSI_OBV{window}'].apply(lambda x: linearf(x, [0, 20], positive_slope = False))
-        self.u[f'RSI_OBV{window}_md'] = self.df[f'RSI_OBV{window}'].apply(lambda x: trimf(x, [0, 50, 100])) 
-        self.u[f'RSI_OBV{window}_hi'] = self.df[f'RSI_OBV{window}'].apply(lambda x: linearf(x, [80, 100], positive_slope = True))
+        self.u[f'RSI_OBV{window}_lo'] = linearf_array(self.df[f'RSI_OBV{window}'], [0, 20], positive_slope = False)
+        self.u[f'RSI_OBV{window}_md'] = trimf_array(self.df[f'RSI_OBV{window}'], [0, 50, 100]) 
+        self.u[f'RSI_OBV{window}_hi'] = linearf_array(self.df[f'RSI_OBV{window}'], [80, 100], positive_slope = True)
         
         # the following are the fuzzy rules for RSI_OBV
         # if RSI_OBV is low then buy
@@ -580,11 +1067,11 @@ class fuzzy_TA:
         
         # if RSI_OBV is medium and RSI_OBV is below 50 then do this; borderlining to buying
         mask = (self.df[f'RSI_OBV{window}'] < 50)
-        self.z.loc[mask, f'RSI_OBV{window}_md'] = p0 + (p1 * ((self.u[f'RSI_OBV{window}_md'] * -25) + 75))
+        self.z.assign(f'RSI_OBV{window}_md', p0 + (p1 * ((self.u[f'RSI_OBV{window}_md'] * -25) + 75)), mask)
         
         # if RSI_OBV is medium and RSI_OBV is above or equal to  50 then do this; borderlining to selling
         mask = (self.df[f'RSI_OBV{window}'] >= 50)
-        self.z.loc[mask, f'RSI_OBV{window}_md'] = p0 + (p1 * ((self.u[f'RSI_OBV{window}_md'] * 25) + 25))
+        self.z.assign(f'RSI_OBV{window}_md', p0 + (p1 * ((self.u[f'RSI_OBV{window}_md'] * 25) + 25)), mask)
 
         # if RSI_OBV is high then sell
         self.z[f'RSI_OBV{window}_hi'] = p0 + (p1 * ((self.u[f'RSI_OBV{window}_hi'] * -25) + 25))
@@ -620,46 +1107,20 @@ class fuzzy_TA:
             None
         """
         
-        # compute for OBV
-        self.df['OBV'] = (
-            ta.volume.OnBalanceVolumeIndicator(
-                close = self.df['Close'], 
-                volume = self.df['Volume'], 
-                fillna = False)
-            .on_balance_volume()
-        )
-
-        # normalize OBV
-        volume_sum = self.df['OBV'].sum()
-        self.df['OBV'] = (self.df['OBV']/volume_sum)*100
+        # compute for the normalized OBV
+        self.df['OBV'] = self._cached('OBV', (), self._normalized_OBV)
         
         # compute for the stochastic of OBV
-        self.df[f'StochOBV_d{window}'] = (
-            ta.momentum.StochRSIIndicator(
-                close = self.df['OBV'],
-                window = window,
-                smooth1 = smooth1,
-                smooth2 = smooth2,
-                fillna = fillna)
-            .stochrsi_d()
-        )
-        self.df[f'StochOBV_k{window}'] = (
-            ta.momentum.StochRSIIndicator(
-                close = self.df['OBV'],
-                window = window,
-                smooth1 = smooth1,
-                smooth2 = smooth2,
-                fillna = fillna)
-            .stochrsi_k()
-        )
+        self.df[f'StochOBV_d{window}'] = self._cached('StochOBV_d', (window, smooth1, smooth2, fillna), lambda: self._StochRSI('OBV', window, smooth1, smooth2, fillna)[1])
+        self.df[f'StochOBV_k{window}'] = self._cached('StochOBV_k', (window, smooth1, smooth2, fillna), lambda: self._StochRSI('OBV', window, smooth1, smooth2, fillna)[0])
         
         # compute for the KxD difference
         KxD_diff =  self.df[f'StochOBV_k{window}'] - self.df[f'StochOBV_d{window}']
 
         # calculate the membership values for low, medium and high RSI
-        self.u[f'StochOBV_KxD{window}_neg'] = KxD_diff.apply(lambda x: linearf(x, [-0.4, 0], positive_slope = False))
-        self.u[f'StochOBV_KxD{window}_zero'] = KxD_diff.apply(lambda x: trimf(x, [-0.4, 0, 0.4])) 
-        self.u[f'StochOBV_KxD{window}_pos'] = KxD_diff.apply(lambda x: linearf(x, [0, 0.4], positive_slope = True))
+        self.u[f'StochOBV_KxD{window}_neg'] = linearf_array(KxD_diff, [-0.4, 0], positive_slope = False)
+        self.u[f'StochOBV_KxD{window}_zero'] = trimf_array(KxD_diff, [-0.4, 0, 0.4]) 
+        self.u[f'StochOBV_KxD{window}_pos'] = linearf_array(KxD_diff, [0, 0.4], positive_slope = True)
         
         # the following are the fuzzy rules for PPO
         # if PPO_hist is postive then buy
@@ -668,11 +1129,11 @@ class fuzzy_TA:
         # if PPO_hist is zero
         mask = (KxD_diff > 0)
         # if KxD_diff is above  0, then lean towards buying
-        self.z.loc[mask, f'StochOBV_KxD{window}_zero'] = p0 + (p1 * ((self.u[f'StochOBV_KxD{window}_zero'] * -25) + 75))
+        self.z.assign(f'StochOBV_KxD{window}_zero', p0 + (p1 * ((self.u[f'StochOBV_KxD{window}_zero'] * -25) + 75)), mask)
 
         mask = (KxD_diff <= 0)
         # if KxD_diff is less than or equal to  0, then lean towards selling
-        self.z.loc[mask, f'StochOBV_KxD{window}_zero'] = p0 + (p1 * ((self.u[f'StochOBV_KxD{window}_zero'] * 25) + 25))
+        self.z.assign(f'StochOBV_KxD{window}_zero', p0 + (p1 * ((self.u[f'StochOBV_KxD{window}_zero'] * 25) + 25)), mask)
 
         # if KxD_diff is negative then sell
         self.z[f'StochOBV_KxD{window}_neg'] = p0 + (p1 * ((self.u[f'StochOBV_KxD{window}_neg'] * -25) + 25))
@@ -702,18 +1163,13 @@ class fuzzy_TA:
             None
         """
         
-        self.df[f'BB_pband{window}'] = (ta.volatility.bollinger_pband(
-            close = self.df['Close'], 
-            window = window, 
-            window_dev = window_dev, 
-            fillna = fillna)
-        )
+        self.df[f'BB_pband{window}'] = self._cached('BB_pband', (window, window_dev, fillna), lambda: self._BB_pband(window, window_dev, fillna))
 
         
         # calculate the membership values for low, medium and high RSI
-        self.u[f'BB_pband{window}_lo'] = self.df[f'BB_pband{window}'].apply(lambda x: linearf(x, [-0.2, 0], positive_slope = False))
-        self.u[f'BB_pband{window}_md'] = self.df[f'BB_pband{window}'].apply(lambda x: trimf(x, [0, 0.5, 1])) 
-        self.u[f'BB_pband{window}_hi'] = self.df[f'BB_pband{window}'].apply(lambda x: linearf(x, [1, 1.2], positive_slope = True))
+        self.u[f'BB_pband{window}_lo'] = linearf_array(self.df[f'BB_pband{window}'], [-0.2, 0], positive_slope = False)
+        self.u[f'BB_pband{window}_md'] = trimf_array(self.df[f'BB_pband{window}'], [0, 0.5, 1]) 
+        self.u[f'BB_pband{window}_hi'] = linearf_array(self.df[f'BB_pband{window}'], [1, 1.2], positive_slope = True)
         
 
         # the following are the fuzzy rules for BB_pband
@@ -723,11 +1179,11 @@ class fuzzy_TA:
         # if BB_pband is low
         mask = self.df[f'BB_pband{window}'] < 0
         # if BB_pband is less than 0, then lean towards buying
-        self.z.loc[mask, f'BB_pband{window}_md'] = p0 + (p1 * ((self.u[f'BB_pband{window}_md'] * -25) + 75))
+        self.z.assign(f'BB_pband{window}_md', p0 + (p1 * ((self.u[f'BB_pband{window}_md'] * -25) + 75)), mask)
 
         mask = self.df[f'BB_pband{window}'] >= 0
         # if BB_pband is greater than or equal to  0, then lean towards selling
-        self.z.loc[mask, f'BB_pband{window}_md'] = p0 + (p1 * ((self.u[f'BB_pband{window}_md'] * 25) + 25))
+        self.z.assign(f'BB_pband{window}_md', p0 + (p1 * ((self.u[f'BB_pband{window}_md'] * 25) + 25)), mask)
 
         # if BB_pband is high then sell
         self.z[f'BB_pband{window}_hi'] = p0 + (p1 * ((self.u[f'BB_pband{window}_hi'] * -25) + 25))
@@ -762,58 +1218,34 @@ class fuzzy_TA:
     
     
         # compute for MACD Line
-        self.df[f'MACD{window_fast}_{window_slow}_line'] = (
-            ta.trend.MACD(
-                close = self.df['Close'], 
-                window_fast = window_fast,
-                window_slow = window_slow,
-                window_sign = window_sign, 
-                fillna = False)
-            .macd()
-        )
+        self.df[f'MACD{window_fast}_{window_slow}_line'] = self._cached('MACD_line', (window_fast, window_slow, window_sign), lambda: self._MACD(window_fast, window_slow, window_sign)[0])
         
         # compute for MACD Difference
-        self.df[f'MACD{window_fast}_{window_slow}_diff'] = (
-            ta.trend.MACD(
-                close = self.df['Close'], 
-                window_fast = window_fast,
-                window_slow = window_slow,
-                window_sign = window_sign, 
-                fillna = False)
-            .macd_diff()
-        )
+        self.df[f'MACD{window_fast}_{window_slow}_diff'] = self._cached('MACD_diff', (window_fast, window_slow, window_sign), lambda: self._MACD(window_fast, window_slow, window_sign)[1])
         
         # compute for MACD signal
-        self.df[f'MACD{window_fast}_{window_slow}_signal'] = (
-            ta.trend.MACD(
-                close = self.df['Close'], 
-                window_fast = window_fast,
-                window_slow = window_slow,
-                window_sign = window_sign, 
-                fillna = False)
-            .macd_signal()
-        )
-        # set the index in u and z
-        self.u = pd.DataFrame(index = self.df.index )
-        self.z = pd.DataFrame(index = self.df.index )
+        self.df[f'MACD{window_fast}_{window_slow}_signal'] = self._cached('MACD_signal', (window_fast, window_slow, window_sign), lambda: self._MACD(window_fast, window_slow, window_sign)[2])
+        # clear u and z; the MACD rule replaces the rules added before it
+        self.u.clear()
+        self.z.clear()
  
         # get mask
         mask = (self.df[f'MACD{window_fast}_{window_slow}_signal'] < self.df[f'MACD{window_fast}_{window_slow}_line'])
         
         # this rule sets the buying condition of the MACD rule
-        self.u.loc[mask, f'MACD{window_fast}_{window_slow}_lo'] = 0
-        self.u.loc[mask, f'MACD{window_fast}_{window_slow}_hi'] = 1
-        self.z.loc[mask, f'MACD{window_fast}_{window_slow}_lo'] = p1 * 0
-        self.z.loc[mask, f'MACD{window_fast}_{window_slow}_hi'] = p1 * 100
+        self.u.assign(f'MACD{window_fast}_{window_slow}_lo', 0, mask)
+        self.u.assign(f'MACD{window_fast}_{window_slow}_hi', 1, mask)
+        self.z.assign(f'MACD{window_fast}_{window_slow}_lo', p1 * 0, mask)
+        self.z.assign(f'MACD{window_fast}_{window_slow}_hi', p1 * 100, mask)
         
         # get mask
         mask = (self.df[f'MACD{window_fast}_{window_slow}_signal'] > self.df[f'MACD{window_fast}_{window_slow}_line'])
         
         # this rule sets the selling condition of the MACD rule
-        self.u.loc[mask, f'MACD{window_fast}_{window_slow}_lo'] = 1
-        self.u.loc[mask, f'MACD{window_fast}_{window_slow}_hi'] = 0
-        self.z.loc[mask, f'MACD{window_fast}_{window_slow}_lo'] = p1 * 0
-        self.z.loc[mask, f'MACD{window_fast}_{window_slow}_hi'] = p1 * 100
+        self.u.assign(f'MACD{window_fast}_{window_slow}_lo', 1, mask)
+        self.u.assign(f'MACD{window_fast}_{window_slow}_hi', 0, mask)
+        self.z.assign(f'MACD{window_fast}_{window_slow}_lo', p1 * 0, mask)
+        self.z.assign(f'MACD{window_fast}_{window_slow}_hi', p1 * 100, mask)
 
 
     def CCI(self, window:int = 20, constant:float = 0.0015, fillna:bool = False, p0:float = 0, p1:float = 1) -> None:
@@ -840,22 +1272,13 @@ class fuzzy_TA:
             None
         """
         # compute for the commodity channel index
-        self.df[f'CCI{window}'] = (
-            ta.trend.CCIIndicator(
-                high = self.df['High'],
-                low = self.df['Low'],
-                close = self.df['Close'],
-                window = window,
-                constant = constant,
-                fillna = fillna)
-            .cci()
-        )
+        self.df[f'CCI{window}'] = self._cached('CCI', (window, constant, fillna), lambda: self._CCI(window, constant, fillna))
 
     
         # calculate the membership values for low, medium and high CCI
-        self.u[f'CCI{window}_lo'] = self.df[f'CCI{window}'].apply(lambda x: linearf(x, [-200, -100], positive_slope = False))
-        self.u[f'CCI{window}_md'] = self.df[f'CCI{window}'].apply(lambda x: trimf(x, [-200, 0, 200])) 
-        self.u[f'CCI{window}_hi'] = self.df[f'CCI{window}'].apply(lambda x: linearf(x, [100, 200], positive_slope = True))
+        self.u[f'CCI{window}_lo'] = linearf_array(self.df[f'CCI{window}'], [-200, -100], positive_slope = False)
+        self.u[f'CCI{window}_md'] = trimf_array(self.df[f'CCI{window}'], [-200, 0, 200]) 
+        self.u[f'CCI{window}_hi'] = linearf_array(self.df[f'CCI{window}'], [100, 200], positive_slope = True)
         
         # the following are the fuzzy rules for CCI
         # if BB_pband is low then buy
@@ -864,11 +1287,11 @@ class fuzzy_TA:
         # if CCI is low
         mask = self.df[f'CCI{window}'] < 0
         # if CCI is less than 0, then lean towards buying
-        self.z.loc[mask, f'CCI{window}_md'] = p0 + (p1 * ((self.u[f'CCI{window}_md'] * -25) + 75))
+        self.z.assign(f'CCI{window}_md', p0 + (p1 * ((self.u[f'CCI{window}_md'] * -25) + 75)), mask)
 
         mask = self.df[f'CCI{window}'] >= 0
         # if CCI is greater than or equal to  0, then lean towards selling
-        self.z.loc[mask, f'CCI{window}_md'] = p0 + (p1 * ((self.u[f'CCI{window}_md'] * 25) + 25))
+        self.z.assign(f'CCI{window}_md', p0 + (p1 * ((self.u[f'CCI{window}_md'] * 25) + 25)), mask)
 
         # if CCI is high then sell
         self.z[f'CCI{window}_hi'] = p0 + (p1 * ((self.u[f'CCI{window}_hi'] * -25) + 25))
@@ -906,22 +1329,12 @@ class fuzzy_TA:
             None
         """
         
-        self.df[f'STC{window_slow}'] = (
-            ta.trend.STCIndicator(
-                close = self.df['Close'],
-                window_slow = window_slow,
-                window_fast = window_fast,
-                cycle = cycle,
-                smooth1 = smooth1,
-                smooth2 = smooth2,
-                fillna = fillna)
-            .stc()
-        )
+        self.df[f'STC{window_slow}'] = self._cached('STC', (window_slow, window_fast, cycle, smooth1, smooth2, fillna), lambda: self._STC(window_slow, window_fast, cycle, smooth1, smooth2, fillna))
         
         # calculate the membership values for low, medium and high CCI
-        self.u[f'STC{window_slow}_lo'] = self.df[f'STC{window_slow}'].apply(lambda x: linearf(x, [0, 20], positive_slope = False))
-        self.u[f'STC{window_slow}_md'] = self.df[f'STC{window_slow}'].apply(lambda x: trimf(x, [0, 50, 100])) 
-        self.u[f'STC{window_slow}_hi'] = self.df[f'STC{window_slow}'].apply(lambda x: linearf(x, [80, 100], positive_slope = True))
+        self.u[f'STC{window_slow}_lo'] = linearf_array(self.df[f'STC{window_slow}'], [0, 20], positive_slope = False)
+        self.u[f'STC{window_slow}_md'] = trimf_array(self.df[f'STC{window_slow}'], [0, 50, 100]) 
+        self.u[f'STC{window_slow}_hi'] = linearf_array(self.df[f'STC{window_slow}'], [80, 100], positive_slope = True)
         
         # the following are the fuzzy rules for CCI
         # if BB_pband is low then buy
@@ -930,11 +1343,11 @@ class fuzzy_TA:
         # if CCI is low
         mask = self.df[f'STC{window_slow}'] < 50
         # if CCI is less than 0, then lean towards buying
-        self.z.loc[mask, f'STC{window_slow}_md'] = p0 + (p1 * ((self.u[f'STC{window_slow}_md'] * -25) + 75))
+        self.z.assign(f'STC{window_slow}_md', p0 + (p1 * ((self.u[f'STC{window_slow}_md'] * -25) + 75)), mask)
 
         mask = self.df[f'STC{window_slow}'] >= 50
         # if CCI is greater than or equal to  0, then lean towards selling
-        self.z.loc[mask, f'STC{window_slow}_md'] = p0 + (p1 * ((self.u[f'STC{window_slow}_md'] * 25) + 25))
+        self.z.assign(f'STC{window_slow}_md', p0 + (p1 * ((self.u[f'STC{window_slow}_md'] * 25) + 25)), mask)
 
         # if CCI is high then sell
         self.z[f'STC{window_slow}_hi'] = p0 + (p1 * ((self.u[f'STC{window_slow}_hi'] * -25) + 25))
@@ -964,31 +1377,23 @@ class fuzzy_TA:
         """
         
         # parabolic SAR
-        self.df[f'PSAR{step}{max_step}'] = (ta.trend.PSARIndicator(
-            high = self.df['High'],
-            low = self.df['Low'],
-            close = self.df['Close'],
-            step = step,
-            max_step = max_step,
-            fillna = fillna)
-            .psar()
-        )
+        self.df[f'PSAR{step}{max_step}'] = self._cached('PSAR', (step, max_step, fillna), lambda: self._PSAR(step, max_step, fillna))
          
         # crude implementation of the PSAR rule
         # this rule defines the sell rule
         mask = (self.df[f'PSAR{step}{max_step}'] > self.df[f'Close'])
-        self.u.loc[mask, f'PSAR{step}{max_step}_lo'] = 1
-        self.u.loc[mask, f'PSAR{step}{max_step}_hi'] = 0
-        self.z.loc[mask, f'PSAR{step}{max_step}_lo'] = p1 * 0
-        self.z.loc[mask, f'PSAR{step}{max_step}_hi'] = p1 * 100
+        self.u.assign(f'PSAR{step}{max_step}_lo', 1, mask)
+        self.u.assign(f'PSAR{step}{max_step}_hi', 0, mask)
+        self.z.assign(f'PSAR{step}{max_step}_lo', p1 * 0, mask)
+        self.z.assign(f'PSAR{step}{max_step}_hi', p1 * 100, mask)
         
         # crude implementation of the PSAR rule
         # this rule defines the buy rule
         mask = (self.df[f'PSAR{step}{max_step}'] < self.df[f'Close'])
-        self.u.loc[mask, f'PSAR{step}{max_step}_lo'] = 0
-        self.u.loc[mask, f'PSAR{step}{max_step}_hi'] = 1
-        self.z.loc[mask, f'PSAR{step}{max_step}_lo'] = p1 * 0
-        self.z.loc[mask, f'PSAR{step}{max_step}_hi'] = p1 * 100
+        self.u.assign(f'PSAR{step}{max_step}_lo', 0, mask)
+        self.u.assign(f'PSAR{step}{max_step}_hi', 1, mask)
+        self.z.assign(f'PSAR{step}{max_step}_lo', p1 * 0, mask)
+        self.z.assign(f'PSAR{step}{max_step}_hi', p1 * 100, mask)
 
     # OTHER INDICATORS
     
@@ -1019,25 +1424,12 @@ class fuzzy_TA:
             None
         """
         
-        np.seterr(divide='ignore')
-
-        med = (self.df['High'] + self.df['Low']) / 2
-        ndaylow = med.rolling(window=window).min()
-        ndayhigh = med.rolling(window=window).max()
-        raw = (2 * ((med - ndaylow) / (ndayhigh - ndaylow))) - 1
-        smooth = raw.ewm(span=5, adjust=adjust).mean()
-        _smooth = smooth.fillna(0)
-        
-        self.df[f'Fisher{window}'] = (
-            (np.log((1 + _smooth) / (1 - _smooth)))
-            .ewm(span=3, adjust=adjust)
-            .mean()
-        )
+        self.df[f'Fisher{window}'] = self._cached('Fisher', (window, adjust), lambda: self._fisher(window = window, adjust = adjust))
         
         # calculate the membership values for low, medium and high Fisher
-        self.u[f'Fisher{window}_lo'] = self.df[f'Fisher{window}'].apply(lambda x: linearf(x, [-4, 0], positive_slope = False))
-        self.u[f'Fisher{window}_md'] = self.df[f'Fisher{window}'].apply(lambda x: trimf(x, [-2, 0, 2])) 
-        self.u[f'Fisher{window}_hi'] = self.df[f'Fisher{window}'].apply(lambda x: linearf(x, [0, 4], positive_slope = True))
+        self.u[f'Fisher{window}_lo'] = linearf_array(self.df[f'Fisher{window}'], [-4, 0], positive_slope = False)
+        self.u[f'Fisher{window}_md'] = trimf_array(self.df[f'Fisher{window}'], [-2, 0, 2]) 
+        self.u[f'Fisher{window}_hi'] = linearf_array(self.df[f'Fisher{window}'], [0, 4], positive_slope = True)
         
         # the following are the fuzzy rules for Fisher
         # if Fisher is low, then buy
@@ -1045,11 +1437,11 @@ class fuzzy_TA:
         
         # if Fisher is medium and Fisher is less than 0, then buy
         mask = (self.df[f'Fisher{window}'] < 0)
-        self.z.loc[mask, f'Fisher{window}_md'] = p0 + (p1 * ((self.u[f'Fisher{window}_md'] * -25) + 75))
+        self.z.assign(f'Fisher{window}_md', p0 + (p1 * ((self.u[f'Fisher{window}_md'] * -25) + 75)), mask)
         
         # if Fisher is medium and Fisher is more than 0, then sell
         mask = (self.df[f'Fisher{window}'] >= 0)
-        self.z.loc[mask, f'Fisher{window}_md'] = p0 + (p1 * ((self.u[f'Fisher{window}_md'] * 25) + 25))
+        self.z.assign(f'Fisher{window}_md', p0 + (p1 * ((self.u[f'Fisher{window}_md'] * 25) + 25)), mask)
 
         # if Fisher is high then sell
         self.z[f'Fisher{window}_hi'] = p0 + (p1 * ((self.u[f'Fisher{window}_hi'] * -25) + 25))
@@ -1072,26 +1464,17 @@ class fuzzy_TA:
             None
         """
         
-        np.seterr(divide='ignore')
-
-        med = (self.df['High'] + self.df['Low']) / 2
-        ndaylow = med.rolling(window=window).min()
-        ndayhigh = med.rolling(window=window).max()
-        raw = (2 * ((med - ndaylow) / (ndayhigh - ndaylow))) - 1
-        smooth = raw.ewm(span=5, adjust=adjust).mean()
-        _smooth = smooth.fillna(0)
-
         # compute for the k and d smoothed fisher transforms
-        fish_series_k = (np.log((1 + _smooth) / (1 - _smooth))).ewm(span=3, adjust=adjust).mean()
+        fish_series_k = self._cached('Fisher', (window, adjust), lambda: self._fisher(window = window, adjust = adjust))
         fish_series_d = fish_series_k.rolling(smooth2).mean()
         
         # compute for the KxD difference
         KxD_diff = fish_series_k - fish_series_d
         
         # calculate the membership values for low, medium and high KxD_diff
-        self.u[f'Fisher_KxD{window}_neg'] = KxD_diff.apply(lambda x: linearf(x, [-0.25, 0], positive_slope = False))
-        self.u[f'Fisher_KxD{window}_zero'] = KxD_diff.apply(lambda x: trimf(x, [-0.13, 0, 0.13])) 
-        self.u[f'Fisher_KxD{window}_pos'] = KxD_diff.apply(lambda x: linearf(x, [0, 0.25], positive_slope = True))
+        self.u[f'Fisher_KxD{window}_neg'] = linearf_array(KxD_diff, [-0.25, 0], positive_slope = False)
+        self.u[f'Fisher_KxD{window}_zero'] = trimf_array(KxD_diff, [-0.13, 0, 0.13]) 
+        self.u[f'Fisher_KxD{window}_pos'] = linearf_array(KxD_diff, [0, 0.25], positive_slope = True)
         
         # the following are the fuzzy rules for KxD_diff
         # if KxD_diff is postive then buy
@@ -1100,43 +1483,49 @@ class fuzzy_TA:
         # if KxD_diff is zero
         mask = (KxD_diff > 0)
         # if KxD_diff is above 0, then lean towards buying
-        self.z.loc[mask, f'Fisher_KxD{window}_zero'] = p0 + (p1 * ((self.u[f'Fisher_KxD{window}_zero'] * -25) + 75))
+        self.z.assign(f'Fisher_KxD{window}_zero', p0 + (p1 * ((self.u[f'Fisher_KxD{window}_zero'] * -25) + 75)), mask)
 
         mask = (KxD_diff <= 0)
         # if KxD_diff is less than or equal to  0, then lean towards selling
-        self.z.loc[mask, f'Fisher_KxD{window}_zero'] = p0 + (p1 * ((self.u[f'Fisher_KxD{window}_zero'] * 25) + 25))
+        self.z.assign(f'Fisher_KxD{window}_zero', p0 + (p1 * ((self.u[f'Fisher_KxD{window}_zero'] * 25) + 25)), mask)
 
         # if KxD_diff is negative then sell
         self.z[f'Fisher_KxD{window}_neg'] = p0 + (p1 * ((self.u[f'Fisher_KxD{window}_neg'] * -25) + 25))
     
     
-    def z_total(self):
+    def z_total(self, tail: int = None) -> None:
         """
-        Computes for the total z value for the consequent of the Tsukamoto model
+        Computes for the total z value for the consequent of the Tsukamoto model;
+        this is the weighted average of the consequents by their membership values,
+        where consequents that are missing are left out of the numerator
         
         Arguments:        
             self
                 the instance of the class
+
+            tail: int
+                if given, only the last tail rows are computed; z_sum of the rows
+                before these is left missing
         
         Returns:
+            None
         """
-        # add all u along axis 1 or the column
-        self.u_sum['sum'] = self.u.sum(axis = 1)
-        
-        # initialize z_sum to be 0
-        self.z['z_sum'] = 0.
-        
-        # add all values of z across different technical indicator
-        for col_name in self.u.columns:
-            # produce mask that would remove NANs in the dataframe
-            mask = ~(self.z['z_sum'] + (self.z[f'{col_name}'] * self.u[f'{col_name}'])).isna()
-            
-            # apply mask
-            self.z.loc[mask, 'z_sum'] = self.z['z_sum'] + (self.z[f'{col_name}'] * self.u[f'{col_name}'])
-        
-        try:
-            # compute for the normalized z_sum by u_sum
-            self.df['z_sum'] = self.z['z_sum'] / self.u_sum['sum']
-        except:
-            print('an error occured')
-            return None
\ No newline at end of file
+        rows = slice(None) if tail is None else slice(max(len(self.df.index) - tail, 0), None)
+
+        # the membership values and the consequents of the rules, aligned column by column
+        u = self.u.values[rows]
+        z = self.z.values[rows][..., [self.z.positions[col_name] for col_name in self.u.columns]]
+
+        # add all u along the last axis or the column, skipping missing values
+        self.u_sum[:] = np.nan
+        self.u_sum[rows] = np.where(np.isnan(u), 0., u).sum(axis = -1)
+
+        # add all u*z along the last axis, skipping missing values; the cumulative sum adds
+        # the columns strictly in order, one technical indicator after another
+        uz = z * u
+        self.z_sum[:] = np.nan
+        self.z_sum[rows] = np.nancumsum(uz, axis = -1)[..., -1] if uz.shape[-1] > 0 else 0.
+
+        # compute for the normalized z_sum by u_sum; rows without any membership are missing
+        with np.errstate(divide = 'ignore', invalid = 'ignore'):
+            self.df['z_sum'] = self.z_sum / self.u_sum
@@ -0,0 +1,226 @@
+import inspect
+import math
+from typing import Union
+import numpy as np
+import pandas as pd
+from fuzzy_ta import fuzzy_TA
+
+# The indicators of fuzzy_TA only look back, so the z_sum of the last bars of a stock
+# can be computed from the last bars plus a warm-up instead of the whole history.
+# Rolling windows need exactly window - 1 earlier bars; pandas carries the sums of a
+# rolling mean or variance along the history, so these agree up to the rounding the
+# history accumulated, about 1e-6 on the Bollinger band of penny stocks. Exponentially
+# weighted means and the SAR never forget their start completely; their warm-up is the
+# horizon after which the start has a weight below the tolerance. Indicators that
+# depend on the whole history declare an infinite lookback and are computed over all of it.
+
+# the parabolic SAR restarts at every trend reversal; on the PH stocks, runs started at
+# different bars agreed exactly within 160 bars, so a trading year is used
+PSAR_LOOKBACK = 250
+
+def ema_horizon(alpha:float, tolerance:float, min_periods:int = 0) -> int:
+    """
+    This function computes for the number of bars after which the bars before them have
+    a total weight below the tolerance in an exponentially weighted mean
+
+    Arguments:
+        alpha:float
+            the smoothing factor of the mean
+
+        tolerance:float
+            the weight left to the bars before the horizon
+
+        min_periods:int
+            the minimum number of bars of the mean; the horizon is at least this long
+
+    Returns:
+        horizon:int
+            the number of bars
+    """
+    return max(math.ceil(math.log(tolerance) / math.log(1 - alpha)), min_periods - 1)
+
+def span_horizon(span:int, tolerance:float) -> int:
+    # the horizon of ewm(span = span); ta and fuzzy_TA use min_periods = span
+    return ema_horizon(2 / (span + 1), tolerance, span)
+
+def _RSI_lookback(window:int, tolerance:float, **kwargs) -> int:
+    # the difference of the closing prices, then the smoothed gains and losses
+    return 1 + ema_horizon(1 / window, tolerance, window)
+
+def _StochRSI_lookback(window:int, smooth1:int, smooth2:int, tolerance:float, **kwargs) -> int:
+    return _RSI_lookback(window, tolerance) + (window - 1) + (smooth1 - 1) + (smooth2 - 1)
+
+def _fisher_lookback(window:int, tolerance:float, **kwargs) -> int:
+    # the rolling extremes of the median price, then the smoothing before and after the transform
+    return (window - 1) + span_horizon(5, tolerance) + span_horizon(3, tolerance)
+
+# the number of bars before the first bar of the tail each method of fuzzy_TA needs;
+# the functions take the arguments of the method, with defaults, and the tolerance
+TAIL_LOOKBACKS = {
+    "RSI": _RSI_lookback,
+    "StochRSI": _StochRSI_lookback,
+    "StochRSI_KxD": _StochRSI_lookback,
+    "WilliamsR": lambda window, **kwargs: window - 1,
+    "Ultimate": lambda window1, window2, window3, **kwargs: max(window1, window2, window3),
+    # fuzzy_TA.TSI always computes the 25 and 13 day TSI
+    "TSI": lambda tolerance, **kwargs: 1 + span_horizon(25, tolerance) + span_horizon(13, tolerance),
+    "CMF": lambda window, **kwargs: window - 1,
+    "MFI": lambda window, **kwargs: window,
+    # the OBV is normalized by its sum over the whole history; the sign of the sum
+    # decides which moves of the OBV are gains, so any shorter history may flip the RSI
+    "RSI_OBV": lambda **kwargs: math.inf,
+    "StochOBV_KxD": lambda **kwargs: math.inf,
+    "BB_pband": lambda window, **kwargs: window - 1,
+    "MACD": lambda window_slow, window_sign, tolerance, **kwargs: span_horizon(window_slow, tolerance) + span_horizon(window_sign, tolerance),
+    "CCI": lambda window, **kwargs: window - 1,
+    "STC": lambda window_slow, cycle, smooth1, smooth2, tolerance, **kwargs: (
+        span_horizon(window_slow, tolerance) + (cycle - 1) + span_horizon(smooth1, tolerance) + (cycle - 1) + span_horizon(smooth2, tolerance)),
+    "PSAR": lambda **kwargs: PSAR_LOOKBACK,
+    "Fisher_trans": _fisher_lookback,
+    "Fisher_trans_KxD": lambda smooth2, **kwargs: _fisher_lookback(**kwargs) + (smooth2 - 1),
+}
+
+def lookback(method:str, tolerance:float = 1e-10, **kwargs) -> int:
+    """
+    This function computes for the warm-up of a method of fuzzy_TA
+
+    Arguments:
+        method:str
+            the name of the fuzzy_TA method, e.g. "RSI"; see TAIL_LOOKBACKS
+
+        tolerance:float
+            the weight left to the history before the warm-up
+
+        kwargs
+            the arguments of the fuzzy_TA method
+
+    Returns:
+        bars:Union[int, float]
+            the number of bars needed before the first bar of the tail; math.inf if
+            the method needs the whole history
+    """
+    assert method in TAIL_LOOKBACKS, f"{method} has no declared lookback"
+
+    # resolve the arguments of the method, including its defaults
+    arguments = inspect.signature(getattr(fuzzy_TA, method)).bind(None, **kwargs)
+    arguments.apply_defaults()
+    arguments = dict(list(arguments.arguments.items())[1:])
+    assert not arguments.get("fillna", False), "fillna fills gaps with later values and has no finite lookback"
+
+    return TAIL_LOOKBACKS[method](tolerance = tolerance, **arguments)
+
+def warm_up(rules:list[tuple[str, dict]], z_rolling_window:int = None, tolerance:float = 1e-10) -> int:
+    """
+    This function computes for the warm-up of a rule base
+
+    Arguments:
+        rules:list[tuple[str, dict]]
+            the fuzzy_TA methods and their arguments, e.g. [("RSI", {"window": 14})]
+
+        z_rolling_window:int
+            if given, the window of the rolling mean of z_sum
+
+        tolerance:float
+            the weight left to the history before the warm-up
+
+    Returns:
+        bars:Union[int, float]
+            the number of bars needed before the first bar of the tail; math.inf if
+            the rule base needs the whole history
+    """
+    bars = max([lookback(method, tolerance, **kwargs) for method, kwargs in rules], default = 0)
+    return bars + (z_rolling_window - 1 if z_rolling_window else 0)
+
+def tail_fuzzy_TA(df:pd.DataFrame, rules:list[tuple[str, dict]], bars:int, z_rolling_window:int = None, tolerance:float = 1e-10, **kwargs) -> fuzzy_TA:
+    """
+    This function computes for z_sum, and z_sum_rolling, of the last bars of a stock from
+    the last bars and their warm-up only, so the cost does not grow with the history
+
+    Arguments:
+        df:pd.DataFrame
+            pandas dataframe containing the closing, opening, high, low, and volume of a stock;
+            it is not modified
+
+        rules:list[tuple[str, dict]]
+            the fuzzy_TA methods and their arguments, applied in order
+
+        bars:int
+            the number of bars at the end of the stock data to be computed
+
+        z_rolling_window:int
+            if given, the window of the rolling mean of z_sum, as in get_fuzzy_stock_df
+
+        tolerance:float
+            the weight left to the history before the warm-up
+
+        kwargs
+            passed to fuzzy_TA, e.g. cache
+
+    Returns:
+        stock:fuzzy_TA
+            the fuzzified tail of the stock; z_sum and z_sum_rolling are only computed for
+            the last bars rows and are missing in the warm-up rows before them
+    """
+    start = max(len(df) - bars - warm_up(rules, z_rolling_window, tolerance), 0)
+    stock = fuzzy_TA(df.iloc[int(start):].copy(), **kwargs)
+
+    for method, arguments in rules:
+        getattr(stock, method)(**arguments)
+
+    # the rolling mean of the first bar needs the z_sum of the bars before it
+    stock.z_total(tail = bars + (z_rolling_window - 1 if z_rolling_window else 0))
+    if z_rolling_window:
+        stock.df['z_sum_rolling'] = stock.df['z_sum'].rolling(z_rolling_window).mean()
+    return stock
+
+def verify_tail(df:pd.DataFrame, rules:list[tuple[str, dict]], bars:int, z_rolling_window:int = None, tolerance:float = 1e-10, atol:float = 1e-5) -> float:
+    """
+    This function checks the tail of a rule base against the full history; it is meant to be
+    run once per stock and rule base before the tail is used in live scans
+
+    Arguments:
+        df:pd.DataFrame
+            pandas dataframe containing the closing, opening, high, low, and volume of a stock
+
+        rules:list[tuple[str, dict]]
+            the fuzzy_TA methods and their arguments, applied in order
+
+        bars:int
+            the number of bars at the end of the stock data to be compared
+
+        z_rolling_window:int
+            if given, the window of the rolling mean of z_sum
+
+        tolerance:float
+            the weight left to the history before the warm-up
+
+        atol:float
+            the largest absolute difference allowed between the tail and the full history
+
+    Returns:
+        deviation:float
+            the largest absolute difference of z_sum and z_sum_rolling over the last bars
+    """
+    full = fuzzy_TA(df.copy(), cache = None)
+    for method, arguments in rules:
+        getattr(full, method)(**arguments)
+    full.z_total()
+    if z_rolling_window:
+        full.df['z_sum_rolling'] = full.df['z_sum'].rolling(z_rolling_window).mean()
+
+    tail = tail_fuzzy_TA(df, rules, bars, z_rolling_window, tolerance, cache = None)
+
+    deviation = 0.
+    for column in ['z_sum', 'z_sum_rolling'] if z_rolling_window else ['z_sum']:
+        expected = full.df[column].to_numpy()[-bars:]
+        actual = tail.df[column].to_numpy()[-bars:]
+
+        # a value that is missing in one of them and not in the other is a mismatch
+        if (np.isnan(expected) != np.isnan(actual)).any():
+            deviation = float('inf')
+            break
+        if np.isfinite(expected).any():
+            deviation = max(deviation, float(np.nanmax(np.abs(expected - actual))))
+
+    assert deviation <= atol, f"the tail deviates from the full history by {deviation}"
+    return deviation
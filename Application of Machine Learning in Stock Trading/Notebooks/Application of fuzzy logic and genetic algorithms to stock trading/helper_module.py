@@ -1,6 +1,7 @@
-import copy
 import math
+import random
 import pandas as pd
+from typing import Union
 
 # create a function that splits the data into train and test sets
 def split_train_test_sets(series: pd.DataFrame) -> (pd.DataFrame, pd.DataFrame):
@@ -19,7 +20,59 @@ def split_train_test_sets(series: pd.DataFrame) -> (pd.DataFrame, pd.DataFrame):
     train, test = series[1:-math.floor(len(series)*0.2)], series[-math.floor(len(series)*0.2):]
     return train, test
 
-def split_train_set(series:pd.DataFrame, window:int = 500) -> list[pd.DataFrame]:
+class SlidingWindows():
+    """
+    This class provides the training windows of a time series without copying them; it
+    keeps the series once, and a window is the slice of the rows from its start to its
+    start plus the window length. A window shares the memory of the series, so it should
+    be copied before it is modified in place. The windows pickle as the series and the
+    window length, so sending them to a worker costs the size of the series only.
+    """
+
+    def __init__(self, series:pd.DataFrame, window:int = 500) -> None:
+        """
+        This function initializes the windows
+
+        Arguments:
+            series:pd.DataFrame
+                the time series the windows are sliced from
+
+            window:int
+                the number of rows of each window
+
+        Returns:
+            None
+        """
+        assert window > 0, "the window length should be positive"
+        self.series = series
+        self.window = window
+
+    def bounds(self, idx:int) -> tuple[int, int]:
+        # the start and stop rows of a window in the series
+        if idx < 0:
+            idx += len(self)
+        assert 0 <= idx < len(self), f"window {idx} is out of range"
+        return idx, idx + self.window
+
+    def sample(self, num_windows:int = 1) -> list[int]:
+        # the ids of distinct windows picked at random, in order
+        return sorted(random.sample(range(len(self)), num_windows))
+
+    def __getitem__(self, idx:Union[int, slice]) -> Union[pd.DataFrame, list[pd.DataFrame]]:
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+        start, stop = self.bounds(idx)
+        return self.series.iloc[start:stop]
+
+    def __iter__(self):
+        for idx in range(len(self)):
+            yield self[idx]
+
+    def __len__(self) -> int:
+        # the last window of the series is left out, as in the list of windows it replaces
+        return max(len(self.series) - self.window, 0)
+
+def split_train_set(series:pd.DataFrame, window:int = 500) -> SlidingWindows:
     """
     This function splits or slices the train set into batches with a corresponding window length
 
@@ -27,11 +80,12 @@ def split_train_set(series:pd.DataFrame, window:int = 500) -> list[pd.DataFrame]
         series:pd.DataFrame
             a pandas dataframe containing the training set of the 
 
+        window:int
+            the number of rows of each batch
+
     Returns:
-        train_set:list[pd.DataFrame]
-            a list containing multiple pandas dataframes
+        train_set:SlidingWindows
+            the windows of the training set; each window is a slice of series that is
+            only made when it is indexed
     """
-    train_set = list()
-    for i in range(len(series)-window):
-        train_set.append(copy.deepcopy(series[i:i+window]))
-    return train_set
\ No newline at end of file
+    return SlidingWindows(series, window)
\ No newline at end of file
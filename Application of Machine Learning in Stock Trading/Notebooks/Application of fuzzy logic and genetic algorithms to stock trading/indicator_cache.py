@@ -0,0 +1,169 @@
+from collections import OrderedDict
+import hashlib
+import pandas as pd
+
+# the columns of the stock data that the technical indicators are computed from
+PRICE_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+class IndicatorCache():
+    """
+    This class provides a size-bounded, least recently used (LRU) store of raw
+    technical indicator series. An entry is keyed by the fingerprint of the stock
+    data, the name of the indicator, and the parameters of the indicator, so genomes
+    that share the same indicator parameters on the same training slice only compute
+    the indicator once.
+    """
+
+    def __init__(self, max_entries:int = 1024, max_bytes:int = 256 * 1024**2) -> None:
+        """
+        This function initializes the cache
+
+        Arguments:
+            max_entries:int
+                the maximum number of indicator series kept in the cache
+
+            max_bytes:int
+                the maximum total size, in bytes, of the indicator series kept in the cache
+
+        Returns:
+            None
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.store = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def fingerprint(df:pd.DataFrame) -> str:
+        """
+        This function computes for the fingerprint of the stock data; two dataframes
+        with the same dates and prices have the same fingerprint
+
+        Arguments:
+            df:pd.DataFrame
+                pandas dataframe containing the closing, opening, high, low, and volume of a stock
+
+        Returns:
+            fingerprint:str
+                a hex digest identifying the contents of the dataframe
+        """
+        columns = [column for column in PRICE_COLUMNS if column in df.columns]
+        row_hashes = pd.util.hash_pandas_object(df[columns], index = True).to_numpy()
+        digest = hashlib.blake2b(row_hashes.tobytes(), digest_size = 16)
+        digest.update(",".join(columns).encode())
+        return digest.hexdigest()
+
+    def get_or_compute(self, fingerprint:str, name:str, params:tuple, compute:callable) -> pd.Series:
+        """
+        This function returns the cached indicator series if it exists;
+        otherwise, it computes the series, stores it, and returns it.
+        The returned series is shared between callers and should not be modified in place.
+
+        Arguments:
+            fingerprint:str
+                the fingerprint of the stock data the indicator is computed from
+
+            name:str
+                the name of the indicator
+
+            params:tuple
+                the parameters of the indicator; these should be hashable
+
+            compute:callable
+                a function with no arguments that computes the indicator series
+
+        Returns:
+            series:pd.Series
+                the indicator series
+        """
+        key = (fingerprint, name, params)
+
+        # on a hit, mark the entry as the most recently used
+        if key in self.store:
+            self.hits += 1
+            self.store.move_to_end(key)
+            return self.store[key]
+
+        # on a miss, compute the indicator and store it
+        self.misses += 1
+        series = compute()
+        self.store[key] = series
+        self.nbytes += series.memory_usage(index = False, deep = False)
+        self._evict()
+        return series
+
+    def _evict(self) -> None:
+        """
+        This function removes the least recently used entries until the cache is within its bounds
+
+        Arguments:
+            self
+                the instance of the class
+
+        Returns:
+            None
+        """
+        while len(self.store) > 1 and (len(self.store) > self.max_entries or self.nbytes > self.max_bytes):
+            _, series = self.store.popitem(last = False)
+            self.nbytes -= series.memory_usage(index = False, deep = False)
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        """
+        This function returns the hit and miss counters of the cache
+
+        Arguments:
+            self
+                the instance of the class
+
+        Returns:
+            stats:dict
+                the number of hits, misses, evictions, and entries, and the hit rate of the cache
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups > 0 else 0.,
+            "evictions": self.evictions,
+            "entries": len(self.store),
+            "nbytes": self.nbytes
+        }
+
+    def reset_stats(self) -> None:
+        """
+        This function resets the hit and miss counters, e.g. at the start of a generation
+
+        Arguments:
+            self
+                the instance of the class
+
+        Returns:
+            None
+        """
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def clear(self) -> None:
+        """
+        This function removes all entries from the cache
+
+        Arguments:
+            self
+                the instance of the class
+
+        Returns:
+            None
+        """
+        self.store.clear()
+        self.nbytes = 0
+
+    def __len__(self) -> int:
+        return len(self.store)
+
+# the cache shared by all fuzzy_TA instances in a process
+indicator_cache = IndicatorCache()
@@ -0,0 +1,247 @@
+import os
+from typing import Union
+import numpy as np
+import pandas as pd
+import ta
+from indicator_cache import IndicatorCache
+from fuzzy_ta import fuzzy_TA
+
+# the windowed indicators of fuzzy_TA that can be precomputed for every window;
+# each entry maps the indicator name used by fuzzy_TA to the parameters other than the window
+# (in the order fuzzy_TA uses them) and to a function computing the indicator for one window
+WINDOWED_INDICATORS = {
+    "RSI": (
+        (False,),
+        lambda df, window: ta.momentum.RSIIndicator(close = df['Close'], window = window, fillna = False).rsi()),
+    "StochRSI_d": (
+        (3, 3, False),
+        lambda df, window: ta.momentum.StochRSIIndicator(close = df['Close'], window = window, smooth1 = 3, smooth2 = 3, fillna = False).stochrsi_d()),
+    "WilliamsR": (
+        (False,),
+        lambda df, window: ta.momentum.WilliamsRIndicator(high = df['High'], low = df['Low'], close = df['Close'], lbp = window, fillna = False).williams_r()),
+    "CMF": (
+        (False,),
+        lambda df, window: ta.volume.chaikin_money_flow(high = df['High'], low = df['Low'], close = df['Close'], volume = df['Volume'], window = window, fillna = False)),
+    "MFI": (
+        (False,),
+        lambda df, window: ta.volume.MFIIndicator(high = df['High'], low = df['Low'], close = df['Close'], volume = df['Volume'], window = window, fillna = False).money_flow_index()),
+    "BB_pband": (
+        (2, False),
+        lambda df, window: ta.volatility.bollinger_pband(close = df['Close'], window = window, window_dev = 2, fillna = False)),
+    "CCI": (
+        (0.0015, False),
+        lambda df, window: ta.trend.CCIIndicator(high = df['High'], low = df['Low'], close = df['Close'], window = window, constant = 0.0015, fillna = False).cci()),
+    "Fisher": (
+        (True,),
+        lambda df, window: fuzzy_TA(df, cache = None)._fisher(window = window, adjust = True)),
+}
+
+class IndicatorTensor():
+    """
+    This class provides a (windows x T) matrix holding an indicator of one stock
+    computed for every window in the search space of the genetic algorithm. The matrix
+    is stored as a memory-mapped .npy file, so fitness evaluation only slices a row.
+
+    The rows are computed over the whole history of the stock, so a slice of a row
+    is the indicator of a training window already warmed up by the preceding history.
+    """
+
+    def __init__(self, path:str, index:pd.Index, name:str, params:tuple, min_window:int) -> None:
+        """
+        This function initializes the class from an existing tensor file
+
+        Arguments:
+            path:str
+                the path of the .npy file containing the matrix
+
+            index:pd.Index
+                the dates of the stock data; these label the columns of the matrix
+
+            name:str
+                the name of the indicator as used by fuzzy_TA
+
+            params:tuple
+                the parameters of the indicator other than the window
+
+            min_window:int
+                the window of the first row of the matrix
+
+        Returns:
+            None
+        """
+        self.path = path
+        self.index = index
+        self.name = name
+        self.params = params
+        self.min_window = min_window
+        self.matrix = np.load(path, mmap_mode = 'r')
+        self.max_window = min_window + self.matrix.shape[0] - 1
+
+    def covers(self, name:str, params:tuple) -> bool:
+        """
+        This function checks if the tensor holds the indicator with the given fuzzy_TA parameters
+
+        Arguments:
+            name:str
+                the name of the indicator
+
+            params:tuple
+                the parameters of the indicator starting with the window
+
+        Returns:
+            covers:bool
+                True if the indicator can be sliced from the tensor
+        """
+        return (name == self.name
+                and tuple(params[1:]) == self.params
+                and self.min_window <= params[0] <= self.max_window)
+
+    def row(self, window:int) -> np.ndarray:
+        """
+        This function returns the indicator of the whole history for one window
+
+        Arguments:
+            window:int
+                the window of the indicator
+
+        Returns:
+            row:np.ndarray
+                a read-only view of the row of the matrix
+        """
+        return self.matrix[window - self.min_window]
+
+    def lookup(self, window:int, index:pd.Index) -> Union[pd.Series, None]:
+        """
+        This function slices the indicator of a contiguous section of the history
+
+        Arguments:
+            window:int
+                the window of the indicator
+
+            index:pd.Index
+                the dates of the section, e.g. the index of a training window
+
+        Returns:
+            series:Union[pd.Series, None]
+                the indicator over the section; None if the section is not part of the history
+        """
+        if len(index) == 0 or index[0] not in self.index:
+            return None
+
+        # check that the section is a contiguous part of the history
+        start = self.index.get_loc(index[0])
+        stop = start + len(index)
+        if stop > len(self.index) or self.index[stop - 1] != index[-1]:
+            return None
+
+        return pd.Series(self.row(window)[start:stop], index = index)
+
+    def __getstate__(self) -> dict:
+        # only send the path to worker processes; the matrix is mapped again on unpickling
+        state = self.__dict__.copy()
+        del state['matrix']
+        return state
+
+    def __setstate__(self, state:dict) -> None:
+        self.__dict__.update(state)
+        self.matrix = np.load(self.path, mmap_mode = 'r')
+
+class IndicatorTensorStore():
+    """
+    This class provides a collection of indicator tensors of one stock;
+    fuzzy_TA slices the indicators from here before it looks them up in the cache
+    """
+
+    def __init__(self, tensors:list[IndicatorTensor] = None) -> None:
+        """
+        This function initializes the class
+
+        Arguments:
+            tensors:list[IndicatorTensor]
+                the indicator tensors of the stock
+
+        Returns:
+            None
+        """
+        self.tensors = tensors if tensors is not None else list()
+
+    @classmethod
+    def build(cls, df:pd.DataFrame, directory:str, ticker:str, names:tuple[str] = ("RSI",), min_window:int = 1, max_window:int = 300) -> "IndicatorTensorStore":
+        """
+        This function precomputes the indicator tensors of a stock, or maps them if they
+        already exist for the same data
+
+        Arguments:
+            df:pd.DataFrame
+                pandas dataframe containing the closing, opening, high, low, and volume of a stock
+
+            directory:str
+                the directory where the tensor files are written
+
+            ticker:str
+                the ticker of the stock; this is used in the name of the files
+
+            names:tuple[str]
+                the names of the indicators to be precomputed, as a tuple or a list; see WINDOWED_INDICATORS
+
+            min_window:int
+                the smallest window to be precomputed
+
+            max_window:int
+                the largest window to be precomputed
+
+        Returns:
+            store:IndicatorTensorStore
+                the store containing the tensors of the stock
+        """
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+
+        # the fingerprint of the data is part of the file names, so stale files are never mapped
+        fingerprint = IndicatorCache.fingerprint(df)
+        tensors = list()
+        for name in names:
+            params, compute = WINDOWED_INDICATORS[name]
+            path = os.path.join(directory, f"{ticker}_{name}_{min_window}-{max_window}_{fingerprint}.npy")
+            if not os.path.exists(path):
+                # write to a temporary file first so an interrupted run never leaves a partial tensor
+                temp_path = path + ".tmp"
+                matrix = np.lib.format.open_memmap(temp_path, mode = 'w+', dtype = np.float64, shape = (max_window - min_window + 1, len(df)))
+                for window in range(min_window, max_window + 1):
+                    matrix[window - min_window] = compute(df, window).to_numpy(dtype = np.float64)
+                matrix.flush()
+                del matrix
+                os.replace(temp_path, path)
+            tensors.append(IndicatorTensor(path = path, index = df.index, name = name, params = params, min_window = min_window))
+
+        return cls(tensors)
+
+    def lookup(self, name:str, params:tuple, index:pd.Index) -> Union[pd.Series, None]:
+        """
+        This function slices an indicator from the tensors of the store
+
+        Arguments:
+            name:str
+                the name of the indicator
+
+            params:tuple
+                the parameters of the indicator starting with the window
+
+            index:pd.Index
+                the dates of the section of the history
+
+        Returns:
+            series:Union[pd.Series, None]
+                the indicator over the section; None if no tensor holds the indicator
+        """
+        for tensor in self.tensors:
+            if tensor.covers(name, params):
+                return tensor.lookup(params[0], index)
+        return None
+
+    def key(self) -> str:
+        # the paths of the tensor files, which hold the fingerprint of the data they were computed from
+        return "|".join(tensor.path for tensor in self.tensors)
+
+    def __len__(self) -> int:
+        return len(self.tensors)
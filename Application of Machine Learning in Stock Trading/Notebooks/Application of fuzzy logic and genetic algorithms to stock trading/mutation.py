@@ -0,0 +1,262 @@
+import math
+import numpy as np
+from population_array import GenomeLayout, GENE_WIDTHS
+
+# the coefficients of the rational approximation of the inverse normal distribution
+# function by P. J. Acklam, with a relative error below 1.2e-9 before refinement
+_ACKLAM_A = [-3.969683028665376e+01, 2.209460984245205e+02, -2.759285104469687e+02, 1.383577518672690e+02, -3.066479806614716e+01, 2.506628277459239e+00]
+_ACKLAM_B = [-5.447609879822406e+01, 1.615858368580409e+02, -1.556989798598866e+02, 6.680131188771972e+01, -1.328068155288572e+01]
+_ACKLAM_C = [-7.784894002430293e-03, -3.223964580411365e-01, -2.400758277161838e+00, -2.549732539343734e+00, 4.374664141464968e+00, 2.938163982698783e+00]
+_ACKLAM_D = [7.784695709041462e-03, 3.224671290700398e-01, 2.445134137142996e+00, 3.754408661907416e+00]
+
+_erfc = np.frompyfunc(math.erfc, 1, 1)
+
+def normal_cdf(x:np.ndarray) -> np.ndarray:
+    # the standard normal distribution function, exact in the lower tail
+    return 0.5 * _erfc(-np.asarray(x, dtype = np.float64) / math.sqrt(2)).astype(np.float64)
+
+def normal_ppf(p:np.ndarray) -> np.ndarray:
+    """
+    This function computes for the inverse of the standard normal distribution function
+
+    Arguments:
+        p:np.ndarray
+            the probabilities, in (0, 1)
+
+    Returns:
+        x:np.ndarray
+            the quantiles of the standard normal distribution
+    """
+    p = np.clip(np.asarray(p, dtype = np.float64), 1e-300, 1 - 1e-16)
+
+    # the rational approximation of the central region, and of the tails
+    q = p - 0.5
+    r = q * q
+    numerator = ((((_ACKLAM_A[0] * r + _ACKLAM_A[1]) * r + _ACKLAM_A[2]) * r + _ACKLAM_A[3]) * r + _ACKLAM_A[4]) * r + _ACKLAM_A[5]
+    denominator = ((((_ACKLAM_B[0] * r + _ACKLAM_B[1]) * r + _ACKLAM_B[2]) * r + _ACKLAM_B[3]) * r + _ACKLAM_B[4]) * r + 1
+    central = numerator * q / denominator
+
+    t = np.sqrt(-2 * np.log(np.minimum(p, 1 - p)))
+    numerator = ((((_ACKLAM_C[0] * t + _ACKLAM_C[1]) * t + _ACKLAM_C[2]) * t + _ACKLAM_C[3]) * t + _ACKLAM_C[4]) * t + _ACKLAM_C[5]
+    denominator = (((_ACKLAM_D[0] * t + _ACKLAM_D[1]) * t + _ACKLAM_D[2]) * t + _ACKLAM_D[3]) * t + 1
+    tail = np.where(q < 0, 1, -1) * numerator / denominator
+    x = np.where(np.abs(q) < 0.5 - 0.02425, central, tail)
+
+    # refine the approximation to double precision with one step of Halley's method
+    error = normal_cdf(x) - p
+    step = error * math.sqrt(2 * math.pi) * np.exp(0.5 * x * x)
+    return x - step / (1 + 0.5 * x * step)
+
+def truncated_normal(rng:np.random.Generator, lower:np.ndarray, upper:np.ndarray) -> np.ndarray:
+    """
+    This function draws standard normal values truncated to open intervals by inverting the
+    distribution function, so every draw is accepted
+
+    Arguments:
+        rng:np.random.Generator
+            the random number generator
+
+        lower:np.ndarray
+            the lower ends of the intervals
+
+        upper:np.ndarray
+            the upper ends of the intervals; each greater than its lower end
+
+    Returns:
+        values:np.ndarray
+            one value strictly within each interval
+    """
+    lower = np.asarray(lower, dtype = np.float64)
+    upper = np.asarray(upper, dtype = np.float64)
+
+    # an interval above zero is drawn as its mirror image below zero, where the
+    # distribution function is exact
+    flip = lower > 0
+    low = np.where(flip, -upper, lower)
+    high = np.where(flip, -lower, upper)
+
+    cdf_low = normal_cdf(low)
+    cdf_high = normal_cdf(high)
+    values = normal_ppf(cdf_low + rng.random(low.shape) * (cdf_high - cdf_low))
+    values = _inside(values, low, high)
+    return np.where(flip, -values, values)
+
+def _inside(values:np.ndarray, lower:np.ndarray, upper:np.ndarray) -> np.ndarray:
+    # move the values rounded onto, or past, an end of their open interval just inside it
+    return np.minimum(np.maximum(values, np.nextafter(lower, np.inf)), np.nextafter(upper, -np.inf))
+
+class MutationEngine():
+    """
+    This class provides the initialization and mutation of the genes of a population array,
+    drawn from a seeded numpy Generator for all genes and genomes at once. Gene.initialize_gene
+    and Gene.mutate redraw a gene until it is within its bounds and its nodes are increasing;
+    here every draw is taken from a distribution that only holds valid genes, so the cost of
+    a mutation does not depend on how close the genes are to their bounds.
+
+    A gene is initialized as in Gene.initialize_gene: an int or float gene uniformly within
+    its bounds, the left node of a two-node gene uniformly and its right node uniformly above
+    it, and the middle node of a triangular membership uniformly with its left and right
+    nodes uniformly below and above it. A gene is mutated as in Gene.mutate: with probability
+    mutation_rate, it is either initialized again or moved by a normal step of unit standard
+    deviation. The normal step is truncated to the bounds of the gene, strictly inside them,
+    with an int gene rounded up as in Gene.mutate; the nodes of a membership function or an
+    entry condition are stepped from left to right, each truncated to lie above the node
+    before it.
+    """
+
+    def __init__(self, layout:GenomeLayout, mutation_rate:float = 0.1, seed:int = None) -> None:
+        """
+        This function initializes the engine
+
+        Arguments:
+            layout:GenomeLayout
+                the layout of the genes
+
+            mutation_rate:float
+                the probability that a gene is mutated
+
+            seed:int
+                the seed of the random number generator; None seeds it from the system
+
+        Returns:
+            None
+        """
+        self.layout = layout
+        self.mutation_rate = mutation_rate
+        self.rng = np.random.default_rng(seed)
+
+        # the genes of each kind, by their position in the genome
+        types = np.array(layout.types)
+        self.int_genes = np.flatnonzero(types == "int")
+        self.float_genes = np.flatnonzero(types == "float")
+        self.triangular_genes = np.flatnonzero(types == "triangular_membership")
+        self.pair_genes = np.flatnonzero((types == "linear_membership") | (types == "entry_condition"))
+        self.widths = np.array([GENE_WIDTHS[type] for type in layout.types])
+        assert (layout.upper[layout.starts[self.int_genes]] - layout.lower[layout.starts[self.int_genes]] >= 2).all(), "an int gene needs a value strictly within its bounds"
+
+    def _select(self, mask:np.ndarray, genes:np.ndarray) -> (np.ndarray, np.ndarray):
+        # the rows and the first columns of the selected genes of a kind
+        rows, idx = np.nonzero(mask[:, genes])
+        return rows, self.layout.starts[genes[idx]]
+
+    def _uniform(self, lower:np.ndarray, upper:np.ndarray) -> np.ndarray:
+        # uniform values strictly within their intervals
+        return _inside(self.rng.uniform(lower, upper), lower, upper)
+
+    def initialize_genes(self, values:np.ndarray, mask:np.ndarray) -> np.ndarray:
+        """
+        This function initializes the selected genes of a population in place
+
+        Arguments:
+            values:np.ndarray
+                the (genomes x width) values of the population
+
+            mask:np.ndarray
+                the (genomes x genes) genes to be initialized
+
+        Returns:
+            values:np.ndarray
+                the values, with the selected genes initialized
+        """
+        lower, upper = self.layout.lower, self.layout.upper
+
+        rows, columns = self._select(mask, self.int_genes)
+        values[rows, columns] = self.rng.integers(lower[columns], upper[columns], endpoint = True)
+
+        rows, columns = self._select(mask, self.float_genes)
+        values[rows, columns] = self.rng.uniform(lower[columns], upper[columns])
+
+        # the right node is drawn above the left node
+        rows, columns = self._select(mask, self.pair_genes)
+        left = self._uniform(lower[columns], upper[columns])
+        values[rows, columns] = left
+        values[rows, columns + 1] = self._uniform(left, upper[columns])
+
+        # the left and right nodes are drawn below and above the middle node
+        rows, columns = self._select(mask, self.triangular_genes)
+        middle = self._uniform(lower[columns], upper[columns])
+        values[rows, columns] = self._uniform(lower[columns], middle)
+        values[rows, columns + 1] = middle
+        values[rows, columns + 2] = self._uniform(middle, upper[columns])
+        return values
+
+    def initialize(self, num_genomes:int) -> np.ndarray:
+        """
+        This function initializes the genes of new genomes
+
+        Arguments:
+            num_genomes:int
+                the number of genomes
+
+        Returns:
+            values:np.ndarray
+                the (genomes x width) values of the genomes
+        """
+        values = np.zeros((num_genomes, self.layout.width))
+        return self.initialize_genes(values, np.ones((num_genomes, len(self.layout.names)), dtype = bool))
+
+    def step_genes(self, values:np.ndarray, mask:np.ndarray) -> np.ndarray:
+        """
+        This function moves the selected genes of a population by a truncated normal step in place
+
+        Arguments:
+            values:np.ndarray
+                the (genomes x width) values of the population
+
+            mask:np.ndarray
+                the (genomes x genes) genes to be moved
+
+        Returns:
+            values:np.ndarray
+                the values, with the selected genes moved
+        """
+        lower, upper = self.layout.lower, self.layout.upper
+        rows, columns = np.nonzero(mask)
+        columns = self.layout.starts[columns]
+        widths = self.widths[self.layout.gene_index[columns]]
+        integer = self.layout.integer[columns]
+
+        # an int gene is rounded up, so its step ends strictly above the lower bound and
+        # below the upper bound less one; the nodes of a gene are stepped from left to
+        # right, each above the node before it
+        floor = lower[columns]
+        ceiling = upper[columns] - integer
+        for node in range(widths.max(initial = 0)):
+            stepping = widths > node
+            node_rows, node_columns = rows[stepping], columns[stepping] + node
+            node_floor, node_ceiling = floor[stepping], ceiling[stepping]
+            current = values[node_rows, node_columns]
+            stepped = current + truncated_normal(self.rng, node_floor - current, node_ceiling - current)
+            values[node_rows, node_columns] = _inside(stepped, node_floor, node_ceiling)
+            floor[stepping] = values[node_rows, node_columns]
+
+        values[rows[integer], columns[integer]] = np.ceil(values[rows[integer], columns[integer]])
+        return values
+
+    def mutate(self, values:np.ndarray, rows:np.ndarray = None) -> np.ndarray:
+        """
+        This function mutates the genes of a population in place, as Genome.mutate does for each genome
+
+        Arguments:
+            values:np.ndarray
+                the (genomes x width) values of the population
+
+            rows:np.ndarray
+                the rows of the genomes to be mutated; every row if not given
+
+        Returns:
+            values:np.ndarray
+                the values, with the mutated genes changed
+        """
+        num_genes = len(self.layout.names)
+        mask = np.zeros((len(values), num_genes), dtype = bool)
+        selected = np.arange(len(values)) if rows is None else np.asarray(rows)
+
+        # each gene is mutated with probability mutation_rate, half of them by initializing them again
+        mutated = self.rng.random((len(selected), num_genes)) <= self.mutation_rate
+        uniform = mutated & (self.rng.random((len(selected), num_genes)) < 0.5)
+
+        mask[selected] = uniform
+        self.initialize_genes(values, mask)
+        mask[selected] = mutated & ~uniform
+        return self.step_genes(values, mask)
@@ -0,0 +1,301 @@
+import sys
+import numpy as np
+from Gene import Gene
+from Genome import Genome
+from Population import Population
+from typing import Union
+
+# the number of values, or columns, of each type of gene
+GENE_WIDTHS = {
+    "int": 1,
+    "float": 1,
+    "linear_membership": 2,
+    "triangular_membership": 3,
+    "entry_condition": 2,
+}
+
+# the code of each type of gene in the type codes of the columns
+TYPE_CODES = {name: code for code, name in enumerate(GENE_WIDTHS)}
+
+class GenomeLayout():
+    """
+    This class provides the layout of the genes of a genome in a row of values: the
+    columns of each gene, and the bounds, type code, and gene of each column. A gene
+    with several values, e.g. a membership function, takes consecutive columns whose
+    values must not decrease; the operators keep them increasing, but the seed genome
+    has an entry condition of two equal values.
+    """
+
+    def __init__(self, gene_list:list[Gene]) -> None:
+        """
+        This function initializes the layout from the genes of a genome, e.g. base_genome()
+
+        Arguments:
+            gene_list:list[Gene]
+                the genes of the genome; their values are not used
+
+        Returns:
+            None
+        """
+        assert len(gene_list) > 0, "the genome has no genes"
+        self.names = [gene.name for gene in gene_list]
+        assert len(set(self.names)) == len(self.names), "the names of the genes should be unique"
+
+        # the operators compare the types by identity, so the types are kept interned
+        self.types = [sys.intern(gene.type) for gene in gene_list]
+        self.lower_bounds = [gene.lower_bound for gene in gene_list]
+        self.upper_bounds = [gene.upper_bound for gene in gene_list]
+
+        # compute for the columns of each gene
+        self.slices = dict()
+        start = 0
+        for name, type in zip(self.names, self.types):
+            assert type in GENE_WIDTHS, f"{type} is not a known type of gene"
+            self.slices[name] = slice(start, start + GENE_WIDTHS[type])
+            start += GENE_WIDTHS[type]
+        self.width = start
+        self.starts = np.array([self.slices[name].start for name in self.names])
+
+        # compute for the descriptors of each column
+        self.gene_index = np.concatenate([np.full(GENE_WIDTHS[type], idx) for idx, type in enumerate(self.types)])
+        self.type_codes = np.array([TYPE_CODES[self.types[idx]] for idx in self.gene_index], dtype = np.int8)
+        self.lower = np.array([self.lower_bounds[idx] for idx in self.gene_index], dtype = np.float64)
+        self.upper = np.array([self.upper_bounds[idx] for idx in self.gene_index], dtype = np.float64)
+        self.integer = self.type_codes == TYPE_CODES["int"]
+
+        # the columns of the genes whose values must not decrease, and each pair of
+        # consecutive columns among them, so the order is checked in one step
+        self.ordered = [np.arange(self.width)[self.slices[name]] for name, type in zip(self.names, self.types) if GENE_WIDTHS[type] > 1]
+        self.previous = np.array([column for columns in self.ordered for column in columns[:-1]], dtype = np.int64)
+        self.next = self.previous + 1
+
+    def is_valid(self, values:np.ndarray) -> np.ndarray:
+        """
+        This function checks the rows of values against the bounds and the order of the genes
+
+        Arguments:
+            values:np.ndarray
+                the (genomes x width) values
+
+        Returns:
+            valid:np.ndarray
+                True for each row within the bounds whose multi-valued genes do not decrease
+        """
+        values = np.atleast_2d(values)
+        valid = ((values >= self.lower) & (values <= self.upper)).all(axis = 1)
+        valid &= (values[:, self.integer] == np.floor(values[:, self.integer])).all(axis = 1)
+        valid &= (values[:, self.next] >= values[:, self.previous]).all(axis = 1)
+        return valid
+
+    def key(self) -> tuple:
+        # the names, types, and bounds of the genes, which identify the layout
+        return tuple(zip(self.names, self.types, self.lower_bounds, self.upper_bounds))
+
+    def __eq__(self, other:object) -> bool:
+        return isinstance(other, GenomeLayout) and self.key() == other.key()
+
+    def __setstate__(self, state:dict) -> None:
+        # unpickled strings are not interned
+        self.__dict__.update(state)
+        self.types = [sys.intern(type) for type in self.types]
+
+class GeneView(Gene):
+    """
+    This class provides a gene whose value is read from, and written to, its columns in
+    a row of a population array. A copy of the view, or a pickled view, is a plain Gene
+    holding the value of the view at the time.
+    """
+
+    def __init__(self, row:np.ndarray, layout:GenomeLayout, idx:int) -> None:
+        """
+        This function initializes the view
+
+        Arguments:
+            row:np.ndarray
+                the values of the genome in the population array
+
+            layout:GenomeLayout
+                the layout of the row
+
+            idx:int
+                the position of the gene in the genome
+
+        Returns:
+            None
+        """
+        # a view has no gene id of its own, so the ids of the genes are not used up
+        self.gene_id = None
+        self.name = layout.names[idx]
+        self.lower_bound = layout.lower_bounds[idx]
+        self.upper_bound = layout.upper_bounds[idx]
+        self.type = layout.types[idx]
+        self.row = row
+        self.columns = layout.slices[self.name]
+
+    @property
+    def value(self) -> Union[int, float, list[float]]:
+        values = self.row[self.columns]
+        if len(values) > 1:
+            return [float(value) for value in values]
+        return int(values[0]) if self.type == "int" else float(values[0])
+
+    @value.setter
+    def value(self, value:Union[int, float, list[int], list[float]]) -> None:
+        assert value is not None, "a gene of a population array always has a value"
+        self.row[self.columns] = np.asarray(value, dtype = np.float64).reshape(-1)
+
+    def __reduce__(self) -> tuple:
+        # copies and pickles are detached from the population array
+        return (Gene, (self.name, self.lower_bound, self.upper_bound, self.type, self.value))
+
+class PopulationArray():
+    """
+    This class provides a population whose gene values are stored in one (genomes x width)
+    array, laid out by a GenomeLayout, with one genome id per row. Selecting or combining
+    genomes slices the array instead of copying Genome and Gene objects; the genomes are
+    exposed as Genome objects whose genes are views of their row, for the code that works
+    on genomes.
+    """
+
+    def __init__(self, layout:GenomeLayout, values:np.ndarray = None, genome_ids:np.ndarray = None) -> None:
+        """
+        This function initializes the population
+
+        Arguments:
+            layout:GenomeLayout
+                the layout of the genes in a row
+
+            values:np.ndarray
+                the (genomes x width) gene values; no genomes if not given
+
+            genome_ids:np.ndarray
+                the id of each genome; new ids if not given
+
+        Returns:
+            None
+        """
+        self.population_id = next(Population.population_id)
+        self.layout = layout
+        self.values = np.zeros((0, layout.width)) if values is None else np.asarray(values, dtype = np.float64)
+        assert self.values.ndim == 2 and self.values.shape[1] == layout.width, "the values do not match the layout"
+        if genome_ids is None:
+            genome_ids = [next(Genome.genome_id) for _ in range(len(self.values))]
+        self.genome_ids = np.asarray(genome_ids, dtype = np.int64)
+        assert len(self.genome_ids) == len(self.values), "every genome needs an id"
+
+    @classmethod
+    def from_genomes(cls, genome_list:list[Genome], layout:GenomeLayout = None) -> "PopulationArray":
+        """
+        This function packs the gene values of genomes into a population array
+
+        Arguments:
+            genome_list:list[Genome]
+                the genomes; their genes are matched to the layout by name
+
+            layout:GenomeLayout
+                the layout of the genes; the layout of the first genome if not given
+
+        Returns:
+            population:PopulationArray
+                the population holding a copy of the gene values, and the ids of the genomes
+        """
+        if layout is None:
+            assert len(genome_list) > 0, "the layout of an empty population should be given"
+            layout = GenomeLayout(genome_list[0].genome)
+
+        values = np.empty((len(genome_list), layout.width))
+        for row, genome in zip(values, genome_list):
+            genes = {gene.name: gene for gene in genome.genome}
+            for name in layout.names:
+                assert genes[name].value is not None, f"the gene {name} has no value"
+                row[layout.slices[name]] = genes[name].value
+        return cls(layout, values, [genome.genome_id for genome in genome_list])
+
+    @classmethod
+    def from_population(cls, population:Population, layout:GenomeLayout = None) -> "PopulationArray":
+        # a population of Genome objects, packed into an array
+        return cls.from_genomes(population.population, layout)
+
+    @classmethod
+    def concatenate(cls, populations:list["PopulationArray"]) -> "PopulationArray":
+        """
+        This function joins the genomes of population arrays of the same layout
+
+        Arguments:
+            populations:list[PopulationArray]
+                the populations to be joined, in order
+
+        Returns:
+            population:PopulationArray
+                the population holding the genomes of all populations
+        """
+        assert len(populations) > 0, "there are no populations to be joined"
+        layout = populations[0].layout
+        assert all(population.layout == layout for population in populations), "the populations have different layouts"
+        return cls(layout, np.concatenate([population.values for population in populations]), np.concatenate([population.genome_ids for population in populations]))
+
+    def genome(self, idx:int) -> Genome:
+        """
+        This function returns a genome of the population
+
+        Arguments:
+            idx:int
+                the row of the genome
+
+        Returns:
+            genome:Genome
+                a genome whose genes are views of the row; changing a gene changes the row
+        """
+        row = self.values[idx]
+        genome = Genome([GeneView(row, self.layout, gene_idx) for gene_idx in range(len(self.layout.names))])
+        genome.genome_id = int(self.genome_ids[idx])
+        return genome
+
+    @property
+    def population(self) -> list[Genome]:
+        # the genomes, as in Population.population
+        return [self.genome(idx) for idx in range(len(self))]
+
+    def to_population(self) -> Population:
+        # a Population of the genomes; the genes are views of the rows
+        return Population(self.population)
+
+    def unique(self) -> ("PopulationArray", np.ndarray):
+        """
+        This function finds the genomes of the population with the same gene values, as
+        Population.unique does, by comparing the rows instead of hashing the genomes
+
+        Arguments:
+            self
+                the instance of the class
+
+        Returns:
+            unique_population, inverse:(PopulationArray, np.ndarray)
+                the first genome of each set of genomes with the same values, in the order
+                of the population, and the row of the genome of each genome in unique_population
+        """
+        # adding zero turns -0.0 into 0.0, so the rows are compared by value
+        _, first, inverse = np.unique(self.values + 0.0, axis = 0, return_index = True, return_inverse = True)
+
+        # np.unique sorts the rows, so the unique rows are put back in the order of the population
+        order = np.argsort(first)
+        rank = np.empty(len(order), dtype = np.int64)
+        rank[order] = np.arange(len(order))
+        return self[first[order]], rank[inverse.reshape(-1)]
+
+    def __getitem__(self, idx:Union[int, slice, np.ndarray]) -> Union[Genome, "PopulationArray"]:
+        # a genome for an int; a population of the selected rows otherwise
+        if isinstance(idx, (int, np.integer)):
+            return self.genome(idx)
+        return PopulationArray(self.layout, self.values[idx], self.genome_ids[idx])
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __str__(self) -> str:
+        # the same text as a Population
+        text = f"Population {self.population_id} has {len(self)} genome/s\n"
+        text = text + "It has the following gene/s:\n"
+        for genome in self.population:
+            text = text + genome.__str__()
+        return text
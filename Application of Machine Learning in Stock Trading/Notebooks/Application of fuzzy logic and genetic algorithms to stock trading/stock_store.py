@@ -0,0 +1,206 @@
+import os
+import glob
+import json
+import numpy as np
+import pandas as pd
+
+# the version of the layout of the store; a store of another version is converted again
+STORE_VERSION = 1
+
+# the columns of the stock data kept in the store
+STORE_FIELDS = ['Close', 'Open', 'High', 'Low', 'Volume']
+
+class StockStore():
+    """
+    This class provides a columnar binary copy of a directory of stock csv files. Each
+    ticker is converted once into two .npy files, the dates as int64 days since the epoch
+    and the (fields x T) prices and volumes, so a column is contiguous on disk. The files
+    are memory-mapped when a stock is loaded, so loading takes no parsing, and worker
+    processes that load the same stock share the pages of the file.
+
+    A manifest records the size and modification time of the csv file each ticker was
+    converted from, with its rows and dates; a ticker whose csv file changed is converted
+    again the next time it is loaded, and the tickers whose csv files were removed are
+    dropped from the store.
+    """
+
+    def __init__(self, source:str, directory:str = None, dtype:type = np.float64, fields:list[str] = STORE_FIELDS) -> None:
+        """
+        This function initializes the store and converts the csv files that are not
+        converted yet or that changed
+
+        Arguments:
+            source:str
+                the directory of the csv files, one file per ticker named <ticker>.csv
+
+            directory:str
+                the directory of the binary files; <source>/__store__ if not given
+
+            dtype:type
+                the type of the prices and volumes, np.float64 or np.float32; float32 halves
+                the size of the store but rounds the prices
+
+        Returns:
+            None
+        """
+        assert np.dtype(dtype) in (np.dtype(np.float64), np.dtype(np.float32)), "the store holds float64 or float32 values"
+        self.source = source
+        self.directory = os.path.join(source, '__store__') if directory is None else directory
+        self.dtype = np.dtype(dtype)
+        self.fields = list(fields)
+        self.manifest = self._read_manifest()
+        self.refresh()
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.directory, 'manifest.json')
+
+    def _read_manifest(self) -> dict:
+        # an empty manifest if there is none, or if it was written for another layout
+        empty = {"version": STORE_VERSION, "dtype": self.dtype.str, "fields": self.fields, "tickers": dict()}
+        if not os.path.exists(self.manifest_path):
+            return empty
+        with open(self.manifest_path, 'r') as f:
+            manifest = json.load(f)
+        if (manifest.get("version"), manifest.get("dtype"), manifest.get("fields")) != (STORE_VERSION, self.dtype.str, self.fields):
+            return empty
+        return manifest
+
+    def _write_manifest(self) -> None:
+        # write to a temporary file first so a reader never sees a partial manifest
+        temp_path = self.manifest_path + ".tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(self.manifest, f, indent = 1, sort_keys = True)
+        os.replace(temp_path, self.manifest_path)
+
+    def _paths(self, ticker:str) -> tuple[str, str]:
+        # the files of the dates and of the values of a ticker
+        return os.path.join(self.directory, f"{ticker}.dates.npy"), os.path.join(self.directory, f"{ticker}.values.npy")
+
+    def _is_stale(self, ticker:str) -> bool:
+        # a ticker is stale if its csv file changed since it was converted, or its files are missing
+        entry = self.manifest["tickers"].get(ticker)
+        if entry is None:
+            return True
+        stat = os.stat(os.path.join(self.source, f"{ticker}.csv"))
+        if (entry["source_size"], entry["source_mtime_ns"]) != (stat.st_size, stat.st_mtime_ns):
+            return True
+        return not all(os.path.exists(path) for path in self._paths(ticker))
+
+    def _convert(self, ticker:str) -> None:
+        """
+        This function converts the csv file of a ticker into its binary files
+
+        Arguments:
+            ticker:str
+                the ticker of the stock
+
+        Returns:
+            None
+        """
+        path = os.path.join(self.source, f"{ticker}.csv")
+        stat = os.stat(path)
+        df = pd.read_csv(path, index_col = 'Date', parse_dates = True)
+        missing = [field for field in self.fields if field not in df.columns]
+        assert len(missing) == 0, f"{ticker}.csv has no {', '.join(missing)} columns"
+
+        dates = df.index.to_numpy(dtype = 'datetime64[ns]').astype('datetime64[D]').astype(np.int64)
+        values = np.ascontiguousarray(df[self.fields].to_numpy(dtype = self.dtype).T)
+
+        # write to temporary files first so an interrupted conversion never leaves a partial file
+        for array, array_path in zip([dates, values], self._paths(ticker)):
+            temp_path = array_path + ".tmp.npy"
+            np.save(temp_path, array)
+            os.replace(temp_path, array_path)
+
+        self.manifest["tickers"][ticker] = {
+            "source_size": stat.st_size,
+            "source_mtime_ns": stat.st_mtime_ns,
+            "rows": len(df),
+            "first_date": str(df.index[0].date()) if len(df) > 0 else None,
+            "last_date": str(df.index[-1].date()) if len(df) > 0 else None,
+        }
+
+    def refresh(self) -> list[str]:
+        """
+        This function converts the csv files that are new or changed, and drops the tickers
+        whose csv files were removed
+
+        Arguments:
+            self
+                the instance of the class
+
+        Returns:
+            converted:list[str]
+                the tickers that were converted
+        """
+        if not os.path.exists(self.directory):
+            os.makedirs(self.directory)
+
+        tickers = sorted(os.path.splitext(os.path.basename(path))[0] for path in glob.glob(os.path.join(self.source, '*.csv')))
+        converted = [ticker for ticker in tickers if self._is_stale(ticker)]
+        for ticker in converted:
+            self._convert(ticker)
+
+        removed = [ticker for ticker in self.manifest["tickers"] if ticker not in tickers]
+        for ticker in removed:
+            del self.manifest["tickers"][ticker]
+            for path in self._paths(ticker):
+                if os.path.exists(path):
+                    os.remove(path)
+
+        if len(converted) > 0 or len(removed) > 0 or not os.path.exists(self.manifest_path):
+            self._write_manifest()
+        return converted
+
+    def load(self, ticker:str) -> pd.DataFrame:
+        """
+        This function loads the stock data of a ticker from the store
+
+        Arguments:
+            ticker:str
+                the ticker of the stock
+
+        Returns:
+            df:pd.DataFrame
+                the stock data indexed by date, as read by pd.read_csv with parse_dates; the
+                columns are read-only views of the memory-mapped file, so the dataframe
+                should be copied before it is modified in place
+        """
+        assert os.path.exists(os.path.join(self.source, f"{ticker}.csv")), f"there is no csv file for {ticker}"
+        if self._is_stale(ticker):
+            self._convert(ticker)
+            self._write_manifest()
+
+        dates_path, values_path = self._paths(ticker)
+        dates = np.load(dates_path)
+        values = np.load(values_path, mmap_mode = 'r')
+
+        # a dataframe keeps the (fields x T) array as its block, so the columns are not copied
+        index = pd.DatetimeIndex(dates.astype('datetime64[D]').astype('datetime64[ns]'), name = 'Date')
+        return pd.DataFrame(values.T, index = index, columns = self.fields, copy = False)
+
+    def load_all(self, tickers:list[str] = None) -> dict[str, pd.DataFrame]:
+        """
+        This function loads the stock data of several tickers from the store
+
+        Arguments:
+            tickers:list[str]
+                the tickers to be loaded; every ticker of the store if not given
+
+        Returns:
+            stocks:dict[str, pd.DataFrame]
+                the stock data of each ticker, as returned by load
+        """
+        tickers = self.tickers if tickers is None else tickers
+        return {ticker: self.load(ticker) for ticker in tickers}
+
+    @property
+    def tickers(self) -> list[str]:
+        return sorted(self.manifest["tickers"])
+
+    def __contains__(self, ticker:str) -> bool:
+        return ticker in self.manifest["tickers"]
+
+    def __len__(self) -> int:
+        return len(self.manifest["tickers"])
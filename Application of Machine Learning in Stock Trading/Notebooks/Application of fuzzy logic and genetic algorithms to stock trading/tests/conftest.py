@@ -0,0 +1,5 @@
+import os
+import sys
+
+# the modules of the notebook import each other by name, as in main.ipynb
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
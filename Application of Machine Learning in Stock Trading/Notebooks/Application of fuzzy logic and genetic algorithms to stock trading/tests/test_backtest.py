@@ -0,0 +1,174 @@
+import types
+import warnings
+import numpy as np
+import pandas as pd
+import pytest
+from Fitness import backtest
+
+def baseline_backtest(z_sum_rolling:np.ndarray, change:np.ndarray, entry_condition:list[float], stop_loss:float) -> (np.ndarray, np.ndarray, int):
+    """
+    The backtest loop of evaluate_fitness before backtest replaced it, copied verbatim;
+    only the stock and the genome are stand-ins built from the arrays
+    """
+    stock = types.SimpleNamespace(df = pd.DataFrame({'z_sum_rolling': np.asarray(z_sum_rolling, dtype = np.float64)}))
+    genome = types.SimpleNamespace(genome_dict = {
+        "entry_condition": types.SimpleNamespace(value = entry_condition),
+        "stop_loss": types.SimpleNamespace(value = stop_loss),
+    })
+
+    # initialize the following variables
+    stock.df['trailingstop'] = 0.
+    stock.df['returns'] = 1.0
+    stock.df['change'] = np.asarray(change, dtype = np.float64)
+    stock.df['regime'] = 0
+    has_long_position = False
+    num_trades = 0
+    buy_locator = list()
+    sell_locator = list()
+    trailingstop = 1
+    
+    for i in range(0, len(stock.df)-1):
+        # check condition for entry
+        condition1 = stock.df['z_sum_rolling'].iat[i] >= genome.genome_dict["entry_condition"].value[1]
+        condition2 = has_long_position is False
+        condition3 = stock.df['regime'].iat[i] != -1
+        if condition1 and condition2 and condition3:
+            # buy stock in the next day
+            stock.df['regime'].iat[i+1] = 1
+            has_long_position = True
+            num_trades += 1
+            buy_locator.append(stock.df.iloc[i])
+            trailingstop = 1
+            continue
+            
+        # establish trailing stop
+        if has_long_position is True:
+            trailingstop *= stock.df['change'].iat[i]
+                
+        # check conditions for exit
+        condition1 = stock.df['z_sum_rolling'].iat[i] < genome.genome_dict["entry_condition"].value[0]
+        condition2 = trailingstop < genome.genome_dict["stop_loss"].value
+        condition3 = has_long_position is True
+        if (condition1 or condition2) and condition3:
+            stock.df['regime'].iat[i+1] = -1
+            has_long_position = False
+            sell_locator.append(stock.df.iloc[i])
+            trailingstop = 1
+
+    # put 1 between 1 and -1 
+    for i in range(1, len(stock.df)):
+        if stock.df['regime'].iat[i-1] == 1 and stock.df['regime'].iat[i] == 0:
+            stock.df['regime'].iat[i] = 1
+
+    # compute returns
+    for i in range(0, len(stock.df)):
+        if stock.df['regime'].iat[i] != 0:
+            stock.df['returns'].iat[i] = stock.df['change'].iat[i]
+
+    return stock.df['regime'].to_numpy(), stock.df['returns'].to_numpy(), num_trades
+
+def random_case(rng:np.random.Generator) -> dict:
+    # a rolling inference value with a NaN warm-up, the changes of a close with a NaN
+    # first bar as from pct_change, and levels that are sometimes equal or NaN
+    num_bars = int(rng.choice([0, 1, 2, int(rng.integers(3, 150))]))
+    z_sum_rolling = np.cumsum(rng.normal(0, 8, num_bars)) + rng.uniform(20, 80)
+    z_sum_rolling[:int(rng.integers(0, num_bars + 1))] = np.nan
+    change = 1 + rng.normal(0, 0.03, num_bars)
+    if num_bars > 0:
+        change[0] = np.nan
+
+    exit_level = rng.uniform(20, 80)
+    entry_level = rng.choice([exit_level, rng.uniform(exit_level, 100), rng.uniform(0, 100), np.nan])
+    if rng.random() < 0.05:
+        exit_level = np.nan
+    return {
+        "z_sum_rolling": z_sum_rolling,
+        "change": change,
+        "entry_condition": [exit_level, entry_level],
+        "stop_loss": rng.uniform(0.8, 1.05),
+    }
+
+def trading_case(rng:np.random.Generator) -> dict:
+    # an inference value that keeps crossing the levels, so positions are bought and sold often
+    num_bars = int(rng.integers(60, 200))
+    bars = np.arange(num_bars)
+    z_sum_rolling = 50 + 30 * np.sin(bars / rng.uniform(2, 8) + rng.uniform(0, 2 * np.pi)) + rng.normal(0, 5, num_bars)
+    z_sum_rolling[:int(rng.integers(0, 20))] = np.nan
+    change = 1 + rng.normal(0, 0.03, num_bars)
+    change[0] = np.nan
+    exit_level = rng.uniform(30, 50)
+    return {
+        "z_sum_rolling": z_sum_rolling,
+        "change": change,
+        "entry_condition": [exit_level, rng.uniform(exit_level, 70)],
+        "stop_loss": rng.uniform(0.9, 1.0),
+    }
+
+def run_baseline(case:dict) -> (np.ndarray, np.ndarray, int):
+    with warnings.catch_warnings():
+        # the baseline loop writes through chained assignment
+        warnings.simplefilter("ignore")
+        return baseline_backtest(**case)
+
+def same(expected:np.ndarray, actual:np.ndarray) -> bool:
+    # exactly equal, with NaN equal to NaN
+    expected = np.asarray(expected, dtype = np.float64)
+    actual = np.asarray(actual, dtype = np.float64)
+    return expected.shape == actual.shape and bool(((expected == actual) | (np.isnan(expected) & np.isnan(actual))).all())
+
+CASES = [random_case(np.random.default_rng(seed)) for seed in range(300)]
+TRADING_CASES = [trading_case(np.random.default_rng(seed)) for seed in range(300, 400)]
+
+def test_random_cases_cover_the_edge_cases() -> None:
+    assert any(len(case["change"]) == 0 for case in CASES)
+    assert any(len(case["change"]) > 0 and np.isnan(case["z_sum_rolling"][0]) for case in CASES)
+    assert any(case["entry_condition"][0] == case["entry_condition"][1] for case in CASES)
+    assert any(np.isnan(case["entry_condition"]).any() for case in CASES)
+
+@pytest.mark.parametrize("case", CASES + TRADING_CASES)
+def test_backtest_matches_baseline(case:dict) -> None:
+    expected_regime, expected_returns, expected_trades = run_baseline(case)
+    regime, returns, num_trades = backtest(**case)
+    assert same(expected_regime, regime)
+    assert same(expected_returns, returns)
+    assert expected_trades == num_trades
+
+@pytest.mark.parametrize("case", TRADING_CASES)
+@pytest.mark.parametrize("max_trades", [0, 1, 3])
+def test_max_trades_stops_at_the_trade_that_breaks_the_limit(case:dict, max_trades:int) -> None:
+    expected_regime, expected_returns, expected_trades = run_baseline(case)
+    regime, returns, num_trades = backtest(**case, max_trades = max_trades)
+
+    # the arrays are those of the baseline up to the bar the limit is hit
+    length = len(regime)
+    assert same(expected_regime[:length], regime)
+    assert same(expected_returns[:length], returns)
+    if expected_trades > max_trades:
+        # the extra trade is bought on the last bar
+        entries = np.flatnonzero((expected_regime == 1) & (np.concatenate([[0], expected_regime[:-1]]) != 1))
+        assert num_trades == max_trades + 1
+        assert length == entries[max_trades] + 1
+    else:
+        assert num_trades == expected_trades
+        assert length == len(expected_regime)
+
+@pytest.mark.parametrize("case", TRADING_CASES)
+@pytest.mark.parametrize("max_drawdown", [0.0, 0.05, 0.2])
+def test_max_drawdown_stops_at_the_bar_that_breaks_the_limit(case:dict, max_drawdown:float) -> None:
+    expected_regime, expected_returns, expected_trades = run_baseline(case)
+    regime, returns, num_trades = backtest(**case, max_drawdown = max_drawdown)
+
+    length = len(regime)
+    assert same(expected_regime[:length], regime)
+    assert same(expected_returns[:length], returns)
+    assert num_trades == int(((expected_regime[:length] == 1) & (np.concatenate([[0], expected_regime[:length - 1]]) != 1)).sum())
+
+    # the drawdown of the growth of the strategy first breaks the limit on the last bar;
+    # the last bar of the series is not checked while the position is held
+    growth = np.cumprod(expected_returns)
+    drawdown = 1 - growth / np.maximum.accumulate(np.concatenate([[1.], growth]))[1:]
+    broken = np.flatnonzero(drawdown > max_drawdown)
+    if length < len(expected_regime):
+        assert broken[0] == length - 1
+    else:
+        assert len(broken) == 0 or broken[0] >= length - 1
@@ -0,0 +1,56 @@
+import functools
+import os
+import pickle
+import random
+import numpy as np
+import pandas as pd
+from Fitness import evaluate_fitness, sortino_fitness
+from Genome import Genome
+from Seed_genome import seed_genome
+from Selection import evaluate_population
+from fitness_cache import FitnessCache
+from fitness_evaluator import FitnessEvaluator
+from indicator_tensor import IndicatorTensorStore
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "Data", "PH-historical-stock-price-data-csv", "GLO.csv")
+
+def test_function_key_includes_the_indicator_tensors(tmp_path) -> None:
+    df = pd.read_csv(DATA_PATH, index_col = "Date", parse_dates = True).iloc[:400]
+    tensors = IndicatorTensorStore.build(df, str(tmp_path), "GLO", max_window = 20)
+    other_tensors = IndicatorTensorStore.build(df.iloc[:300], str(tmp_path), "GLO", max_window = 20)
+
+    # the fitness with the warmed-up indicators of the tensors is not the fitness without them
+    plain_key = FitnessCache.function_key(evaluate_fitness)
+    tensor_key = FitnessCache.function_key(functools.partial(evaluate_fitness, tensors = tensors))
+    assert plain_key != tensor_key
+    assert tensor_key != FitnessCache.function_key(functools.partial(evaluate_fitness, tensors = other_tensors))
+    assert tensor_key != FitnessCache.function_key(functools.partial(sortino_fitness, tensors = tensors))
+
+    # the key of the same tensors is the same in every process
+    assert tensor_key == FitnessCache.function_key(functools.partial(evaluate_fitness, tensors = pickle.loads(pickle.dumps(tensors))))
+
+def test_timed_out_genomes_are_not_cached() -> None:
+    df = pd.read_csv(DATA_PATH, index_col = "Date", parse_dates = True).iloc[2000:2500]
+    random.seed(7)
+    genome_list = [Genome(seed_genome())]
+    for _ in range(3):
+        genome_list.append(Genome(seed_genome()))
+        for _ in range(3):
+            genome_list[-1].mutate()
+    cache = FitnessCache()
+
+    # every evaluation runs past a tiny timeout, and none of its -inf is cached
+    with FitnessEvaluator(train_set = [df], fitness_func = evaluate_fitness, processes = 2, timeout = 1e-4) as evaluator:
+        fitness = evaluate_population(genome_list, evaluate_fitness, df, cache = cache, evaluator = evaluator, window = 0)
+        assert evaluator.incomplete == list(range(len(genome_list)))
+    assert (fitness == float('-inf')).all()
+    assert len(cache) == 0
+
+    # without a timeout the genomes are evaluated again, as they are without the cache
+    with FitnessEvaluator(train_set = [df], fitness_func = evaluate_fitness, processes = 2) as evaluator:
+        fitness = evaluate_population(genome_list, evaluate_fitness, df, cache = cache, evaluator = evaluator, window = 0)
+        expected = evaluate_population(genome_list, evaluate_fitness, df, evaluator = evaluator, window = 0)
+        assert evaluator.incomplete == list()
+    assert np.array_equal(fitness, expected)
+    assert np.isfinite(fitness[0])
+    assert len(cache) == len(genome_list)
@@ -0,0 +1,75 @@
+import copy
+import os
+import random
+import warnings
+import numpy as np
+import pandas as pd
+import pytest
+from Base_genome import base_genome
+from Fitness import get_fuzzy_stock_df
+from Genome import Genome
+from Seed_genome import seed_genome
+from fuzzy_batch import genome_RSI_params, batch_RSI_z_sum, batch_rolling_mean
+from indicator_tensor import IndicatorTensorStore
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "Data", "PH-historical-stock-price-data-csv", "GLO.csv")
+
+@pytest.fixture(scope = "module")
+def series() -> pd.DataFrame:
+    df = pd.read_csv(DATA_PATH, index_col = "Date", parse_dates = True)
+    return df.iloc[-700:]
+
+@pytest.fixture(scope = "module")
+def genome_list() -> list[Genome]:
+    random.seed(11)
+    genomes = [Genome(seed_genome())]
+    for _ in range(30):
+        genome = Genome(base_genome())
+        genome.initialize_genome()
+        genomes.append(genome)
+    return genomes
+
+def same(batch:np.ndarray, expected:np.ndarray) -> bool:
+    # exactly equal, with NaN equal to NaN
+    batch = np.asarray(batch, dtype = np.float64)
+    expected = np.asarray(expected, dtype = np.float64)
+    return bool(((batch == expected) | (np.isnan(batch) & np.isnan(expected))).all())
+
+def expected_z_sum_rolling(series:pd.DataFrame, genome_list:list[Genome], tensors:IndicatorTensorStore = None) -> list[np.ndarray]:
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return [get_fuzzy_stock_df(series.copy(), genome, cache = None, tensors = tensors).df['z_sum_rolling'].to_numpy() for genome in genome_list]
+
+def test_tensor_batch_matches_get_fuzzy_stock_df(series:pd.DataFrame, genome_list:list[Genome], tmp_path) -> None:
+    tensors = IndicatorTensorStore.build(series, str(tmp_path), "GLO")
+    tensor = tensors.tensors[0]
+    params, RSI_windows, z_rolling_windows = genome_RSI_params(genome_list)
+    z_sum_rolling = batch_rolling_mean(batch_RSI_z_sum(tensor.matrix, params, rows = RSI_windows - tensor.min_window), z_rolling_windows)
+
+    for genome, batch, expected in zip(genome_list, z_sum_rolling, expected_z_sum_rolling(series, genome_list, tensors)):
+        assert same(batch, expected), genome.genome_dict["RSI_window"].value
+
+def test_shared_series_matches_get_fuzzy_stock_df(series:pd.DataFrame, genome_list:list[Genome]) -> None:
+    # copies of the genomes with the window of the seed genome share one RSI series
+    window = genome_list[0].genome_dict["RSI_window"].value
+    genome_list = [Genome(copy.deepcopy(genome.genome)) for genome in genome_list]
+    for genome in genome_list:
+        genome.genome_dict["RSI_window"].value = window
+    stock = get_fuzzy_stock_df(series.copy(), genome_list[0], cache = None)
+    params, _, z_rolling_windows = genome_RSI_params(genome_list)
+    z_sum_rolling = batch_rolling_mean(batch_RSI_z_sum(stock.df[f"RSI{window}"].to_numpy(), params), z_rolling_windows)
+
+    for batch, expected in zip(z_sum_rolling, expected_z_sum_rolling(series, genome_list)):
+        assert same(batch, expected)
+
+def test_nodes_out_of_order_give_a_row_of_nan(series:pd.DataFrame, genome_list:list[Genome]) -> None:
+    params, RSI_windows, _ = genome_RSI_params(genome_list[:4])
+    indicator = np.linspace(0, 100, 201)
+    expected = batch_RSI_z_sum(indicator, params)
+
+    # the low membership of the second genome and the middle membership of the fourth are reversed
+    params[1, [4, 5]] = params[1, [5, 4]]
+    params[3, [6, 8]] = params[3, [8, 6]]
+    z_sum = batch_RSI_z_sum(indicator, params)
+    assert np.isnan(z_sum[[1, 3]]).all()
+    assert same(z_sum[[0, 2]], expected[[0, 2]])
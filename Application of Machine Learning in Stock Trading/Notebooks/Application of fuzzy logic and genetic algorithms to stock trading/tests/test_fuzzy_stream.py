@@ -0,0 +1,82 @@
+import os
+import random
+import warnings
+import numpy as np
+import pandas as pd
+import pytest
+from Base_genome import base_genome
+from Fitness import get_fuzzy_stock_df
+from Genome import Genome
+from Seed_genome import seed_genome
+from fuzzy_stream import FuzzyStream
+from fuzzy_ta import fuzzy_TA
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "Data", "PH-historical-stock-price-data-csv", "GLO.csv")
+
+# the bars of the history fed by warm_up, and the bars fed one at a time by update
+NUM_WARM_UP = 600
+NUM_STREAMED = 100
+
+@pytest.fixture(scope = "module")
+def series() -> pd.DataFrame:
+    df = pd.read_csv(DATA_PATH, index_col = "Date", parse_dates = True)
+    return df.iloc[-(NUM_WARM_UP + NUM_STREAMED):]
+
+def same(batch:np.ndarray, streamed:np.ndarray) -> bool:
+    # exactly equal, with NaN equal to NaN
+    batch = np.asarray(batch, dtype = np.float64)
+    streamed = np.asarray(streamed, dtype = np.float64)
+    return bool(((batch == streamed) | (np.isnan(batch) & np.isnan(streamed))).all())
+
+def stream_bars(stream:FuzzyStream, series:pd.DataFrame) -> list:
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        stream.warm_up(series.iloc[:NUM_WARM_UP])
+        return [stream.update(bar) for _, bar in series.iloc[NUM_WARM_UP:].iterrows()]
+
+def assert_same_as_batch(stock:fuzzy_TA, outputs:list, z_column:str) -> None:
+    # the memberships and the inference value of every streamed bar are those of the batch computation
+    u = stock.u.to_frame().iloc[NUM_WARM_UP:]
+    assert len(u.columns) > 0
+    for column in u.columns:
+        assert same(u[column], [output[0][column] for output in outputs]), column
+    assert all(set(output[0]) == set(u.columns) for output in outputs)
+    assert same(stock.df[z_column].iloc[NUM_WARM_UP:], [output[1] for output in outputs])
+
+def random_genomes(num_genomes:int) -> list[Genome]:
+    random.seed(5)
+    genomes = list()
+    for _ in range(num_genomes):
+        genome = Genome(base_genome())
+        genome.initialize_genome()
+        genomes.append(genome)
+    return genomes
+
+@pytest.mark.parametrize("genome", [Genome(seed_genome())] + random_genomes(3))
+def test_genome_matches_batch(series:pd.DataFrame, genome:Genome) -> None:
+    outputs = stream_bars(FuzzyStream.from_genome(genome), series)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        stock = get_fuzzy_stock_df(series.copy(), genome, cache = None)
+    assert_same_as_batch(stock, outputs, "z_sum_rolling")
+
+@pytest.mark.parametrize("rules", [
+    # StochRSI_KxD looks up k and d from one shared state
+    [("StochRSI_KxD", dict(window = 14)), ("StochRSI", dict(window = 14))],
+    [("RSI", dict(window = 14)), ("WilliamsR", dict()), ("TSI", dict()), ("BB_pband", dict()), ("CCI", dict()), ("STC", dict()), ("Fisher_trans", dict())],
+    # MACD line, diff, and signal share a state as well
+    [("MACD", dict()), ("PSAR", dict())],
+])
+def test_rules_match_batch(series:pd.DataFrame, rules:list) -> None:
+    stream = FuzzyStream()
+    for method, kwargs in rules:
+        stream.add(method, **kwargs)
+    outputs = stream_bars(stream, series)
+
+    stock = fuzzy_TA(series.copy(), cache = None)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        for method, kwargs in rules:
+            getattr(stock, method)(**kwargs)
+        stock.z_total()
+    assert_same_as_batch(stock, outputs, "z_sum")